@@ -1 +1,464 @@
-# analysis_db.py - Created 2025-09-03 19:40:11.307145
+"""
+Database module for MalSim Pro
+Handles storage and retrieval of analysis sessions and results
+"""
+
+import sqlite3
+import json
+import os
+import heapq
+from contextlib import ExitStack
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Any, Tuple
+
+from db_pool import get_pool
+from batch_writer import BatchEventWriter
+from db_migrations import SESSION_TYPE_PREFIX, count_statistics, migrate, write_statistics
+from pagination import build_page_query
+from process_lineage import ProcessKey, build_tree
+from timeseries import TimeSeriesRecorder, decode_chunk, downsample
+from session_ids import is_legacy_session_id, new_session_id
+
+# (get_session_events key, table) for every per-session event table
+EVENT_TABLES = (
+    ('processes', 'process_events'),
+    ('files', 'file_events'),
+    ('network', 'network_events'),
+    ('system', 'system_events'),
+)
+
+STREAM_FETCH_SIZE = 500
+
+PROCESS_EVENT_SQL = """
+    INSERT INTO process_events
+    (session_id, timestamp, event_type, process_name, process_id, parent_id, command_line, details_json)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+FILE_EVENT_SQL = """
+    INSERT INTO file_events
+    (session_id, timestamp, event_type, file_path, file_size, file_hash, operation, details_json)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+NETWORK_EVENT_SQL = """
+    INSERT INTO network_events
+    (session_id, timestamp, event_type, protocol, src_ip, src_port, dst_ip, dst_port, details_json)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+LINEAGE_SQL = """
+    INSERT INTO process_lineage
+    (session_id, pid, create_time, ppid, parent_create_time, name, cmdline, exit_time)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (session_id, pid, create_time) DO UPDATE SET exit_time = excluded.exit_time
+"""
+
+METRIC_CHUNK_SQL = """
+    INSERT INTO metric_series (session_id, metric, resolution, start_time, count, data)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+SYSTEM_EVENT_SQL = """
+    INSERT INTO system_events
+    (session_id, timestamp, event_type, category, description, severity, details_json)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+class AnalysisDB:
+    def __init__(self, db_path: str = None):
+        if db_path is None:
+            db_path = os.path.join(os.path.dirname(__file__), 'malsim.db')
+
+        self.db_path = db_path
+        self.pool = get_pool(db_path)
+        self.event_writer = None
+        self.init_database()
+
+    def init_database(self):
+        """Create or upgrade the schema; a no-op when already current"""
+        applied = migrate(self.pool)
+        if applied:
+            print(f"🗄️  Database initialized successfully (schema v{applied[-1]})")
+
+    def save_analysis_session(self, session_data: Dict[str, Any]) -> str:
+        """Save a new analysis session"""
+        session_id = new_session_id(session_data['type'])
+
+        with self.pool.transaction() as cursor:
+            cursor.execute("""
+                INSERT INTO sessions (session_id, malware_type, start_time, duration, config_json)
+                VALUES (?, ?, ?, ?, ?)
+            """, (
+                session_id,
+                session_data['type'],
+                session_data['timestamp'],
+                session_data.get('duration', 0),
+                json.dumps(session_data)
+            ))
+
+        return session_id
+
+    def start_batch_writer(self, **kwargs) -> BatchEventWriter:
+        """Route save_*_event calls through a background batch writer"""
+        if self.event_writer is None:
+            self.event_writer = BatchEventWriter(self.pool, **kwargs)
+            self.event_writer.start()
+        return self.event_writer
+
+    def stop_batch_writer(self):
+        """Flush queued events and return to synchronous writes"""
+        if self.event_writer is not None:
+            self.event_writer.stop()
+            self.event_writer = None
+
+    def flush_events(self):
+        """Block until all queued events are written"""
+        if self.event_writer is not None:
+            self.event_writer.flush()
+
+    def _write_event(self, sql: str, params: tuple):
+        """Queue an event insert, or write it directly without a batch writer"""
+        if self.event_writer is not None:
+            self.event_writer.submit(sql, params)
+            return
+
+        with self.pool.transaction() as cursor:
+            cursor.execute(sql, params)
+
+    def save_process_event(self, session_id: str, event: Dict[str, Any]):
+        """Save process monitoring event"""
+        self._write_event(PROCESS_EVENT_SQL, (
+            session_id,
+            event.get('timestamp', datetime.now().isoformat()),
+            event.get('event_type', event.get('type', 'unknown')),
+            event.get('process_name', event.get('name', '')),
+            event.get('process_id', event.get('pid', 0)),
+            event.get('parent_id', event.get('ppid', 0)),
+            event.get('command_line', event.get('cmdline', '')),
+            json.dumps(event)
+        ))
+
+    def save_file_event(self, session_id: str, event: Dict[str, Any]):
+        """Save file system monitoring event"""
+        self._write_event(FILE_EVENT_SQL, (
+            session_id,
+            event.get('timestamp', datetime.now().isoformat()),
+            event.get('event_type', event.get('type', 'unknown')),
+            event.get('file_path', event.get('path', '')),
+            event.get('file_size'),
+            event.get('file_hash'),
+            event.get('operation', ''),
+            json.dumps(event)
+        ))
+
+    def save_network_event(self, session_id: str, event: Dict[str, Any]):
+        """Save network monitoring event"""
+        self._write_event(NETWORK_EVENT_SQL, (
+            session_id,
+            event.get('timestamp', datetime.now().isoformat()),
+            event.get('event_type', 'unknown'),
+            event.get('protocol', ''),
+            event.get('src_ip', ''),
+            event.get('src_port', 0),
+            event.get('dst_ip', ''),
+            event.get('dst_port', 0),
+            json.dumps(event)
+        ))
+
+    def save_system_event(self, session_id: str, event: Dict[str, Any], category: str = 'system'):
+        """Save a generic monitoring event"""
+        self._write_event(SYSTEM_EVENT_SQL, (
+            session_id,
+            event.get('timestamp', datetime.now().isoformat()),
+            event.get('event_type', event.get('type', 'unknown')),
+            category,
+            event.get('description', ''),
+            event.get('severity', 'info'),
+            json.dumps(event, default=str)
+        ))
+
+    def get_sessions(self, limit: int = 50, after: Optional[Tuple[str, int]] = None,
+                     malware_type: Optional[str] = None, status: Optional[str] = None,
+                     since: Optional[str] = None, until: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get analysis sessions, newest first
+
+        `after` is a (created_at, id) pair from the previous page's last row;
+        `since`/`until` bound created_at ('YYYY-MM-DD HH:MM:SS').
+        """
+        sql, params = build_page_query(
+            'sessions', '*', 'created_at', after=after,
+            filters=[('malware_type', malware_type), ('status', status)],
+            since=since, until=until, limit=limit
+        )
+        with self.pool.cursor(row_factory=sqlite3.Row) as cursor:
+            cursor.execute(sql, params)
+            sessions = [dict(row) for row in cursor.fetchall()]
+
+        return sessions
+
+    def get_session_events(self, session_id: str) -> Dict[str, List[Dict[str, Any]]]:
+        """Get all events for a specific session"""
+        events = {
+            'processes': [],
+            'files': [],
+            'network': [],
+            'system': []
+        }
+
+        with self.pool.cursor(row_factory=sqlite3.Row) as cursor:
+            # Get process events
+            cursor.execute('SELECT * FROM process_events WHERE session_id = ? ORDER BY timestamp', (session_id,))
+            events['processes'] = [dict(row) for row in cursor.fetchall()]
+
+            # Get file events
+            cursor.execute('SELECT * FROM file_events WHERE session_id = ? ORDER BY timestamp', (session_id,))
+            events['files'] = [dict(row) for row in cursor.fetchall()]
+
+            # Get network events
+            cursor.execute('SELECT * FROM network_events WHERE session_id = ? ORDER BY timestamp', (session_id,))
+            events['network'] = [dict(row) for row in cursor.fetchall()]
+
+            # Get system events
+            cursor.execute('SELECT * FROM system_events WHERE session_id = ? ORDER BY timestamp', (session_id,))
+            events['system'] = [dict(row) for row in cursor.fetchall()]
+
+        return events
+
+    def save_process_lineage(self, session_id: str, nodes: List[Dict[str, Any]]):
+        """Store ProcessLineage rows; re-saving a node only updates its exit_time"""
+        for node in nodes:
+            self._write_event(LINEAGE_SQL, (
+                session_id,
+                node['pid'],
+                node['create_time'],
+                node['ppid'],
+                node['parent_create_time'],
+                node['name'],
+                node['cmdline'],
+                node['exit_time']
+            ))
+
+    def get_process_tree(self, session_id: str, root: Optional[ProcessKey] = None) -> List[Dict[str, Any]]:
+        """Nested process tree of a session, optionally only the subtree under `root`"""
+        with self.pool.cursor(row_factory=sqlite3.Row) as cursor:
+            cursor.execute("""
+                SELECT pid, create_time, ppid, parent_create_time, name, cmdline, exit_time
+                FROM process_lineage WHERE session_id = ?
+                ORDER BY create_time
+            """, (session_id,))
+            return build_tree((dict(row) for row in cursor), root)
+
+    def save_timeseries(self, session_id: str, recorder: TimeSeriesRecorder) -> int:
+        """Write the recorder's closed rollup buckets; returns the chunks written"""
+        chunks = recorder.drain_chunks()
+        for chunk in chunks:
+            self._write_event(METRIC_CHUNK_SQL, (
+                session_id,
+                chunk['metric'],
+                chunk['resolution'],
+                chunk['start_time'],
+                chunk['count'],
+                sqlite3.Binary(chunk['data'])
+            ))
+        return len(chunks)
+
+    def get_timeseries(self, session_id: str, metric: str, resolution: Optional[int] = None,
+                       max_points: int = 500, method: str = 'lttb') -> Dict[str, Any]:
+        """Downsampled points of one metric; defaults to the finest stored resolution"""
+        with self.pool.cursor() as cursor:
+            if resolution is None:
+                row = cursor.execute(
+                    'SELECT MIN(resolution) FROM metric_series WHERE session_id = ? AND metric = ?',
+                    (session_id, metric)
+                ).fetchone()
+                resolution = row[0]
+            cursor.execute("""
+                SELECT start_time, data FROM metric_series
+                WHERE session_id = ? AND metric = ? AND resolution = ?
+                ORDER BY start_time
+            """, (session_id, metric, resolution))
+            buckets = [bucket for start_time, data in cursor
+                       for bucket in decode_chunk(start_time, resolution, data)]
+
+        return {
+            'metric': metric,
+            'resolution': resolution,
+            'buckets': len(buckets),
+            'points': downsample(buckets, max_points, method),
+        }
+
+    def resolve_session_id(self, session_id: str) -> str:
+        """Map a pre-ULID session id to its current id; other ids pass through"""
+        if not is_legacy_session_id(session_id):
+            return session_id
+
+        with self.pool.cursor() as cursor:
+            cursor.execute('SELECT session_id FROM session_aliases WHERE legacy_id = ?', (session_id,))
+            row = cursor.fetchone()
+        return row[0] if row else session_id
+
+    def session_exists(self, session_id: str) -> bool:
+        """Check whether a session has been recorded"""
+        with self.pool.cursor() as cursor:
+            cursor.execute('SELECT 1 FROM sessions WHERE session_id = ?', (session_id,))
+            return cursor.fetchone() is not None
+
+    def iter_session_events(self, session_id: str) -> Iterator[Dict[str, Any]]:
+        """Stream all events for a session in timestamp order
+
+        Rows come straight off one cursor per event table and are merged
+        lazily, so memory use does not grow with the size of the session.
+        Each event carries a 'category' key matching get_session_events.
+        """
+        with ExitStack() as stack:
+            streams = []
+            for category, table in EVENT_TABLES:
+                cursor = stack.enter_context(self.pool.cursor(row_factory=sqlite3.Row))
+                cursor.arraysize = STREAM_FETCH_SIZE
+                cursor.execute(f'SELECT * FROM {table} WHERE session_id = ? ORDER BY timestamp', (session_id,))
+                streams.append(self._tag_rows(cursor, category))
+
+            yield from heapq.merge(*streams, key=lambda event: event['timestamp'])
+
+    @staticmethod
+    def _tag_rows(cursor: sqlite3.Cursor, category: str) -> Iterator[Dict[str, Any]]:
+        while True:
+            rows = cursor.fetchmany()
+            if not rows:
+                return
+            for row in rows:
+                event = dict(row)
+                event['category'] = category
+                yield event
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get database statistics from the trigger-maintained counters"""
+        stats = {
+            'sessions_by_type': {},
+            'total_process_events': 0,
+            'total_file_events': 0,
+            'total_network_events': 0,
+        }
+
+        with self.pool.cursor() as cursor:
+            cursor.execute('SELECT name, value FROM stats_counters')
+            for name, value in cursor.fetchall():
+                if name.startswith(SESSION_TYPE_PREFIX):
+                    if value > 0:
+                        stats['sessions_by_type'][name[len(SESSION_TYPE_PREFIX):]] = value
+                elif name != 'system_events':
+                    stats[f"total_{name}"] = value
+
+            # Recent activity (range scan on idx_sessions_created_at)
+            cursor.execute("""
+                SELECT COUNT(*) FROM sessions
+                WHERE created_at > datetime('now', '-24 hours')
+            """)
+            stats['sessions_last_24h'] = cursor.fetchone()[0]
+
+        return stats
+
+    def recompute_statistics(self) -> Dict[str, Tuple[int, int]]:
+        """Rebuild stats_counters from a full recount
+
+        Returns the counters that had drifted as {name: (stored, actual)};
+        an empty dict means the counters matched the tables exactly.
+        """
+        self.flush_events()
+
+        with self.pool.transaction() as cursor:
+            cursor.execute('SELECT name, value FROM stats_counters')
+            stored = dict(cursor.fetchall())
+            actual = count_statistics(cursor)
+            write_statistics(cursor, actual)
+
+        drift = {}
+        for name in set(stored) | set(actual):
+            if stored.get(name, 0) != actual.get(name, 0):
+                drift[name] = (stored.get(name, 0), actual.get(name, 0))
+        return drift
+
+    def cleanup_old_sessions(self, days: int = 30):
+        """Clean up sessions older than specified days, including their events"""
+        from retention import RetentionEngine
+
+        report = RetentionEngine(self, retention_days=days).run_once()
+        return report['sessions_deleted']
+
+    def get_expired_session_ids(self, days: int, limit: int = 100) -> List[str]:
+        """Get up to `limit` session ids created more than `days` days ago"""
+        # created_at is stored by CURRENT_TIMESTAMP, i.e. UTC 'YYYY-MM-DD HH:MM:SS'
+        cutoff = (datetime.utcnow() - timedelta(days=days)).strftime('%Y-%m-%d %H:%M:%S')
+
+        with self.pool.cursor() as cursor:
+            cursor.execute("""
+                SELECT session_id FROM sessions
+                WHERE created_at < ?
+                ORDER BY created_at
+                LIMIT ?
+            """, (cutoff, limit))
+            return [row[0] for row in cursor.fetchall()]
+
+    def delete_session_rows(self, table: str, session_id: str, batch_size: int = 500) -> int:
+        """Delete at most `batch_size` rows of a session from one table
+
+        Runs as its own short transaction so writers are never blocked for
+        long; callers loop until it returns fewer than `batch_size`.
+        """
+        with self.pool.transaction() as cursor:
+            cursor.execute(f"""
+                DELETE FROM {table} WHERE id IN (
+                    SELECT id FROM {table} WHERE session_id = ? LIMIT ?
+                )
+            """, (session_id, batch_size))
+            return cursor.rowcount
+
+    def get_storage_info(self) -> Dict[str, int]:
+        """Get page-level size information for the database file"""
+        with self.pool.cursor() as cursor:
+            page_size = cursor.execute('PRAGMA page_size').fetchone()[0]
+            page_count = cursor.execute('PRAGMA page_count').fetchone()[0]
+            freelist_count = cursor.execute('PRAGMA freelist_count').fetchone()[0]
+            auto_vacuum = cursor.execute('PRAGMA auto_vacuum').fetchone()[0]
+
+        return {
+            'page_size': page_size,
+            'page_count': page_count,
+            'freelist_count': freelist_count,
+            'auto_vacuum': auto_vacuum,
+            'size_bytes': page_size * page_count,
+        }
+
+    def enable_incremental_vacuum(self) -> bool:
+        """Switch an existing database to auto_vacuum=INCREMENTAL
+
+        New databases get this from the pool pragmas; older files need a full
+        VACUUM once to rebuild with the pointer-map pages. That rewrites the
+        whole file under an exclusive lock, so it is only run as an explicit
+        maintenance step (main.py --enable-incremental-vacuum), never by the
+        retention job. Returns True if a conversion was performed.
+        """
+        if self.get_storage_info()['auto_vacuum'] == 2:
+            return False
+
+        self.flush_events()
+        conn = self.pool.connection()
+        conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        conn.execute('VACUUM')
+        return True
+
+    def incremental_vacuum(self, pages: int = 0) -> int:
+        """Return up to `pages` free pages to the OS (0 = all); returns pages freed"""
+        before = self.get_storage_info()['page_count']
+        conn = self.pool.connection()
+        # The pragma frees one page per step, and a cursor stops stepping a
+        # statement that returns no columns; executescript runs it to completion
+        conn.executescript(f'PRAGMA incremental_vacuum({int(pages)});')
+        return before - self.get_storage_info()['page_count']
+
+    def close(self):
+        """Close all pooled connections to this database"""
+        self.stop_batch_writer()
+        self.pool.close_all()
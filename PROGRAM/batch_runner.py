@@ -0,0 +1,162 @@
+"""
+Batch Runner for MalSim Pro
+Runs many simulations across a process pool, each in its own working directory
+"""
+
+import contextlib
+import importlib
+import itertools
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, Iterable, List, Optional
+
+from sim_cache import cache_key, new_seed
+from sim_clock import create_clock
+from simulation_db import SimpleDB
+
+# Simulation type -> (module, class) run by the workers
+SIMULATORS = {
+    'ransomware': ('ransomware_sim', 'RansomwareSimulator'),
+    'trojan': ('trojan_sim', 'TrojanSimulator'),
+    'worm': ('worm_sim', 'WormSimulator'),
+}
+
+DEFAULT_CLOCK = 'virtual'
+
+
+def run_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Run one simulation in a worker process and return its results
+
+    The simulator works in a fresh directory under job['base_dir'], which is
+    removed afterwards unless job['keep_dirs'] is set.
+    """
+    module_name, class_name = SIMULATORS[job['type']]
+    simulator_class = getattr(importlib.import_module(module_name), class_name)
+
+    work_dir = tempfile.mkdtemp(prefix=f"{job['type']}_{job['index']}_", dir=job['base_dir'])
+    simulator = simulator_class(config=dict(job['config'], test_dir=work_dir),
+                                clock=create_clock(job['clock'], job['clock_scale']),
+                                seed=job['seed'])
+    output = open(os.devnull, 'w') if job['quiet'] else None
+    try:
+        with contextlib.redirect_stdout(output) if output else contextlib.nullcontext():
+            results = simulator.run_simulation(job['duration'])
+            if not job['keep_dirs']:
+                simulator.cleanup()
+    finally:
+        if output:
+            output.close()
+
+    if job['keep_dirs']:
+        results['work_dir'] = work_dir  # Only reported while it still exists
+    results['worker_pid'] = os.getpid()
+    return results
+
+
+class BatchRunner:
+    """Runs N simulations on a process pool and streams each result to the database
+
+    Every run gets a simulations row when it is queued; the row is completed
+    (or marked failed) as soon as that run finishes, so the dashboard shows
+    results while the rest of the batch is still going.
+
+    With a `seed`, run i uses seed + i, so the whole batch can be replayed;
+    runs whose (type, config, seed, duration) already completed are served from the
+    simulations table instead of being executed again.
+    """
+
+    def __init__(self, db=None, workers: Optional[int] = None, clock: str = DEFAULT_CLOCK,
+                 clock_scale: Optional[float] = None, base_dir: Optional[str] = None,
+                 keep_dirs: bool = False, quiet: bool = True, seed: Optional[int] = None,
+                 use_cache: bool = True, config: Optional[Dict[str, Any]] = None):
+        self.db = db if db is not None else SimpleDB()
+        self.workers = workers or os.cpu_count() or 1
+        self.clock = clock
+        self.clock_scale = clock_scale
+        self.base_dir = base_dir
+        self.keep_dirs = keep_dirs
+        self.quiet = quiet
+        self.seed = seed
+        self.use_cache = use_cache
+        self.config = config or {}  # Simulator config shared by every run; test_dir is set per run
+
+    def run(self, sim_types: Iterable[str], runs: int, duration: int = 300) -> Dict[str, Any]:
+        """Run `runs` simulations, cycling through `sim_types`; returns a throughput report"""
+        sim_types = list(sim_types)
+        unknown = [sim_type for sim_type in sim_types if sim_type not in SIMULATORS]
+        if unknown or not sim_types:
+            raise ValueError(f"Batch runs support: {', '.join(SIMULATORS)} (got {', '.join(unknown) or 'none'})")
+
+        base_dir = self.base_dir or tempfile.mkdtemp(prefix='malsim_batch_')
+        os.makedirs(base_dir, exist_ok=True)
+
+        completed = failed = cached = 0
+        run_times: List[float] = []
+        started = time.monotonic()
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            futures = {}
+            for index, sim_type in zip(range(runs), itertools.cycle(sim_types)):
+                seed = self.seed + index if self.seed is not None else new_seed()
+                key = cache_key(sim_type, seed, duration, self.config)
+                hit = self.db.find_cached_results(key) if self.use_cache else None
+                if hit:
+                    cached_id, results = hit
+                    sim_id = self.db.add_simulation(sim_type, "completed", seed, key)
+                    self.db.update_simulation(sim_id, "completed", dict(results, cached_from=cached_id))
+                    cached += 1
+                    continue
+
+                job = {
+                    'index': index,
+                    'type': sim_type,
+                    'duration': duration,
+                    'clock': self.clock,
+                    'clock_scale': self.clock_scale,
+                    'base_dir': base_dir,
+                    'keep_dirs': self.keep_dirs,
+                    'quiet': self.quiet,
+                    'seed': seed,
+                    'config': self.config,
+                }
+                sim_id = self.db.add_simulation(sim_type, "running", seed, key)
+                futures[pool.submit(run_job, job)] = (sim_id, sim_type)
+
+            for future in as_completed(futures):
+                sim_id, sim_type = futures[future]
+                try:
+                    results = future.result()
+                except Exception as e:
+                    results = {'type': sim_type, 'error': str(e)}
+
+                if 'error' in results:
+                    failed += 1
+                    self.db.update_simulation(sim_id, "failed", results)
+                else:
+                    completed += 1
+                    run_times.append(results.get('wall_duration', 0.0))
+                    self.db.update_simulation(sim_id, "completed", results)
+
+                done = completed + failed + cached
+                elapsed = time.monotonic() - started
+                print(f"   [{done}/{runs}] {sim_type} #{sim_id} "
+                      f"{'failed' if 'error' in results else 'completed'} - "
+                      f"{done / elapsed * 60:.1f} runs/min")
+
+        elapsed = time.monotonic() - started
+        if not self.keep_dirs:
+            with contextlib.suppress(OSError):
+                os.rmdir(base_dir)  # Only if every run cleaned up after itself
+        return {
+            'runs': runs,
+            'completed': completed,
+            'failed': failed,
+            'cached': cached,
+            'workers': self.workers,
+            'clock': self.clock,
+            'elapsed': elapsed,
+            'runs_per_minute': (completed + failed + cached) / elapsed * 60 if elapsed > 0 else 0.0,
+            'avg_run_seconds': sum(run_times) / len(run_times) if run_times else 0.0,
+            'base_dir': base_dir,
+        }
@@ -0,0 +1,153 @@
+"""
+Batch Event Writer for MalSim Pro
+Buffers monitoring events on a queue and writes them in batched transactions
+"""
+
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from db_pool import ConnectionPool
+
+_FLUSH = object()
+_STOP = object()
+
+
+class BatchEventWriter:
+    """Background writer that flushes queued INSERTs with executemany
+
+    Events are flushed every `batch_size` events or every `flush_interval`
+    seconds, whichever comes first. When the queue is full, `submit` blocks for
+    up to `put_timeout` seconds (backpressure) before dropping the event.
+    """
+
+    def __init__(self, pool: ConnectionPool, batch_size: int = 500,
+                 flush_interval: float = 0.1, max_queue: int = 10000,
+                 put_timeout: Optional[float] = 1.0):
+        self.pool = pool
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.writer_thread = None
+        self.running = False
+
+        self._stats_lock = threading.Lock()
+        self.events_written = 0
+        self.events_dropped = 0
+        self.batches_flushed = 0
+        self.flush_errors = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self.total_flush_ms = 0.0
+
+    def start(self):
+        """Start the background writer thread"""
+        if self.running:
+            return
+        self.running = True
+        self.writer_thread = threading.Thread(target=self._writer_loop, name='malsim-batch-writer')
+        self.writer_thread.daemon = True
+        self.writer_thread.start()
+
+    def submit(self, sql: str, params: Sequence[Any]) -> bool:
+        """Queue one INSERT; returns False if it had to be dropped"""
+        try:
+            self.queue.put((sql, tuple(params)), timeout=self.put_timeout)
+            return True
+        except queue.Full:
+            with self._stats_lock:
+                self.events_dropped += 1
+            return False
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until every event queued so far has been written"""
+        if not self.running:
+            return True
+        done = threading.Event()
+        self.queue.put((_FLUSH, done))
+        return done.wait(timeout)
+
+    def stop(self, timeout: Optional[float] = 10.0):
+        """Flush pending events and stop the writer thread"""
+        if not self.running:
+            return
+        self.queue.put((_STOP, None))
+        if self.writer_thread:
+            self.writer_thread.join(timeout=timeout)
+        self.running = False
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return queue depth and flush latency counters"""
+        with self._stats_lock:
+            batches = self.batches_flushed
+            return {
+                'queue_depth': self.queue.qsize(),
+                'events_written': self.events_written,
+                'events_dropped': self.events_dropped,
+                'batches_flushed': batches,
+                'flush_errors': self.flush_errors,
+                'last_flush_ms': self.last_flush_ms,
+                'max_flush_ms': self.max_flush_ms,
+                'avg_flush_ms': self.total_flush_ms / batches if batches else 0.0,
+            }
+
+    def _writer_loop(self):
+        """Collect queued events into batches and write them"""
+        batch: List[Tuple[str, tuple]] = []
+        deadline = time.monotonic() + self.flush_interval
+
+        while True:
+            try:
+                item = self.queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                item = None
+
+            if item is not None:
+                sql, payload = item
+                if sql is _STOP:
+                    self._write_batch(batch)
+                    return
+                if sql is _FLUSH:
+                    self._write_batch(batch)
+                    batch = []
+                    payload.set()
+                    deadline = time.monotonic() + self.flush_interval
+                    continue
+                batch.append(item)
+
+            if len(batch) >= self.batch_size or time.monotonic() >= deadline:
+                self._write_batch(batch)
+                batch = []
+                deadline = time.monotonic() + self.flush_interval
+
+    def _write_batch(self, batch: List[Tuple[str, tuple]]):
+        """Write a batch in one transaction, one executemany per statement"""
+        if not batch:
+            return
+
+        grouped: Dict[str, List[tuple]] = {}
+        for sql, params in batch:
+            grouped.setdefault(sql, []).append(params)
+
+        t0 = time.perf_counter()
+        try:
+            with self.pool.transaction() as cursor:
+                for sql, rows in grouped.items():
+                    cursor.executemany(sql, rows)
+        except Exception as e:
+            print(f"❌ Batch write of {len(batch)} events failed: {e}")
+            with self._stats_lock:
+                self.flush_errors += 1
+                self.events_dropped += len(batch)
+            return
+
+        elapsed_ms = (time.perf_counter() - t0) * 1000
+        with self._stats_lock:
+            self.events_written += len(batch)
+            self.batches_flushed += 1
+            self.last_flush_ms = elapsed_ms
+            self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+            self.total_flush_ms += elapsed_ms
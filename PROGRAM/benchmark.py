@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for MalSim Pro
+Measures storage and monitoring hot paths; run from the PROGRAM directory:
+
+    python benchmark.py db listing sampler scanner netscan scope
+"""
+
+import os
+import sys
+import json
+import time
+import sqlite3
+import argparse
+import tempfile
+import threading
+from datetime import datetime
+
+
+def percentile(samples, pct):
+    """Return the pct-th percentile of a list of samples"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _legacy_insert(db_path, row):
+    """Connect-per-call insert, as SimpleDB/AnalysisDB did before pooling"""
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute(
+        "INSERT INTO simulations (type, status, start_time, results) VALUES (?, ?, ?, ?)", row
+    )
+    conn.commit()
+    conn.close()
+
+
+def _legacy_read(db_path):
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute("SELECT * FROM simulations ORDER BY start_time DESC LIMIT 10")
+    rows = cursor.fetchall()
+    conn.close()
+    return rows
+
+
+def _pooled_insert(pool, row):
+    with pool.transaction() as cursor:
+        cursor.execute(
+            "INSERT INTO simulations (type, status, start_time, results) VALUES (?, ?, ?, ?)", row
+        )
+
+
+def _pooled_read(pool):
+    with pool.cursor() as cursor:
+        cursor.execute("SELECT * FROM simulations ORDER BY start_time DESC LIMIT 10")
+        return cursor.fetchall()
+
+
+def _run_db_workload(insert, read, inserts, readers):
+    """Insert on the calling thread while reader threads poll; return metrics"""
+    latencies = []
+    latencies_lock = threading.Lock()
+    stop = threading.Event()
+
+    def reader():
+        local = []
+        while not stop.is_set():
+            t0 = time.perf_counter()
+            read()
+            local.append(time.perf_counter() - t0)
+        with latencies_lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=reader, daemon=True) for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+
+    payload = json.dumps({'events': [], 'threat_level': 'HIGH'})
+    t0 = time.perf_counter()
+    for i in range(inserts):
+        insert(('ransomware', 'completed', datetime.now().isoformat(), payload))
+    elapsed = time.perf_counter() - t0
+
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    return {
+        'inserts_per_sec': inserts / elapsed if elapsed else 0.0,
+        'reads': len(latencies),
+        'read_p99_ms': percentile(latencies, 99) * 1000,
+    }
+
+
+def bench_db(inserts=2000, readers=4):
+    """Compare connect-per-call SQLite access with the pooled WAL connections"""
+    from db_pool import ConnectionPool
+
+    schema = """
+        CREATE TABLE simulations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            type TEXT NOT NULL,
+            status TEXT NOT NULL,
+            start_time TEXT NOT NULL,
+            end_time TEXT,
+            duration INTEGER,
+            results TEXT
+        )
+    """
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = os.path.join(tmp, 'legacy.db')
+        conn = sqlite3.connect(legacy_path)
+        conn.execute(schema)
+        conn.close()
+        before = _run_db_workload(
+            lambda row: _legacy_insert(legacy_path, row),
+            lambda: _legacy_read(legacy_path),
+            inserts, readers
+        )
+
+        pool = ConnectionPool(os.path.join(tmp, 'pooled.db'))
+        with pool.transaction() as cursor:
+            cursor.execute(schema)
+        after = _run_db_workload(
+            lambda row: _pooled_insert(pool, row),
+            lambda: _pooled_read(pool),
+            inserts, readers
+        )
+        pool.close_all()
+
+    print(f"📊 SQLite access ({inserts} inserts, {readers} concurrent readers)")
+    print(f"   {'':<18}{'inserts/sec':>14}{'reads':>10}{'read p99 (ms)':>16}")
+    for label, result in (('connect-per-call', before), ('pooled WAL', after)):
+        print(f"   {label:<18}{result['inserts_per_sec']:>14.0f}"
+              f"{result['reads']:>10}{result['read_p99_ms']:>16.2f}")
+    return {'before': before, 'after': after}
+
+
+def bench_listing(rows=50, event_counts=(10, 100, 1000, 5000), repeats=20):
+    """Listing latency with and without decoding the results JSON"""
+    with tempfile.TemporaryDirectory() as tmp:
+        cwd = os.getcwd()
+        os.chdir(tmp)  # web_interface creates its default database on import
+        try:
+            from simulation_db import SimpleDB, LIST_FIELDS
+        finally:
+            os.chdir(cwd)
+
+        print(f"📊 Simulation listing ({rows} rows, median of {repeats} runs)")
+        print(f"   {'events/row':>12}{'results KB':>12}{'full (ms)':>12}{'projected (ms)':>16}")
+
+        timings = {}
+        for events in event_counts:
+            db = SimpleDB(os.path.join(tmp, f'listing_{events}.db'))
+            results = {
+                'type': 'worm',
+                'events': [{'time': datetime.now().isoformat(), 'phase': 'reconnaissance',
+                            'action': 'Scanning network for targets', 'target': f'192.168.1.{i % 255}'}
+                           for i in range(events)],
+                'threat_level': 'CRITICAL'
+            }
+            for _ in range(rows):
+                sim_id = db.add_simulation('worm')
+                db.update_simulation(sim_id, 'completed', results)
+
+            def median_ms(**kwargs):
+                samples = []
+                for _ in range(repeats):
+                    t0 = time.perf_counter()
+                    db.get_simulations(rows, **kwargs)
+                    samples.append(time.perf_counter() - t0)
+                return percentile(samples, 50) * 1000
+
+            full = median_ms()
+            projected = median_ms(fields=LIST_FIELDS)
+            size_kb = len(json.dumps(results)) / 1024
+            timings[events] = (full, projected)
+            print(f"   {events:>12}{size_kb:>12.1f}{full:>12.2f}{projected:>16.2f}")
+            db.pool.close_all()
+
+    return timings
+
+
+def bench_sampler(ticks=30):
+    """CPU cost per tick of per-monitor sweeps versus one shared snapshot"""
+    from process_sampler import SnapshotSampler
+    from system_monitor import SystemMonitor
+    from process_monitor import ProcessMonitor
+    from network_monitor import NetworkMonitor
+
+    def run(samplers):
+        monitors = [
+            SystemMonitor(sampler=samplers[0]),
+            ProcessMonitor(sampler=samplers[1]),
+            NetworkMonitor(sampler=samplers[2]),
+        ]
+        for monitor in monitors:
+            # Subscribe without starting the background threads
+            monitor.monitoring = True
+            monitor.sampler.subscribe(monitor._on_snapshot, needs=needs[type(monitor)])
+
+        unique = list({id(sampler): sampler for sampler in samplers}.values())
+        cpu0, wall0 = time.process_time(), time.perf_counter()
+        for _ in range(ticks):
+            for sampler in unique:
+                sampler.sample_once()
+        cpu = (time.process_time() - cpu0) / ticks * 1000
+        wall = (time.perf_counter() - wall0) / ticks * 1000
+        return cpu, wall
+
+    needs = {
+        SystemMonitor: ('processes', 'resources'),
+        ProcessMonitor: ('processes',),
+        NetworkMonitor: ('connections',),
+    }
+
+    separate = run([SnapshotSampler(), SnapshotSampler(), SnapshotSampler()])
+    shared_sampler = SnapshotSampler()
+    shared = run([shared_sampler] * 3)
+
+    print(f"📊 Monitor sampling ({ticks} ticks, 3 monitors)")
+    print(f"   {'':<20}{'CPU ms/tick':>14}{'wall ms/tick':>14}")
+    for label, (cpu, wall) in (('separate sweeps', separate), ('shared snapshot', shared)):
+        print(f"   {label:<20}{cpu:>14.2f}{wall:>14.2f}")
+    return {'separate': separate, 'shared': shared}
+
+
+def bench_scanner(sweeps=20):
+    """Process table sweep cost of the psutil and /proc scanners"""
+    from proc_scanner import ProcfsScanner, PsutilScanner
+
+    scanners = [PsutilScanner()]
+    if ProcfsScanner.available():
+        scanners.append(ProcfsScanner())
+
+    results = {}
+    for scanner in scanners:
+        first = scanner.scan()
+        # Share of processes with a CPU reading on the very first sweep
+        first_cpu = sum(1 for info in first.values() if info['cpu_percent']) / max(1, len(first))
+
+        cpu_times, wall_times = [], []
+        for _ in range(sweeps):
+            cpu0, wall0 = time.process_time(), time.perf_counter()
+            processes = scanner.scan()
+            cpu_times.append((time.process_time() - cpu0) * 1000)
+            wall_times.append((time.perf_counter() - wall0) * 1000)
+        results[scanner.name] = {
+            'processes': len(processes),
+            'cpu_ms': sum(cpu_times) / sweeps,
+            'wall_p50_ms': percentile(wall_times, 50),
+            'wall_p99_ms': percentile(wall_times, 99),
+            'first_sweep_cpu_nonzero': first_cpu,
+        }
+
+    print(f"📊 Process scanning ({sweeps} sweeps)")
+    print(f"   {'':<10}{'procs':>8}{'CPU ms':>10}{'p50 ms':>10}{'p99 ms':>10}{'1st cpu>0':>12}")
+    for name, r in results.items():
+        print(f"   {name:<10}{r['processes']:>8}{r['cpu_ms']:>10.2f}{r['wall_p50_ms']:>10.2f}"
+              f"{r['wall_p99_ms']:>10.2f}{r['first_sweep_cpu_nonzero']:>11.0%}")
+    return results
+
+
+def bench_netscan(sweeps=50):
+    """Socket table sweep cost of psutil.net_connections and the /proc/net parser"""
+    from net_scanner import ProcNetScanner, PsutilNetScanner
+
+    scanners = [PsutilNetScanner()]
+    if ProcNetScanner.available():
+        scanners.append(ProcNetScanner())
+
+    results = {}
+    for scanner in scanners:
+        scanner.scan()  # Warm the inode -> pid map
+        cpu_times, wall_times = [], []
+        for _ in range(sweeps):
+            cpu0, wall0 = time.process_time(), time.perf_counter()
+            connections = scanner.scan()
+            cpu_times.append((time.process_time() - cpu0) * 1000)
+            wall_times.append((time.perf_counter() - wall0) * 1000)
+        results[scanner.name] = {
+            'sockets': len(connections),
+            'with_pid': sum(1 for conn in connections if conn.pid),
+            'cpu_ms': sum(cpu_times) / sweeps,
+            'wall_p50_ms': percentile(wall_times, 50),
+            'wall_p99_ms': percentile(wall_times, 99),
+        }
+
+    print(f"📊 Socket scanning ({sweeps} sweeps)")
+    print(f"   {'':<10}{'sockets':>9}{'w/ pid':>8}{'CPU ms':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for name, r in results.items():
+        print(f"   {name:<10}{r['sockets']:>9}{r['with_pid']:>8}{r['cpu_ms']:>10.2f}"
+              f"{r['wall_p50_ms']:>10.2f}{r['wall_p99_ms']:>10.2f}")
+    return results
+
+
+def bench_scope(sweeps=20, noise=300, workers=5):
+    """Whole-host sweeps versus sweeps scoped to one simulation worker's subtree"""
+    import subprocess
+    from process_sampler import SnapshotSampler
+    from proc_scanner import ProcessScope
+
+    # Unrelated processes standing in for a busy lab host
+    background = [subprocess.Popen(['sleep', '60']) for _ in range(noise)]
+    worker = subprocess.Popen(['sh', '-c', ' & '.join(['sleep 60'] * workers) + '; wait'])
+    time.sleep(0.5)
+
+    results = {}
+    try:
+        for label, scope in (('host-wide', None), ('scoped', ProcessScope(worker.pid))):
+            sampler = SnapshotSampler(backend='auto', network_backend='auto')
+            sampler.set_scope(scope)
+            needs = frozenset(('processes', 'connections'))
+            sampler.take_snapshot(needs, scope)  # Warm the caches
+            cpu0, wall0 = time.process_time(), time.perf_counter()
+            for _ in range(sweeps):
+                snapshot = sampler.take_snapshot(needs, scope)
+            results[label] = {
+                'processes': len(snapshot.processes),
+                'cpu_ms': (time.process_time() - cpu0) / sweeps * 1000,
+                'wall_ms': (time.perf_counter() - wall0) / sweeps * 1000,
+            }
+    finally:
+        subprocess.run(['pkill', '-P', str(worker.pid)], check=False)
+        for proc in background + [worker]:
+            proc.kill()
+        for proc in background + [worker]:
+            proc.wait()
+
+    print(f"📊 Scoped monitoring ({sweeps} sweeps, {noise} unrelated processes)")
+    print(f"   {'':<12}{'procs':>8}{'CPU ms':>10}{'wall ms':>10}")
+    for label, r in results.items():
+        print(f"   {label:<12}{r['processes']:>8}{r['cpu_ms']:>10.2f}{r['wall_ms']:>10.2f}")
+    return results
+
+
+BENCHMARKS = {
+    'db': bench_db,
+    'listing': bench_listing,
+    'sampler': bench_sampler,
+    'scanner': bench_scanner,
+    'netscan': bench_netscan,
+    'scope': bench_scope,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='MalSim Pro benchmarks')
+    parser.add_argument('name', nargs='*',
+                        help=f"Benchmarks to run: {', '.join(sorted(BENCHMARKS))} (default: all)")
+    args = parser.parse_args()
+
+    unknown = [name for name in args.name if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+
+    for name in args.name or sorted(BENCHMARKS):
+        BENCHMARKS[name]()
+        print()
+
+
+if __name__ == '__main__':
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    main()
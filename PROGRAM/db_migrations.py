@@ -0,0 +1,348 @@
+"""
+Schema migrations for MalSim Pro
+Versioned upgrades for the analysis database, tracked in PRAGMA user_version
+"""
+
+import sqlite3
+from typing import Callable, Dict, List, Tuple
+
+from db_pool import ConnectionPool
+from session_ids import convert_legacy_session_id, is_legacy_session_id
+
+# Tables holding rows that belong to a session, keyed by session_id
+SESSION_CHILD_TABLES = (
+    'process_events', 'file_events', 'network_events', 'system_events', 'iocs',
+    'session_aliases',
+)
+
+# Session tables added after v5, which only rewrote the ids in SESSION_CHILD_TABLES
+SESSION_TABLES = SESSION_CHILD_TABLES + ('process_lineage', 'metric_series')
+
+
+def _v1_base_schema(cursor: sqlite3.Cursor):
+    """Sessions, event and IOC tables"""
+    # Analysis sessions table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS sessions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT UNIQUE NOT NULL,
+            malware_type TEXT NOT NULL,
+            start_time TIMESTAMP NOT NULL,
+            end_time TIMESTAMP,
+            duration INTEGER,
+            status TEXT DEFAULT 'running',
+            config_json TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    # Process events table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS process_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT NOT NULL,
+            timestamp TIMESTAMP NOT NULL,
+            event_type TEXT NOT NULL,
+            process_name TEXT,
+            process_id INTEGER,
+            parent_id INTEGER,
+            command_line TEXT,
+            details_json TEXT,
+            FOREIGN KEY (session_id) REFERENCES sessions (session_id)
+        )
+    """)
+
+    # File events table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS file_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT NOT NULL,
+            timestamp TIMESTAMP NOT NULL,
+            event_type TEXT NOT NULL,
+            file_path TEXT NOT NULL,
+            file_size INTEGER,
+            file_hash TEXT,
+            operation TEXT,
+            details_json TEXT,
+            FOREIGN KEY (session_id) REFERENCES sessions (session_id)
+        )
+    """)
+
+    # Network events table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS network_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT NOT NULL,
+            timestamp TIMESTAMP NOT NULL,
+            event_type TEXT NOT NULL,
+            protocol TEXT,
+            src_ip TEXT,
+            src_port INTEGER,
+            dst_ip TEXT,
+            dst_port INTEGER,
+            data_size INTEGER,
+            details_json TEXT,
+            FOREIGN KEY (session_id) REFERENCES sessions (session_id)
+        )
+    """)
+
+    # System events table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS system_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT NOT NULL,
+            timestamp TIMESTAMP NOT NULL,
+            event_type TEXT NOT NULL,
+            category TEXT,
+            description TEXT,
+            severity TEXT DEFAULT 'info',
+            details_json TEXT,
+            FOREIGN KEY (session_id) REFERENCES sessions (session_id)
+        )
+    """)
+
+    # Indicators of Compromise (IOCs) table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS iocs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT NOT NULL,
+            ioc_type TEXT NOT NULL,
+            ioc_value TEXT NOT NULL,
+            description TEXT,
+            confidence_score FLOAT DEFAULT 0.5,
+            first_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (session_id) REFERENCES sessions (session_id)
+        )
+    """)
+
+
+def _v2_event_indexes(cursor: sqlite3.Cursor):
+    """Indexes for per-session event queries and dashboard statistics"""
+    # get_session_events: WHERE session_id = ? ORDER BY timestamp
+    for table in ('process_events', 'file_events', 'network_events', 'system_events'):
+        cursor.execute(f"""
+            CREATE INDEX IF NOT EXISTS idx_{table}_session_ts
+            ON {table} (session_id, timestamp)
+        """)
+
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_iocs_session ON iocs (session_id)")
+
+    # get_sessions ordering and the sessions_last_24h range count
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sessions_created_at ON sessions (created_at)")
+
+    # Covering index for the sessions_by_type GROUP BY
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sessions_type ON sessions (malware_type)")
+
+
+# Event tables whose row counts are kept in stats_counters
+COUNTED_TABLES = ('process_events', 'file_events', 'network_events', 'system_events')
+SESSION_TYPE_PREFIX = 'sessions_type:'
+
+
+def count_statistics(cursor: sqlite3.Cursor) -> Dict[str, int]:
+    """Full recount of every statistics counter (slow path)"""
+    counts = {}
+    for table in COUNTED_TABLES:
+        counts[table] = cursor.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    cursor.execute("SELECT malware_type, COUNT(*) FROM sessions GROUP BY malware_type")
+    for malware_type, count in cursor.fetchall():
+        counts[SESSION_TYPE_PREFIX + malware_type] = count
+
+    return counts
+
+
+def write_statistics(cursor: sqlite3.Cursor, counts: Dict[str, int]):
+    """Replace the stored counters with the given values"""
+    cursor.execute("DELETE FROM stats_counters")
+    cursor.executemany(
+        "INSERT INTO stats_counters (name, value) VALUES (?, ?)",
+        list(counts.items())
+    )
+
+
+def _v3_stats_counters(cursor: sqlite3.Cursor):
+    """Trigger-maintained row counters for get_statistics"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS stats_counters (
+            name TEXT PRIMARY KEY,
+            value INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    """)
+
+    for table in COUNTED_TABLES:
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_count_insert
+            AFTER INSERT ON {table}
+            BEGIN
+                INSERT INTO stats_counters (name, value) VALUES ('{table}', 1)
+                ON CONFLICT(name) DO UPDATE SET value = value + 1;
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_count_delete
+            AFTER DELETE ON {table}
+            BEGIN
+                UPDATE stats_counters SET value = value - 1 WHERE name = '{table}';
+            END
+        """)
+
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_sessions_count_insert
+        AFTER INSERT ON sessions
+        BEGIN
+            INSERT INTO stats_counters (name, value)
+            VALUES ('{SESSION_TYPE_PREFIX}' || NEW.malware_type, 1)
+            ON CONFLICT(name) DO UPDATE SET value = value + 1;
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_sessions_count_delete
+        AFTER DELETE ON sessions
+        BEGIN
+            UPDATE stats_counters SET value = value - 1
+            WHERE name = '{SESSION_TYPE_PREFIX}' || OLD.malware_type;
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_sessions_count_update
+        AFTER UPDATE OF malware_type ON sessions
+        WHEN OLD.malware_type IS NOT NEW.malware_type
+        BEGIN
+            UPDATE stats_counters SET value = value - 1
+            WHERE name = '{SESSION_TYPE_PREFIX}' || OLD.malware_type;
+            INSERT INTO stats_counters (name, value)
+            VALUES ('{SESSION_TYPE_PREFIX}' || NEW.malware_type, 1)
+            ON CONFLICT(name) DO UPDATE SET value = value + 1;
+        END
+    """)
+
+    # Seed the counters from the rows that already exist
+    write_statistics(cursor, count_statistics(cursor))
+
+
+def _v4_session_listing_indexes(cursor: sqlite3.Cursor):
+    """Indexes for keyset-paginated, filtered get_sessions"""
+    # (malware_type, created_at) serves type-filtered pages and still covers
+    # the sessions_by_type recount, so it replaces idx_sessions_type
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_sessions_type_created_at
+        ON sessions (malware_type, created_at)
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_sessions_status_created_at
+        ON sessions (status, created_at)
+    """)
+    cursor.execute("DROP INDEX IF EXISTS idx_sessions_type")
+
+
+def _v5_ulid_session_ids(cursor: sqlite3.Cursor):
+    """Rewrite session_YYYYmmdd_HHMMSS_<type> ids as time-sortable ULID ids
+
+    Old ids stay resolvable through session_aliases.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS session_aliases (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            legacy_id TEXT UNIQUE NOT NULL,
+            session_id TEXT NOT NULL,
+            FOREIGN KEY (session_id) REFERENCES sessions (session_id)
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_session_aliases_session ON session_aliases (session_id)")
+
+    cursor.execute("SELECT session_id FROM sessions WHERE session_id GLOB 'session_[0-9]*_[0-9]*_*'")
+    legacy_ids = [row[0] for row in cursor.fetchall() if is_legacy_session_id(row[0])]
+
+    for legacy_id in legacy_ids:
+        session_id = convert_legacy_session_id(legacy_id)
+        cursor.execute("UPDATE sessions SET session_id = ? WHERE session_id = ?", (session_id, legacy_id))
+        for table in SESSION_CHILD_TABLES:
+            if table == 'session_aliases':
+                continue
+            cursor.execute(f"UPDATE {table} SET session_id = ? WHERE session_id = ?", (session_id, legacy_id))
+        cursor.execute(
+            "INSERT INTO session_aliases (legacy_id, session_id) VALUES (?, ?)",
+            (legacy_id, session_id)
+        )
+
+
+def _v6_process_lineage(cursor: sqlite3.Cursor):
+    """Per-session process tree, one row per (pid, create_time)"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS process_lineage (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT NOT NULL,
+            pid INTEGER NOT NULL,
+            create_time REAL NOT NULL,
+            ppid INTEGER,
+            parent_create_time REAL,
+            name TEXT,
+            cmdline TEXT,
+            exit_time TIMESTAMP,
+            UNIQUE (session_id, pid, create_time),
+            FOREIGN KEY (session_id) REFERENCES sessions (session_id)
+        )
+    """)
+
+
+def _v7_metric_series(cursor: sqlite3.Cursor):
+    """Resource metric rollups, packed float32 chunks (see timeseries.py)"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS metric_series (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT NOT NULL,
+            metric TEXT NOT NULL,
+            resolution INTEGER NOT NULL,
+            start_time REAL NOT NULL,
+            count INTEGER NOT NULL,
+            data BLOB NOT NULL,
+            FOREIGN KEY (session_id) REFERENCES sessions (session_id)
+        )
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_metric_series_lookup
+        ON metric_series (session_id, metric, resolution, start_time)
+    """)
+
+
+# (version, description, upgrade function), applied in order
+MIGRATIONS: List[Tuple[int, str, Callable[[sqlite3.Cursor], None]]] = [
+    (1, 'base schema', _v1_base_schema),
+    (2, 'session/timestamp event indexes', _v2_event_indexes),
+    (3, 'trigger-maintained statistics counters', _v3_stats_counters),
+    (4, 'session listing indexes', _v4_session_listing_indexes),
+    (5, 'ULID session ids', _v5_ulid_session_ids),
+    (6, 'process lineage', _v6_process_lineage),
+    (7, 'metric series', _v7_metric_series),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(pool: ConnectionPool) -> int:
+    """Return the schema version recorded in the database header"""
+    with pool.cursor() as cursor:
+        return cursor.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(pool: ConnectionPool) -> List[int]:
+    """Apply pending migrations and return the versions that were applied
+
+    Each migration runs in its own write transaction and re-checks the version
+    once the lock is held, so concurrent processes never apply a step twice.
+    """
+    if get_schema_version(pool) >= SCHEMA_VERSION:
+        return []
+
+    applied = []
+    for version, description, upgrade in MIGRATIONS:
+        with pool.transaction() as cursor:
+            current = cursor.execute("PRAGMA user_version").fetchone()[0]
+            if current >= version:
+                continue
+            upgrade(cursor)
+            cursor.execute(f"PRAGMA user_version = {version}")
+        applied.append(version)
+
+    return applied
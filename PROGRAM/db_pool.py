@@ -0,0 +1,162 @@
+"""
+Connection management for MalSim Pro
+Keeps one persistent, tuned SQLite connection per thread and database file
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+# Pragmas applied to every new connection. WAL lets the dashboard read while a
+# simulation is writing; NORMAL sync is durable across app crashes in WAL mode.
+# auto_vacuum only takes effect on a fresh file, so it must come before WAL;
+# it is skipped on existing files, where setting it would wait for the write lock.
+DEFAULT_PRAGMAS = {
+    'auto_vacuum': 'INCREMENTAL',
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -16000,       # negative = KiB, i.e. ~16 MB page cache
+    'mmap_size': 268435456,     # 256 MB memory-mapped reads
+    'temp_store': 'MEMORY',
+    'foreign_keys': 'OFF',
+}
+
+DEFAULT_BUSY_TIMEOUT = 5.0
+LOCK_RETRIES = 5
+
+
+class ConnectionPool:
+    """Per-thread persistent connections to a single SQLite database"""
+
+    def __init__(self, db_path: str, busy_timeout: float = DEFAULT_BUSY_TIMEOUT,
+                 pragmas: Optional[Dict[str, object]] = None):
+        self.db_path = db_path
+        self.busy_timeout = busy_timeout
+        self.pragmas = dict(DEFAULT_PRAGMAS)
+        if pragmas:
+            self.pragmas.update(pragmas)
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: Dict[int, Tuple[threading.Thread, sqlite3.Connection]] = {}
+
+    def connection(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._open()
+            self._local.conn = conn
+            with self._lock:
+                self._prune_dead_threads()
+                self._connections[threading.get_ident()] = (threading.current_thread(), conn)
+        return conn
+
+    def _open(self) -> sqlite3.Connection:
+        # Connections never cross threads; check_same_thread is disabled only
+        # so close_all() can shut down connections owned by other threads.
+        conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout,
+                               check_same_thread=False)
+        conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout * 1000)}")
+        for name, value in self.pragmas.items():
+            if self.db_path == ':memory:' and name in ('auto_vacuum', 'journal_mode', 'mmap_size'):
+                continue
+            if name == 'auto_vacuum' and conn.execute("PRAGMA page_count").fetchone()[0]:
+                continue
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def _prune_dead_threads(self):
+        """Close connections left behind by threads that have exited"""
+        for ident, (thread, conn) in list(self._connections.items()):
+            if not thread.is_alive():
+                del self._connections[ident]
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+
+    @contextmanager
+    def cursor(self, row_factory=None):
+        """Yield a cursor on this thread's connection for read queries"""
+        cursor = self.connection().cursor()
+        if row_factory is not None:
+            cursor.row_factory = row_factory
+        try:
+            yield cursor
+        finally:
+            cursor.close()
+
+    @contextmanager
+    def transaction(self, row_factory=None):
+        """Yield a cursor inside a write transaction, committing on success
+
+        The write lock is taken up front (BEGIN IMMEDIATE) so a busy database
+        fails fast here and is retried with backoff instead of failing halfway
+        through the caller's statements.
+        """
+        conn = self.connection()
+        self._begin_immediate(conn)
+        cursor = conn.cursor()
+        if row_factory is not None:
+            cursor.row_factory = row_factory
+        try:
+            yield cursor
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+    def _begin_immediate(self, conn: sqlite3.Connection):
+        delay = 0.05
+        for attempt in range(LOCK_RETRIES):
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                return
+            except sqlite3.OperationalError as e:
+                if 'locked' not in str(e) and 'busy' not in str(e):
+                    raise
+                if attempt == LOCK_RETRIES - 1:
+                    raise
+                time.sleep(delay)
+                delay *= 2
+
+    def close(self):
+        """Close the calling thread's connection"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            self._local.conn = None
+            with self._lock:
+                self._connections.pop(threading.get_ident(), None)
+            conn.close()
+
+    def close_all(self):
+        """Close every connection opened through this pool"""
+        with self._lock:
+            connections = list(self._connections.values())
+            self._connections.clear()
+        for _, conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        self._local = threading.local()
+
+
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path: str, **kwargs) -> ConnectionPool:
+    """Return the shared pool for a database file, creating it if needed"""
+    key = db_path if db_path == ':memory:' else os.path.abspath(db_path)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(db_path, **kwargs)
+            _pools[key] = pool
+        return pool
@@ -0,0 +1,218 @@
+"""
+File Hash Pool for MalSim Pro
+Stats and SHA-256 hashes files from file events on worker threads, off the watchdog observer
+"""
+
+import hashlib
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+_STOP = object()
+
+# Files above this size get a sampled hash instead of a full one
+SAMPLE_THRESHOLD = 64 * 1024 * 1024
+SAMPLE_CHUNK = 1024 * 1024
+SAMPLE_CHUNKS = 16
+
+READ_CHUNK = 1024 * 1024
+
+# Operations that leave new content at the event's final path
+CONTENT_OPERATIONS = ('created', 'modified', 'moved')
+
+
+def hash_target(event: Dict[str, Any]) -> Optional[str]:
+    """Return the path whose content an event refers to, or None if there is nothing to hash
+
+    Works for raw watchdog events and for EventCoalescer records: a record whose
+    last operation is a delete has nothing left on disk, and a moved file is
+    hashed at its destination.
+    """
+    if event.get('is_directory'):
+        return None
+    operation = event.get('operation') or event.get('type', '')[len('file_'):]
+    last = operation.rsplit('+', 1)[-1].split(' ', 1)[0]
+    if last not in CONTENT_OPERATIONS:
+        return None
+    return event.get('dest_path') or event.get('path')
+
+
+def sha256_file(path: str, size: int, sample_threshold: int = SAMPLE_THRESHOLD):
+    """Hash a file; returns (hex digest, 'full' or 'sampled', bytes read)
+
+    Sampled hashes cover the size plus SAMPLE_CHUNKS evenly spaced chunks,
+    including the first and last, so they still change when a large file is
+    encrypted in place but are not comparable to a full SHA-256.
+    """
+    digest = hashlib.sha256()
+    read = 0
+    with open(path, 'rb') as f:
+        if size <= max(sample_threshold, SAMPLE_CHUNK * SAMPLE_CHUNKS):
+            for chunk in iter(lambda: f.read(READ_CHUNK), b''):
+                digest.update(chunk)
+                read += len(chunk)
+            return digest.hexdigest(), 'full', read
+
+        digest.update(str(size).encode())
+        step = (size - SAMPLE_CHUNK) // (SAMPLE_CHUNKS - 1)
+        for i in range(SAMPLE_CHUNKS):
+            f.seek(i * step)
+            chunk = f.read(SAMPLE_CHUNK)
+            digest.update(chunk)
+            read += len(chunk)
+    return digest.hexdigest(), 'sampled', read
+
+
+class FileHashPool:
+    """Worker threads that attach file_size/file_hash to file events in place
+
+    `submit` never blocks the caller: when the bounded queue is full the event
+    is counted as dropped and keeps no hash. Results are cached per
+    (path, mtime, size), so a file reported several times without changing is
+    only read once.
+    """
+
+    def __init__(self, workers: int = 2, max_queue: int = 1000,
+                 sample_threshold: int = SAMPLE_THRESHOLD, cache_size: int = 4096):
+        self.workers = workers
+        self.sample_threshold = sample_threshold
+        self.cache_size = cache_size
+
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.threads = []
+        self.running = False
+
+        self._cache: 'OrderedDict[tuple, tuple]' = OrderedDict()
+        self._stats_lock = threading.Lock()
+        self.files_hashed = 0
+        self.bytes_hashed = 0
+        self.sampled_hashes = 0
+        self.dedupe_hits = 0
+        self.missing = 0
+        self.errors = 0
+        self.dropped = 0
+        self.busy_seconds = 0.0
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.threads = []
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker_loop, name=f'malsim-hasher-{i}')
+            thread.daemon = True
+            thread.start()
+            self.threads.append(thread)
+
+    def submit(self, event: Dict[str, Any]) -> bool:
+        """Queue an event for hashing; returns False if it was skipped or dropped"""
+        path = hash_target(event)
+        if path is None:
+            return False
+        try:
+            self.queue.put_nowait((event, path))
+            return True
+        except queue.Full:
+            with self._stats_lock:
+                self.dropped += 1
+            return False
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued event has been processed"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.queue.all_tasks_done:
+            while self.queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self.queue.all_tasks_done.wait(remaining)
+        return True
+
+    def stop(self, timeout: Optional[float] = 10.0):
+        """Finish queued work and stop the workers"""
+        if not self.running:
+            return
+        self.drain(timeout)
+        for _ in self.threads:
+            self.queue.put(_STOP)
+        for thread in self.threads:
+            thread.join(timeout=timeout)
+        self.running = False
+
+    def _worker_loop(self):
+        while True:
+            item = self.queue.get()
+            try:
+                if item is _STOP:
+                    return
+                self._process(*item)
+            finally:
+                self.queue.task_done()
+
+    def _process(self, event: Dict[str, Any], path: str):
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            with self._stats_lock:
+                self.missing += 1  # Deleted before we got to it
+            return
+        except OSError:
+            with self._stats_lock:
+                self.errors += 1
+            return
+
+        event['file_size'] = st.st_size
+        key = (path, st.st_mtime_ns, st.st_size)
+
+        with self._stats_lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.dedupe_hits += 1
+        if cached is not None:
+            event['file_hash'], event['hash_mode'] = cached
+            return
+
+        t0 = time.perf_counter()
+        try:
+            file_hash, mode, read = sha256_file(path, st.st_size, self.sample_threshold)
+        except FileNotFoundError:
+            with self._stats_lock:
+                self.missing += 1
+            return
+        except OSError:
+            with self._stats_lock:
+                self.errors += 1
+            return
+        elapsed = time.perf_counter() - t0
+
+        event['file_hash'] = file_hash
+        event['hash_mode'] = mode
+
+        with self._stats_lock:
+            self._cache[key] = (file_hash, mode)
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            self.files_hashed += 1
+            self.bytes_hashed += read
+            self.sampled_hashes += mode == 'sampled'
+            self.busy_seconds += elapsed
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {
+                'workers': self.workers,
+                'queue_depth': self.queue.qsize(),
+                'files_hashed': self.files_hashed,
+                'bytes_hashed': self.bytes_hashed,
+                'sampled_hashes': self.sampled_hashes,
+                'dedupe_hits': self.dedupe_hits,
+                'missing': self.missing,
+                'errors': self.errors,
+                'dropped': self.dropped,
+                'files_per_sec': self.files_hashed / self.busy_seconds if self.busy_seconds else 0.0,
+                'mb_per_sec': self.bytes_hashed / 1048576 / self.busy_seconds if self.busy_seconds else 0.0,
+            }
@@ -1 +1,283 @@
-# file_monitor.py - Created 2025-09-03 19:40:11.304838
+"""
+File Monitor for MalSim Pro
+Monitors file system changes during simulations
+"""
+
+import heapq
+import itertools
+import os
+import time
+import threading
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Tuple
+from watchdog.observers import Observer
+from watchdog.events import FileSystemEventHandler
+
+from file_hasher import FileHashPool
+from monitor_stats import MonitorStats
+from ring_buffer import EventRingBuffer
+
+# File events kept in memory; older ones go to the spill target
+MAX_EVENTS = 10000
+
+# Seconds a path must stay quiet before its merged record is emitted; 0 disables coalescing
+DEFAULT_COALESCE_WINDOW = 0.5
+# A path that never goes quiet is still emitted after this many windows
+MAX_AGE_WINDOWS = 10
+
+DEFAULT_HASH_WORKERS = 2
+
+class FileChangeHandler(FileSystemEventHandler):
+    def __init__(self, callback):
+        self.callback = callback
+    
+    def on_created(self, event):
+        self.callback({
+            'type': 'file_created',
+            'timestamp': datetime.now().isoformat(),
+            'path': event.src_path,
+            'is_directory': event.is_directory
+        })
+    
+    def on_deleted(self, event):
+        self.callback({
+            'type': 'file_deleted',
+            'timestamp': datetime.now().isoformat(),
+            'path': event.src_path,
+            'is_directory': event.is_directory
+        })
+    
+    def on_modified(self, event):
+        if not event.is_directory:
+            self.callback({
+                'type': 'file_modified',
+                'timestamp': datetime.now().isoformat(),
+                'path': event.src_path,
+                'is_directory': event.is_directory
+            })
+
+    def on_moved(self, event):
+        self.callback({
+            'type': 'file_moved',
+            'timestamp': datetime.now().isoformat(),
+            'path': event.src_path,
+            'dest_path': event.dest_path,
+            'is_directory': event.is_directory
+        })
+
+
+class EventCoalescer:
+    """Merges bursts of events on the same path into one operation record
+
+    Each record is emitted as soon as its own path has been quiet for `window`
+    seconds (or has been active for MAX_AGE_WINDOWS windows), so a busy path
+    never holds back records for quieter ones. Pending records sit in a heap
+    keyed by deadline; a deadline pushed back by newer events is re-queued
+    when it is reached. The records due in one flush are emitted in the order
+    their paths were first seen. A record looks like:
+
+        {'type': 'file_activity', 'path': ..., 'operation': 'created+modified x12+moved',
+         'first_timestamp': ..., 'last_timestamp': ..., 'raw_count': 14, ...}
+
+    A move closes the record for the source path; later events on the
+    destination start a new one.
+    """
+
+    def __init__(self, emit, window: float = DEFAULT_COALESCE_WINDOW):
+        self.emit = emit
+        self.window = window
+        self.max_age = window * MAX_AGE_WINDOWS
+
+        self._lock = threading.Lock()
+        self._pending: Dict[int, Dict[str, Any]] = {}  # seq -> record not yet emitted
+        self._deadlines: List[Tuple[float, int]] = []  # Heap of (deadline, seq), may hold stale entries
+        self._seq = itertools.count()
+        self._open: Dict[str, Dict[str, Any]] = {}  # path -> record still accepting events
+        self._stop_event = threading.Event()
+        self._thread = None
+
+        self.raw_events = 0
+        self.emitted_events = 0
+
+    def start(self):
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._flush_loop, name='malsim-file-coalescer')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Stop the flush thread and emit everything still pending"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        self.flush(force=True)
+
+    def add(self, event: Dict[str, Any]):
+        now = time.monotonic()
+        operation = event['type'][len('file_'):]
+
+        with self._lock:
+            self.raw_events += 1
+            record = self._open.get(event['path'])
+            if record is None:
+                record = {
+                    'path': event['path'],
+                    'is_directory': event.get('is_directory', False),
+                    'first_timestamp': event['timestamp'],
+                    'operations': [],
+                    'raw_count': 0,
+                    '_seq': next(self._seq),
+                    '_started': now,
+                    '_closed': False,
+                }
+                self._open[event['path']] = record
+                self._pending[record['_seq']] = record
+                heapq.heappush(self._deadlines, (now + self.window, record['_seq']))
+
+            operations = record['operations']
+            if operations and operations[-1][0] == operation:
+                operations[-1][1] += 1
+            else:
+                operations.append([operation, 1])
+            record['raw_count'] += 1
+            record['last_timestamp'] = event['timestamp']
+            record['_last_seen'] = now
+
+            if 'dest_path' in event:
+                record['dest_path'] = event['dest_path']
+                record['_closed'] = True
+                del self._open[event['path']]
+                heapq.heappush(self._deadlines, (now, record['_seq']))
+
+    def _deadline(self, record: Dict[str, Any]) -> float:
+        if record['_closed']:
+            return record['_last_seen']
+        return min(record['_last_seen'] + self.window, record['_started'] + self.max_age)
+
+    def flush(self, force: bool = False):
+        """Emit every record whose own deadline has passed (all of them with force)"""
+        now = time.monotonic()
+        ready = []
+        with self._lock:
+            while self._deadlines and (force or self._deadlines[0][0] <= now):
+                _, seq = heapq.heappop(self._deadlines)
+                record = self._pending.get(seq)
+                if record is None:
+                    continue  # Already emitted through a newer heap entry
+                deadline = self._deadline(record)
+                if deadline > now and not force:
+                    heapq.heappush(self._deadlines, (deadline, seq))  # Saw events since it was queued
+                    continue
+                del self._pending[seq]
+                if not record['_closed']:
+                    del self._open[record['path']]
+                ready.append(record)
+            self.emitted_events += len(ready)
+
+        ready.sort(key=lambda record: record['_seq'])
+        for record in ready:
+            self.emit(self._finish(record))
+
+    def _finish(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        operations = record.pop('operations')
+        for key in ('_seq', '_started', '_last_seen', '_closed'):
+            record.pop(key)
+
+        record['type'] = f'file_{operations[0][0]}' if len(operations) == 1 else 'file_activity'
+        record['timestamp'] = record['first_timestamp']
+        record['operation'] = '+'.join(op if count == 1 else f'{op} x{count}'
+                                       for op, count in operations)
+        return record
+
+    def _flush_loop(self):
+        while not self._stop_event.wait(self.window / 2):
+            self.flush()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'window': self.window,
+            'raw_events': self.raw_events,
+            'emitted_events': self.emitted_events,
+            'pending': len(self._pending),
+            'ratio': self.raw_events / self.emitted_events if self.emitted_events else 0.0,
+        }
+
+
+class FileMonitor:
+    def __init__(self, watch_paths=None, spill=None, coalesce_window: float = DEFAULT_COALESCE_WINDOW,
+                 hash_workers: int = DEFAULT_HASH_WORKERS):
+        self.watch_paths = watch_paths or ['./test_files']
+        self.spill = spill
+        self.events = EventRingBuffer(MAX_EVENTS, spill=spill)
+        self.observer = Observer()
+        self.monitoring = False
+        self.coalesce_window = coalesce_window
+        self.coalescer: Optional[EventCoalescer] = None
+        # Fills file_size/file_hash on events after they are logged; 0 workers disables it
+        self.hasher = FileHashPool(workers=hash_workers) if hash_workers > 0 else None
+        self.stats = MonitorStats('file_monitor')
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], watch_paths=None, spill=None) -> 'FileMonitor':
+        """Build a monitor using the monitoring section of settings.json"""
+        monitoring = config.get('monitoring', {})
+        return cls(watch_paths, spill=spill,
+                   coalesce_window=monitoring.get('file_coalesce_window', DEFAULT_COALESCE_WINDOW),
+                   hash_workers=monitoring.get('hash_workers', DEFAULT_HASH_WORKERS))
+    
+    def start_monitoring(self):
+        """Start file system monitoring"""
+        self.monitoring = True
+        self.events = EventRingBuffer(MAX_EVENTS, spill=self.spill)
+        self.stats.reset()
+        if self.hasher:
+            self.hasher.start()
+
+        if self.coalesce_window > 0:
+            self.coalescer = EventCoalescer(self._log_event, self.coalesce_window)
+            self.coalescer.start()
+            handler = FileChangeHandler(self.coalescer.add)
+        else:
+            self.coalescer = None
+            handler = FileChangeHandler(self._log_event)
+        
+        for path in self.watch_paths:
+            if os.path.exists(path):
+                self.observer.schedule(handler, path, recursive=True)
+        
+        self.observer.start()
+        print(f"📁 File monitoring started for {len(self.watch_paths)} paths")
+    
+    def stop_monitoring(self) -> List[Dict[str, Any]]:
+        """Stop file monitoring and return events"""
+        self.monitoring = False
+        self.observer.stop()
+        self.observer.join()
+
+        if self.coalescer:
+            self.coalescer.stop()
+        if self.hasher:
+            # Let hashes for the last events land before they are handed back
+            self.hasher.stop()
+
+        if self.coalescer:
+            stats = self.coalescer.get_stats()
+            print(f"📁 File monitoring stopped - {len(self.events)} file events "
+                  f"({stats['raw_events']} raw, {stats['ratio']:.1f}x coalesced)")
+        else:
+            print(f"📁 File monitoring stopped - {len(self.events)} file events")
+        return self.events.snapshot()
+
+    def get_coalesce_stats(self) -> Dict[str, Any]:
+        """Raw vs emitted event counts for the current or last run"""
+        return self.coalescer.get_stats() if self.coalescer else {}
+
+    def get_hash_stats(self) -> Dict[str, Any]:
+        return self.hasher.get_stats() if self.hasher else {}
+    
+    def _log_event(self, event: Dict[str, Any]):
+        """Log a file system event"""
+        self.events.append(event)
+        self.stats.count_event()
+        if self.hasher:
+            self.hasher.submit(event)
@@ -69,7 +69,44 @@ def run_cli_simulation(sim_type, duration=300):
     print(f"   python {sys.argv[0]} --mode dashboard")
     return True
 
-def start_dashboard(port=5000):
+def run_batch(sim_types, runs, workers=None, duration=300, clock=None, clock_scale=None,
+              keep_dirs=False, seed=None, use_cache=True):
+    """Run a batch of simulations on a process pool and report throughput"""
+    from batch_runner import BatchRunner, DEFAULT_CLOCK
+
+    runner = BatchRunner(workers=workers, clock=clock or DEFAULT_CLOCK,
+                         clock_scale=clock_scale, keep_dirs=keep_dirs, seed=seed,
+                         use_cache=use_cache)
+    print(f"🧪 Running {runs} simulations ({', '.join(sim_types)}) on {runner.workers} workers, "
+          f"{runner.clock} clock")
+    report = runner.run(sim_types, runs, duration)
+
+    print(f"✅ {report['completed']} completed, {report['failed']} failed, "
+          f"{report['cached']} served from cache "
+          f"in {report['elapsed']:.1f}s")
+    print(f"📈 Throughput: {report['runs_per_minute']:.1f} runs/minute "
+          f"(avg {report['avg_run_seconds']:.2f}s per run)")
+    if keep_dirs:
+        print(f"📂 Working directories kept under: {report['base_dir']}")
+    return report
+
+def enable_incremental_vacuum():
+    """One-time conversion of an older database to auto_vacuum=INCREMENTAL"""
+    from analysis_db import AnalysisDB
+
+    db = AnalysisDB()
+    try:
+        before = db.get_storage_info()['size_bytes']
+        print(f"🧹 Rebuilding {db.db_path} with incremental vacuum (full VACUUM, may take a while)...")
+        if db.enable_incremental_vacuum():
+            after = db.get_storage_info()['size_bytes']
+            print(f"✅ Converted - {before} -> {after} bytes; retention now returns freed pages to the OS")
+        else:
+            print("✅ Already using incremental vacuum - nothing to do")
+    finally:
+        db.close()
+
+def start_dashboard(port=5000, config=None):
     """Start web dashboard"""
     print("🌐 Starting MalSim Pro Dashboard...")
     print(f"📱 Open your browser and go to: http://localhost:{port}")
@@ -80,7 +117,7 @@ def start_dashboard(port=5000):
     try:
         # Import and run the web interface
         from web_interface import create_app
-        app = create_app()
+        app = create_app(config)
         app.run(host='127.0.0.1', port=port, debug=False)
     except ImportError as e:
         print(f"❌ Failed to import web interface: {e}")
@@ -102,24 +139,49 @@ def main():
 Examples:
   %(prog)s --mode dashboard                    # Start web dashboard (recommended)
   %(prog)s --mode simulate --type ransomware  # Run CLI simulation
+  %(prog)s --mode batch --runs 100 --workers 4 # Run a batch across a process pool
+  %(prog)s --enable-incremental-vacuum         # One-time database conversion
   %(prog)s --help                             # Show this help
 
 Educational Use Only - Run in Virtual Machines Only!
         """
     )
     
-    parser.add_argument('--mode', choices=['simulate', 'dashboard'], 
+    parser.add_argument('--mode', choices=['simulate', 'dashboard', 'batch'], 
                        default='dashboard', 
                        help='Operation mode (default: dashboard)')
     parser.add_argument('--type', choices=['ransomware', 'trojan', 'worm', 'spyware'],
-                       help='Malware type to simulate (required for simulate mode)')
+                       help='Malware type to simulate (required for simulate mode; '
+                            'batch mode cycles through ransomware, trojan and worm when omitted)')
     parser.add_argument('--duration', type=int, default=300,
                        help='Simulation duration in seconds (default: 300)')
     parser.add_argument('--port', type=int, default=5000,
                        help='Dashboard port (default: 5000)')
+    parser.add_argument('--runs', type=int, default=10,
+                       help='Simulations to run in batch mode (default: 10)')
+    parser.add_argument('--workers', type=int,
+                       help='Batch worker processes (default: CPU count)')
+    parser.add_argument('--clock', choices=['real', 'scaled', 'virtual'],
+                       help='Simulation clock for batch mode (default: virtual)')
+    parser.add_argument('--clock-scale', type=float,
+                       help='Speed-up factor for the scaled clock (default: 10)')
+    parser.add_argument('--keep-dirs', action='store_true',
+                       help='Keep each batch run\'s working directory')
+    parser.add_argument('--seed', type=int,
+                       help='Base seed for batch mode; run i uses seed + i (default: random)')
+    parser.add_argument('--no-cache', action='store_true',
+                       help='Re-execute batch runs even if an identical run already completed')
+    parser.add_argument('--enable-incremental-vacuum', action='store_true',
+                       help='Convert the analysis database to incremental vacuum with a one-time '
+                            'full VACUUM, then exit (stop the dashboard first)')
 
     args = parser.parse_args()
 
+    # Database maintenance, no simulation involved
+    if args.enable_incremental_vacuum:
+        enable_incremental_vacuum()
+        return
+    
     # Load configuration
     config = load_config()
     
@@ -134,8 +196,16 @@ Educational Use Only - Run in Virtual Machines Only!
             print("   Available types: ransomware, trojan, worm, spyware")
             sys.exit(1)
         run_cli_simulation(args.type, args.duration)
+    elif args.mode == 'batch':
+        from batch_runner import SIMULATORS
+        if args.type and args.type not in SIMULATORS:
+            print(f"❌ Batch mode supports: {', '.join(SIMULATORS)}")
+            sys.exit(1)
+        sim_types = [args.type] if args.type else list(SIMULATORS)
+        run_batch(sim_types, args.runs, args.workers, args.duration,
+                  args.clock, args.clock_scale, args.keep_dirs, args.seed, not args.no_cache)
     else:
-        start_dashboard(args.port)
+        start_dashboard(args.port, config)
 
 if __name__ == '__main__':
     try:
@@ -0,0 +1,108 @@
+"""
+Monitor Self-Instrumentation for MalSim Pro
+Per-monitor cost counters and a registry the metrics API reads from
+"""
+
+import itertools
+import threading
+import time
+import weakref
+from typing import Any, Dict, Optional
+
+_registry: 'weakref.WeakValueDictionary[str, Any]' = weakref.WeakValueDictionary()
+_registry_lock = threading.Lock()
+_ids = itertools.count(1)
+
+
+def register(kind: str, obj) -> str:
+    """Expose obj.get_stats() through collect() for as long as obj is alive"""
+    key = f'{kind}-{next(_ids)}'
+    with _registry_lock:
+        _registry[key] = obj
+    return key
+
+
+def collect() -> Dict[str, Dict[str, Any]]:
+    """Current stats of every live monitor and sampler"""
+    with _registry_lock:
+        items = list(_registry.items())
+    return {key: obj.get_stats() for key, obj in items}
+
+
+class MonitorStats:
+    """Sweep cost, items scanned, events emitted and errors swallowed by one monitor"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.reset()
+        self.key = register(name, self)
+
+    def reset(self):
+        with self._lock:
+            self.sweeps = 0
+            self.items_scanned = 0
+            self.events_emitted = 0
+            self.errors = 0
+            self.last_error: Optional[str] = None
+            self.last_sweep_ms = 0.0
+            self.max_sweep_ms = 0.0
+            self.total_sweep_ms = 0.0
+            self.total_cpu_ms = 0.0
+            self.started = time.monotonic()
+
+    def sweep(self) -> 'SweepTimer':
+        """Context manager timing one pass over a snapshot"""
+        return SweepTimer(self)
+
+    def record_sweep(self, duration_ms: float, cpu_ms: float, items: int = 0):
+        with self._lock:
+            self.sweeps += 1
+            self.items_scanned += items
+            self.last_sweep_ms = duration_ms
+            self.max_sweep_ms = max(self.max_sweep_ms, duration_ms)
+            self.total_sweep_ms += duration_ms
+            self.total_cpu_ms += cpu_ms
+
+    def count_event(self):
+        with self._lock:
+            self.events_emitted += 1
+
+    def count_error(self, error: Any):
+        with self._lock:
+            self.errors += 1
+            self.last_error = str(error)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            elapsed = time.monotonic() - self.started
+            return {
+                'monitor': self.name,
+                'sweeps': self.sweeps,
+                'items_scanned': self.items_scanned,
+                'events_emitted': self.events_emitted,
+                'errors': self.errors,
+                'last_error': self.last_error,
+                'last_sweep_ms': self.last_sweep_ms,
+                'max_sweep_ms': self.max_sweep_ms,
+                'avg_sweep_ms': self.total_sweep_ms / self.sweeps if self.sweeps else 0.0,
+                'cpu_percent': self.total_cpu_ms / 10 / elapsed if elapsed > 0 else 0.0,
+            }
+
+
+class SweepTimer:
+    """Times a sweep in wall and thread CPU time; set .items before exiting"""
+
+    def __init__(self, stats: MonitorStats):
+        self.stats = stats
+        self.items = 0
+
+    def __enter__(self) -> 'SweepTimer':
+        self._wall = time.perf_counter()
+        self._cpu = time.thread_time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stats.record_sweep((time.perf_counter() - self._wall) * 1000,
+                                (time.thread_time() - self._cpu) * 1000, self.items)
+        return False
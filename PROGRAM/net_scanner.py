@@ -0,0 +1,197 @@
+"""
+Socket Scanners for MalSim Pro
+Socket table backends used by the snapshot sampler: psutil, or /proc/net parsed directly on Linux
+"""
+
+import os
+import socket
+from collections import namedtuple
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import psutil
+
+BACKENDS = ('auto', 'psutil', 'procfs')
+
+# Same shape as psutil's sconn/addr so NetworkMonitor works with either backend
+Address = namedtuple('Address', ['ip', 'port'])
+Connection = namedtuple('Connection', ['fd', 'family', 'type', 'laddr', 'raddr', 'status', 'pid'])
+
+# /proc/net/* st column -> psutil status names (include/net/tcp_states.h)
+TCP_STATES = {
+    '01': psutil.CONN_ESTABLISHED,
+    '02': psutil.CONN_SYN_SENT,
+    '03': psutil.CONN_SYN_RECV,
+    '04': psutil.CONN_FIN_WAIT1,
+    '05': psutil.CONN_FIN_WAIT2,
+    '06': psutil.CONN_TIME_WAIT,
+    '07': psutil.CONN_CLOSE,
+    '08': psutil.CONN_CLOSE_WAIT,
+    '09': psutil.CONN_LAST_ACK,
+    '0A': psutil.CONN_LISTEN,
+    '0B': psutil.CONN_CLOSING,
+}
+
+# (file under /proc/net, family, type)
+SOCKET_TABLES = (
+    ('tcp', socket.AF_INET, socket.SOCK_STREAM),
+    ('tcp6', socket.AF_INET6, socket.SOCK_STREAM),
+    ('udp', socket.AF_INET, socket.SOCK_DGRAM),
+    ('udp6', socket.AF_INET6, socket.SOCK_DGRAM),
+)
+
+
+def decode_address(value: str, family: int) -> Tuple[str, int]:
+    """Decode a /proc/net address such as 0100007F:0035 into ('127.0.0.1', 53)"""
+    host, port = value.split(':')
+    raw = bytes.fromhex(host)
+    # The kernel prints each 32-bit word in host byte order
+    if family == socket.AF_INET:
+        raw = raw[::-1]
+    else:
+        raw = b''.join(raw[i:i + 4][::-1] for i in range(0, 16, 4))
+    return socket.inet_ntop(family, raw), int(port, 16)
+
+
+class PsutilNetScanner:
+    """Portable scanner built on psutil.net_connections"""
+
+    name = 'psutil'
+
+    def scan(self, pids: Optional[Iterable[int]] = None) -> List[Connection]:
+        """Every socket, or only those owned by `pids`"""
+        connections = psutil.net_connections()
+        if pids is None:
+            return connections
+        pids = set(pids)
+        return [conn for conn in connections if conn.pid in pids]
+
+
+class ProcNetScanner:
+    """Linux scanner parsing /proc/net/{tcp,tcp6,udp,udp6} directly
+
+    psutil.net_connections() reads every process's fd table on each call to map
+    socket inodes to pids. Here the inode -> (pid, fd) map is kept between
+    scans: only pids not seen before have their fds read, and existing pids are
+    re-read only while some socket inode is still unaccounted for. Inodes that
+    stay unresolved after a full pass (sockets of processes we may not inspect)
+    are not chased again; they are forgotten once they leave the socket table.
+    New pids need no such retry, since their fds are read when they appear.
+    """
+
+    name = 'procfs'
+
+    def __init__(self, proc_root: str = '/proc'):
+        self.proc_root = proc_root
+        self._inode_owner: Dict[int, Tuple[int, int]] = {}
+        self._known_pids: Set[int] = set()
+        self._unresolved: Set[int] = set()
+
+        self.scans = 0
+        self.fd_dirs_read = 0
+
+    @classmethod
+    def available(cls, proc_root: str = '/proc') -> bool:
+        return os.path.exists(os.path.join(proc_root, 'net', 'tcp'))
+
+    def _read_table(self, table: str, family: int, sock_type: int) -> List[tuple]:
+        rows = []
+        try:
+            with open(os.path.join(self.proc_root, 'net', table)) as f:
+                next(f, None)  # Header
+                for line in f:
+                    fields = line.split()
+                    if len(fields) < 10:
+                        continue
+                    rows.append((family, sock_type, fields[1], fields[2], fields[3], int(fields[9])))
+        except FileNotFoundError:
+            pass  # e.g. IPv6 disabled
+        return rows
+
+    def _read_fds(self, pid: int):
+        """Record the socket inodes held by one process"""
+        self.fd_dirs_read += 1
+        try:
+            with os.scandir(f'{self.proc_root}/{pid}/fd') as entries:
+                for entry in entries:
+                    try:
+                        target = os.readlink(entry.path)
+                    except OSError:
+                        continue
+                    if target.startswith('socket:['):
+                        self._inode_owner[int(target[8:-1])] = (pid, int(entry.name))
+        except OSError:
+            pass  # Exited, or not ours to inspect
+
+    def _resolve(self, wanted: Set[int], pids: Set[int]):
+        new_pids = pids - self._known_pids
+        for pid in new_pids:
+            self._read_fds(pid)
+        self._known_pids = pids
+
+        missing = wanted - self._inode_owner.keys() - self._unresolved
+        if missing:
+            # A known process opened a new socket; newest pids are the likeliest owners
+            for pid in sorted(pids - new_pids, reverse=True):
+                self._read_fds(pid)
+                missing -= self._inode_owner.keys()
+                if not missing:
+                    break
+            self._unresolved |= missing
+
+    def scan(self, pids: Optional[Iterable[int]] = None) -> List[Connection]:
+        """Every socket, or only those owned by `pids`; only their fd tables are read"""
+        self.scans += 1
+        scope = set(pids) if pids is not None else None
+        rows = []
+        for table, family, sock_type in SOCKET_TABLES:
+            rows.extend(self._read_table(table, family, sock_type))
+
+        inodes = {row[5] for row in rows if row[5]}
+        if scope is None:
+            self._resolve(inodes, {int(entry) for entry in os.listdir(self.proc_root) if entry.isdigit()})
+        else:
+            self._resolve(inodes, scope)
+
+        connections = []
+        for family, sock_type, local, remote, state, inode in rows:
+            pid, fd = self._inode_owner.get(inode, (None, -1)) if inode else (None, -1)
+            if scope is not None and pid not in scope:
+                continue
+            laddr = Address(*decode_address(local, family))
+            raddr = Address(*decode_address(remote, family))
+            if raddr.port == 0:
+                raddr = ()
+            if sock_type == socket.SOCK_STREAM:
+                status = TCP_STATES.get(state, psutil.CONN_NONE)
+            else:
+                status = psutil.CONN_NONE
+            connections.append(Connection(fd, family, sock_type, laddr, raddr, status, pid))
+
+        # Only keep owners for sockets that still exist
+        self._inode_owner = {inode: owner for inode, owner in self._inode_owner.items()
+                             if inode in inodes}
+        self._unresolved &= inodes
+        self._unresolved -= self._inode_owner.keys()
+        return connections
+
+    def get_stats(self):
+        return {
+            'scans': self.scans,
+            'fd_dirs_read': self.fd_dirs_read,
+            'tracked_sockets': len(self._inode_owner),
+            'unresolved_sockets': len(self._unresolved),
+        }
+
+
+def create_net_scanner(backend: Optional[str] = 'psutil'):
+    """Build a socket scanner; 'auto' prefers /proc/net where it exists"""
+    backend = backend or 'psutil'
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown network backend: {backend} (expected one of {', '.join(BACKENDS)})")
+
+    if backend in ('auto', 'procfs'):
+        if ProcNetScanner.available():
+            return ProcNetScanner()
+        if backend == 'procfs':
+            print("⚠️  /proc/net is not available on this host, falling back to psutil socket scanning")
+    return PsutilNetScanner()
@@ -1 +1,108 @@
-# network_monitor.py - Created 2025-09-03 19:40:11.304905
+"""
+Network Monitor for MalSim Pro
+Monitors network connections during simulations
+"""
+
+from typing import Dict, List, Any
+
+from monitor_stats import MonitorStats
+from process_sampler import SnapshotSampler, SystemSnapshot
+from ring_buffer import EventRingBuffer
+
+# Keep only last 500 network events in memory; older ones go to the spill target
+MAX_EVENTS = 500
+
+# Socket states worth an event, and the event type logged when a socket enters them.
+# SYN_SENT catches beacons to dead C2 hosts that never reach ESTABLISHED.
+TRACKED_STATES = {
+    'ESTABLISHED': 'connection_established',
+    'SYN_SENT': 'connection_attempt',
+    'LISTEN': 'listen_started',
+}
+
+class NetworkMonitor:
+    def __init__(self, sampler: SnapshotSampler = None, spill=None):
+        self.monitoring = False
+        self.spill = spill
+        self.events = EventRingBuffer(MAX_EVENTS, spill=spill)
+        self.sampler = sampler or SnapshotSampler(interval=3)  # Check every 3 seconds
+        self.last_connections = {}
+        self.stats = MonitorStats('network_monitor')
+
+    def start_monitoring(self):
+        """Start network monitoring"""
+        self.monitoring = True
+        self.events = EventRingBuffer(MAX_EVENTS, spill=self.spill)
+        self.last_connections = {}
+        self.stats.reset()
+
+        self.sampler.subscribe(self._on_snapshot, needs=('connections',))
+        self.sampler.start()
+
+        print("🌐 Network monitoring started")
+
+    def stop_monitoring(self) -> List[Dict[str, Any]]:
+        """Stop monitoring and return events"""
+        self.monitoring = False
+
+        self.sampler.unsubscribe(self._on_snapshot)
+        self.sampler.stop()
+
+        print(f"🌐 Network monitoring stopped - {len(self.events)} network events")
+        return self.events.snapshot()
+
+    def _on_snapshot(self, snapshot: SystemSnapshot):
+        """Monitor network connections from a shared snapshot"""
+        if not self.monitoring:
+            return
+        for error in snapshot.errors:
+            if error.startswith('connections'):
+                self.stats.count_error(error)
+                return
+
+        with self.stats.sweep() as sweep:
+            sweep.items = len(snapshot.connections)
+            self._diff_connections(snapshot)
+
+    def _diff_connections(self, snapshot: SystemSnapshot):
+        """Log sockets entering a tracked state, and sockets that went away"""
+        current_connections = {}
+
+        for conn in snapshot.connections:
+            if conn.status not in TRACKED_STATES:
+                continue
+            conn_key = (conn.laddr.ip if conn.laddr else '',
+                        conn.laddr.port if conn.laddr else 0,
+                        conn.raddr.ip if conn.raddr else '',
+                        conn.raddr.port if conn.raddr else 0)
+
+            current_connections[conn_key] = conn.status
+
+            # New socket, or a state transition such as SYN_SENT -> ESTABLISHED
+            if self.last_connections.get(conn_key) != conn.status:
+                self._log_event({
+                    'type': TRACKED_STATES[conn.status],
+                    'timestamp': snapshot.timestamp,
+                    'status': conn.status,
+                    'local_ip': conn.laddr.ip if conn.laddr else '',
+                    'local_port': conn.laddr.port if conn.laddr else 0,
+                    'remote_ip': conn.raddr.ip if conn.raddr else '',
+                    'remote_port': conn.raddr.port if conn.raddr else 0,
+                    'pid': conn.pid
+                })
+
+        # Check for closed connections
+        for conn_key in self.last_connections.keys() - current_connections.keys():
+            self._log_event({
+                'type': 'connection_closed',
+                'timestamp': snapshot.timestamp,
+                'last_status': self.last_connections[conn_key],
+                'connection': conn_key
+            })
+
+        self.last_connections = current_connections
+
+    def _log_event(self, event: Dict[str, Any]):
+        """Log a network event"""
+        self.events.append(event)
+        self.stats.count_event()
@@ -0,0 +1,59 @@
+"""
+Keyset pagination helpers for MalSim Pro
+Cursors are "<sort value>,<id>" pairs taken from the last row of a page
+"""
+
+from typing import Any, List, Optional, Tuple
+
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(sort_value: Any, row_id: int) -> str:
+    """Build the cursor that resumes after the given row"""
+    return f"{sort_value},{row_id}"
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    """Split a cursor into (sort value, id); raises ValueError if malformed"""
+    sort_value, sep, row_id = cursor.rpartition(',')
+    if not sep or not sort_value:
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return sort_value, int(row_id)
+
+
+def build_page_query(table: str, columns: str, sort_column: str,
+                     after: Optional[Tuple[str, int]] = None,
+                     filters: Optional[List[Tuple[str, Any]]] = None,
+                     since: Optional[str] = None, until: Optional[str] = None,
+                     limit: int = 50) -> Tuple[str, list]:
+    """Build a newest-first keyset query over (sort_column, id)
+
+    `filters` are (column, value) equality tests; None values are skipped so
+    callers can pass optional query arguments straight through.
+    """
+    clauses = []
+    params: list = []
+
+    for column, value in filters or []:
+        if value is not None:
+            clauses.append(f"{column} = ?")
+            params.append(value)
+
+    if since is not None:
+        clauses.append(f"{sort_column} >= ?")
+        params.append(since)
+    if until is not None:
+        clauses.append(f"{sort_column} < ?")
+        params.append(until)
+
+    if after is not None:
+        clauses.append(f"({sort_column}, id) < (?, ?)")
+        params.extend(after)
+
+    sql = f"SELECT {columns} FROM {table}"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    sql += f" ORDER BY {sort_column} DESC, id DESC LIMIT ?"
+    params.append(max(1, min(int(limit), MAX_PAGE_SIZE)))
+
+    return sql, params
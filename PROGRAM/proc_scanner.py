@@ -0,0 +1,302 @@
+"""
+Process Scanners for MalSim Pro
+Process table backends used by the snapshot sampler: psutil, or /proc read directly on Linux
+"""
+
+import os
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+import psutil
+
+# Process attributes collected per sweep; the union of what the monitors use
+PROCESS_ATTRS = ['pid', 'name', 'ppid', 'cmdline', 'create_time', 'cpu_percent', 'memory_percent']
+
+BACKENDS = ('auto', 'psutil', 'procfs')
+
+# The kernel truncates /proc/<pid>/stat comm to 15 characters
+COMM_LENGTH = 15
+
+
+class PsutilScanner:
+    """Portable scanner built on psutil.process_iter
+
+    Scoped scans keep their psutil.Process objects between sweeps, as
+    process_iter does internally, since cpu_percent is measured against the
+    previous sample taken on the same object.
+    """
+
+    name = 'psutil'
+
+    def __init__(self):
+        self._procs: Dict[int, psutil.Process] = {}
+
+    def scan(self, pids: Optional[Iterable[int]] = None) -> Dict[int, Dict[str, Any]]:
+        """Read every process, or only `pids`"""
+        processes = {}
+        if pids is None:
+            procs = psutil.process_iter(PROCESS_ATTRS)
+        else:
+            procs = []
+            cache = {}
+            for pid in pids:
+                proc = self._procs.get(pid)
+                try:
+                    if proc is None or not proc.is_running():  # is_running() also detects pid reuse
+                        proc = psutil.Process(pid)
+                except psutil.NoSuchProcess:
+                    continue
+                cache[pid] = proc
+                procs.append(proc)
+            self._procs = cache  # Drops pids that left the scope or exited
+        for proc in procs:
+            try:
+                info = proc.info if pids is None else proc.as_dict(PROCESS_ATTRS)
+                processes[info['pid']] = info
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                continue
+        return processes
+
+
+class ProcfsScanner:
+    """Linux scanner reading /proc/<pid>/stat and /proc/<pid>/cmdline directly
+
+    cmdline, name and create_time never change for a given process, so they are
+    cached per (pid, start time) and only re-read when a pid is reused. CPU% is
+    computed from the utime+stime jiffy delta between sweeps; on the first
+    sighting of a process it is the average since the process started, instead
+    of the 0.0 psutil reports for a fresh Process object.
+    """
+
+    name = 'procfs'
+
+    def __init__(self, proc_root: str = '/proc'):
+        self.proc_root = proc_root
+        self.clock_ticks = os.sysconf('SC_CLK_TCK')
+        self.page_size = os.sysconf('SC_PAGE_SIZE')
+        self.boot_time = self._read_boot_time()
+        self.total_memory = self._read_total_memory()
+
+        # pid -> (start_ticks, name, cmdline, create_time)
+        self._static: Dict[int, tuple] = {}
+        # pid -> (start_ticks, cpu_ticks, monotonic time of the reading)
+        self._cpu: Dict[int, tuple] = {}
+
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    @classmethod
+    def available(cls, proc_root: str = '/proc') -> bool:
+        return os.path.exists(os.path.join(proc_root, 'self', 'stat'))
+
+    def _read_boot_time(self) -> float:
+        with open(os.path.join(self.proc_root, 'stat'), 'rb') as f:
+            for line in f:
+                if line.startswith(b'btime'):
+                    return float(line.split()[1])
+        return psutil.boot_time()
+
+    def _read_total_memory(self) -> int:
+        with open(os.path.join(self.proc_root, 'meminfo'), 'rb') as f:
+            for line in f:
+                if line.startswith(b'MemTotal:'):
+                    return int(line.split()[1]) * 1024
+        return psutil.virtual_memory().total
+
+    def _read_cmdline(self, pid: int) -> List[str]:
+        try:
+            with open(f'{self.proc_root}/{pid}/cmdline', 'rb') as f:
+                data = f.read()
+        except PermissionError:
+            return []
+        if not data:
+            return []  # Kernel threads and zombies
+        args = data.rstrip(b'\0').split(b'\0')
+        return [arg.decode('utf-8', 'surrogateescape') for arg in args]
+
+    def _process_name(self, comm: str, cmdline: List[str]) -> str:
+        """Recover names the kernel truncated, as psutil does"""
+        if len(comm) >= COMM_LENGTH and cmdline:
+            exe = os.path.basename(cmdline[0])
+            if exe.startswith(comm):
+                return exe
+        return comm
+
+    def scan(self, pids: Optional[Iterable[int]] = None) -> Dict[int, Dict[str, Any]]:
+        """Read every process, or only `pids`"""
+        processes = {}
+        now = time.monotonic()
+        uptime = time.time() - self.boot_time
+
+        if pids is None:
+            pids = list_pids(self.proc_root)
+        for pid in pids:
+            try:
+                with open(f'{self.proc_root}/{pid}/stat', 'rb') as f:
+                    stat = f.read()
+
+                # comm may itself contain spaces and parentheses
+                lparen, rparen = stat.find(b'('), stat.rfind(b')')
+                comm = stat[lparen + 1:rparen].decode('utf-8', 'replace')
+                fields = stat[rparen + 2:].split()
+                ppid = int(fields[1])
+                cpu_ticks = int(fields[11]) + int(fields[12])  # utime + stime
+                start_ticks = int(fields[19])
+                rss_pages = int(fields[21])
+
+                cached = self._static.get(pid)
+                if cached is None or cached[0] != start_ticks:
+                    self.cache_misses += 1
+                    cmdline = self._read_cmdline(pid)
+                    cached = (start_ticks, self._process_name(comm, cmdline), cmdline,
+                              self.boot_time + start_ticks / self.clock_ticks)
+                    self._static[pid] = cached
+                else:
+                    self.cache_hits += 1
+            except (OSError, IndexError, ValueError):
+                continue  # Exited mid-read, or not ours to read (hidepid, other users)
+
+            previous = self._cpu.get(pid)
+            if previous is not None and previous[0] == start_ticks and now > previous[2]:
+                elapsed = now - previous[2]
+                cpu_delta = cpu_ticks - previous[1]
+            else:
+                elapsed = uptime - start_ticks / self.clock_ticks
+                cpu_delta = cpu_ticks
+            cpu_percent = cpu_delta / self.clock_ticks / elapsed * 100 if elapsed > 0 else 0.0
+            self._cpu[pid] = (start_ticks, cpu_ticks, now)
+
+            processes[pid] = {
+                'pid': pid,
+                'name': cached[1],
+                'ppid': ppid,
+                'cmdline': cached[2],
+                'create_time': cached[3],
+                'cpu_percent': round(cpu_percent, 1),
+                'memory_percent': rss_pages * self.page_size / self.total_memory * 100,
+            }
+
+        # Forget processes that have exited
+        if len(self._static) > len(processes):
+            for pid in self._static.keys() - processes.keys():
+                self._static.pop(pid, None)
+                self._cpu.pop(pid, None)
+
+        return processes
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'cached_processes': len(self._static),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+        }
+
+
+def list_pids(proc_root: str = '/proc') -> List[int]:
+    return [int(entry) for entry in os.listdir(proc_root) if entry.isdigit()]
+
+
+def list_subtree(roots: Iterable[int], proc_root: str = '/proc') -> Set[int]:
+    """Return `roots` and all their live descendants
+
+    Uses /proc/<pid>/task/<tid>/children where the kernel provides it, which
+    only touches the subtree; otherwise falls back to psutil, which reads the
+    whole process table. Processes that daemonize are reparented away from the
+    subtree and are not found here.
+    """
+    found = set()
+    if os.path.exists(f'{proc_root}/{os.getpid()}/task/{os.getpid()}/children'):
+        stack = list(roots)
+        while stack:
+            pid = stack.pop()
+            if pid in found:
+                continue
+            try:
+                tasks = os.listdir(f'{proc_root}/{pid}/task')
+            except OSError:
+                continue  # Exited
+            found.add(pid)
+            for tid in tasks:
+                try:
+                    with open(f'{proc_root}/{pid}/task/{tid}/children', 'rb') as f:
+                        stack.extend(int(child) for child in f.read().split())
+                except OSError:
+                    continue
+        return found
+
+    for pid in roots:
+        try:
+            proc = psutil.Process(pid)
+            found.add(pid)
+            found.update(child.pid for child in proc.children(recursive=True))
+        except psutil.Error:
+            continue
+    return found
+
+
+class ProcessScope:
+    """Restricts sweeps to one process subtree, plus processes using the watched paths
+
+    Processes found with a working directory or an open file under
+    `watch_paths` (see adopt_touching, run on the low-rate host-wide sample)
+    are adopted as extra roots for the rest of the scope's life.
+    """
+
+    def __init__(self, root_pid: int, watch_paths: Iterable[str] = (),
+                 host_interval: Optional[float] = None, proc_root: str = '/proc'):
+        self.root_pid = root_pid
+        self.watch_paths = [os.path.abspath(path) for path in watch_paths]
+        self.host_interval = host_interval
+        self.proc_root = proc_root
+        self.adopted: Set[int] = set()
+
+    def pids(self) -> Set[int]:
+        pids = list_subtree([self.root_pid, *self.adopted], self.proc_root)
+        self.adopted &= pids  # Forget adopted processes that have exited
+        return pids
+
+    def _touches(self, path: str) -> bool:
+        return any(path == root or path.startswith(root + os.sep) for root in self.watch_paths)
+
+    def adopt_touching(self, pids: Optional[Iterable[int]] = None) -> Set[int]:
+        """Adopt processes whose cwd or open files are under the watched paths"""
+        if not self.watch_paths:
+            return set()
+
+        adopted = set()
+        for pid in (pids if pids is not None else list_pids(self.proc_root)):
+            if pid in self.adopted:
+                continue
+            base = f'{self.proc_root}/{pid}'
+            try:
+                touching = self._touches(os.readlink(f'{base}/cwd'))
+                if not touching:
+                    with os.scandir(f'{base}/fd') as entries:
+                        for entry in entries:
+                            try:
+                                if self._touches(os.readlink(entry.path)):
+                                    touching = True
+                                    break
+                            except OSError:
+                                continue
+            except OSError:
+                continue  # Exited, or not ours to inspect
+            if touching:
+                adopted.add(pid)
+
+        self.adopted |= adopted
+        return adopted
+
+
+def create_scanner(backend: Optional[str] = 'psutil'):
+    """Build a process scanner; 'auto' prefers /proc where it exists"""
+    backend = backend or 'psutil'
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown process backend: {backend} (expected one of {', '.join(BACKENDS)})")
+
+    if backend in ('auto', 'procfs'):
+        if ProcfsScanner.available():
+            return ProcfsScanner()
+        if backend == 'procfs':
+            print("⚠️  /proc is not available on this host, falling back to psutil process scanning")
+    return PsutilScanner()
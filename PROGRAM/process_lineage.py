@@ -0,0 +1,136 @@
+"""
+Process Lineage for MalSim Pro
+Incrementally maintained parent/child index of the processes seen during a session
+"""
+
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# (pid, create_time) identifies a process even when the kernel reuses its pid
+ProcessKey = Tuple[int, float]
+
+
+class ProcessLineage:
+    """Parent/child index keyed by (pid, create_time)
+
+    Nodes are added as processes are first seen and are kept after they exit,
+    so the tree of a whole session can be stored and queried afterwards.
+    Ancestry walks parent links (O(depth)); descendant queries only visit the
+    subtree.
+    """
+
+    def __init__(self):
+        self.nodes: Dict[ProcessKey, Dict[str, Any]] = {}
+        self._children: Dict[ProcessKey, List[ProcessKey]] = {}
+        self._live: Dict[int, ProcessKey] = {}  # pid -> key of the process currently using it
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def __contains__(self, key: ProcessKey) -> bool:
+        return key in self.nodes
+
+    def add(self, pid: int, ppid: Optional[int], create_time: float,
+            name: str = '', cmdline: Optional[Iterable[str]] = None) -> ProcessKey:
+        """Record a process; returns its key. Parents must be added before their children"""
+        key = (pid, create_time)
+        if key in self.nodes:
+            return key
+
+        parent = self._live.get(ppid) if ppid else None
+        # A parent created after the child is a reused pid, not the real parent
+        if parent is not None and parent[1] > create_time:
+            parent = None
+
+        self.nodes[key] = {
+            'pid': pid,
+            'create_time': create_time,
+            'ppid': ppid,
+            'parent_create_time': parent[1] if parent else None,
+            'name': name,
+            'cmdline': ' '.join(cmdline or []),
+            'exit_time': None,
+        }
+        self._children[key] = []
+        if parent is not None:
+            self._children[parent].append(key)
+
+        previous = self._live.get(pid)
+        if previous is not None and previous != key and self.nodes[previous]['exit_time'] is None:
+            # The old process exited before its pid was handed out again
+            self.nodes[previous]['exit_time'] = datetime.fromtimestamp(create_time).isoformat()
+        self._live[pid] = key
+        return key
+
+    def mark_exited(self, pid: int, timestamp: str) -> Optional[ProcessKey]:
+        key = self._live.pop(pid, None)
+        if key is not None:
+            self.nodes[key]['exit_time'] = timestamp
+        return key
+
+    def lookup(self, pid: int) -> Optional[ProcessKey]:
+        """Key of the live process with this pid"""
+        return self._live.get(pid)
+
+    def parent(self, key: ProcessKey) -> Optional[ProcessKey]:
+        node = self.nodes.get(key)
+        if node is None or node['parent_create_time'] is None:
+            return None
+        return (node['ppid'], node['parent_create_time'])
+
+    def ancestors(self, key: ProcessKey) -> List[ProcessKey]:
+        """Parent, grandparent, ... up to the oldest known ancestor"""
+        chain = []
+        key = self.parent(key)
+        while key is not None:
+            chain.append(key)
+            key = self.parent(key)
+        return chain
+
+    def is_descendant(self, key: ProcessKey, ancestor: ProcessKey) -> bool:
+        return ancestor in self.ancestors(key)
+
+    def descendants(self, key: ProcessKey) -> List[ProcessKey]:
+        """Every process below `key`, depth first"""
+        result = []
+        stack = list(reversed(self._children.get(key, [])))
+        while stack:
+            child = stack.pop()
+            result.append(child)
+            stack.extend(reversed(self._children[child]))
+        return result
+
+    def roots(self) -> List[ProcessKey]:
+        return [key for key in self.nodes if self.parent(key) is None]
+
+    def to_rows(self) -> List[Dict[str, Any]]:
+        """Flat node list, oldest first, as stored in process_lineage"""
+        return sorted(self.nodes.values(), key=lambda node: node['create_time'])
+
+    def to_tree(self, key: Optional[ProcessKey] = None) -> List[Dict[str, Any]]:
+        """Nested tree under `key`, or the whole forest"""
+        return build_tree(self.to_rows(), key)
+
+
+def build_tree(rows: Iterable[Dict[str, Any]], root: Optional[ProcessKey] = None) -> List[Dict[str, Any]]:
+    """Nest flat lineage rows into [{..., 'children': [...]}, ...] in one pass
+
+    With `root`, only that process and its subtree are returned.
+    """
+    nodes = {}
+    for row in rows:
+        node = dict(row)
+        node['children'] = []
+        nodes[(node['pid'], node['create_time'])] = node
+
+    forest = []
+    for key, node in nodes.items():
+        parent = nodes.get((node['ppid'], node['parent_create_time']))
+        if parent is not None:
+            parent['children'].append(node)
+        elif root is None:
+            forest.append(node)
+
+    if root is not None:
+        return [nodes[root]] if root in nodes else []
+    return forest
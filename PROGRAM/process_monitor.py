@@ -1 +1,133 @@
-# process_monitor.py - Created 2025-09-03 19:40:11.304763
+"""
+Process Monitor for MalSim Pro
+Detailed process monitoring and analysis
+"""
+
+from datetime import datetime
+from typing import Dict, List, Any
+
+from monitor_stats import MonitorStats
+from process_sampler import SnapshotSampler, SystemSnapshot
+from process_lineage import ProcessLineage
+from ring_buffer import EventRingBuffer
+
+# Keep only last 1000 events in memory; older ones go to the spill target
+MAX_EVENTS = 1000
+
+class ProcessMonitor:
+    def __init__(self, sampler: SnapshotSampler = None, spill=None, db=None, session_id: str = None):
+        self.monitoring = False
+        self.spill = spill
+        self.db = db  # AnalysisDB the process tree is saved to on stop
+        self.session_id = session_id
+        self.events = EventRingBuffer(MAX_EVENTS, spill=spill)
+        self.sampler = sampler or SnapshotSampler(interval=2)
+        self.process_tree = ProcessLineage()
+        self.known_processes = set()
+        self.stats = MonitorStats('process_monitor')
+
+    def start_monitoring(self):
+        """Start process monitoring"""
+        self.monitoring = True
+        self.events = EventRingBuffer(MAX_EVENTS, spill=self.spill)
+        self.known_processes = set()
+        self.process_tree = ProcessLineage()
+        self.stats.reset()
+
+        self.sampler.subscribe(self._on_snapshot, needs=('processes',))
+        self.sampler.start()
+
+        print("⚙️  Process monitoring started")
+
+    def stop_monitoring(self) -> List[Dict[str, Any]]:
+        """Stop monitoring and return events"""
+        self.monitoring = False
+
+        self.sampler.unsubscribe(self._on_snapshot)
+        self.sampler.stop()
+
+        if self.db is not None and self.session_id:
+            self.db.save_process_lineage(self.session_id, self.process_tree.to_rows())
+
+        print(f"⚙️  Process monitoring stopped - {len(self.events)} process events")
+        return self.events.snapshot()
+
+    def _on_snapshot(self, snapshot: SystemSnapshot):
+        """Monitor process creation and behavior from a shared snapshot"""
+        if not self.monitoring or not snapshot.processes:
+            return
+
+        with self.stats.sweep() as sweep:
+            sweep.items = len(snapshot.processes)
+            self._diff_processes(snapshot)
+
+    def _diff_processes(self, snapshot: SystemSnapshot):
+        """Log started, exited and suspicious processes"""
+        current_processes = set(snapshot.processes)
+
+        # Oldest first, so parents enter the lineage index before their children
+        ordered = sorted(snapshot.processes.items(), key=lambda item: item[1]['create_time'] or 0.0)
+        for pid, proc_info in ordered:
+            create_time = proc_info['create_time'] or 0.0
+            known = self.process_tree.lookup(pid)
+
+            # New process, or a pid reused since the last sweep
+            if pid not in self.known_processes or known is None or known[1] != create_time:
+                key = self.process_tree.add(pid, proc_info['ppid'], create_time,
+                                            proc_info['name'], proc_info['cmdline'])
+                self._log_event({
+                    'type': 'process_start',
+                    'timestamp': snapshot.timestamp,
+                    'pid': pid,
+                    'name': proc_info['name'],
+                    'ppid': proc_info['ppid'],
+                    'cmdline': ' '.join(proc_info['cmdline'] or []),
+                    'create_time': proc_info['create_time'],
+                    'parent_create_time': self.process_tree.nodes[key]['parent_create_time']
+                })
+
+            # Monitor suspicious behavior
+            self._check_suspicious_behavior(proc_info)
+
+        # Detect terminated processes
+        for pid in self.known_processes - current_processes:
+            self.process_tree.mark_exited(pid, snapshot.timestamp)
+            self._log_event({
+                'type': 'process_exit',
+                'timestamp': snapshot.timestamp,
+                'pid': pid
+            })
+
+        self.known_processes = current_processes
+
+    def _check_suspicious_behavior(self, proc_info):
+        """Check for suspicious process behavior"""
+        try:
+            # High CPU usage
+            if proc_info['cpu_percent'] > 90:
+                self._log_event({
+                    'type': 'high_cpu_process',
+                    'timestamp': datetime.now().isoformat(),
+                    'pid': proc_info['pid'],
+                    'name': proc_info['name'],
+                    'cpu_percent': proc_info['cpu_percent']
+                })
+
+            # Suspicious process names
+            suspicious_names = ['cmd.exe', 'powershell.exe', 'rundll32.exe', 'regsvr32.exe']
+            if proc_info['name'] in suspicious_names:
+                self._log_event({
+                    'type': 'suspicious_process',
+                    'timestamp': datetime.now().isoformat(),
+                    'pid': proc_info['pid'],
+                    'name': proc_info['name'],
+                    'cmdline': ' '.join(proc_info['cmdline'] or [])
+                })
+
+        except Exception as e:
+            self.stats.count_error(e)
+
+    def _log_event(self, event: Dict[str, Any]):
+        """Log a process event"""
+        self.events.append(event)
+        self.stats.count_event()
@@ -0,0 +1,368 @@
+"""
+Snapshot Sampler for MalSim Pro
+Takes one system snapshot per tick and fans it out to subscribed monitors
+"""
+
+import time
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import psutil
+
+import monitor_stats
+from net_scanner import create_net_scanner
+from proc_scanner import ProcessScope, create_scanner
+
+DEFAULT_INTERVAL = 2.0
+DEFAULT_BACKEND = 'psutil'
+
+SNAPSHOT_PARTS = ('processes', 'connections', 'resources')
+
+# Per-sweep interval history kept for get_interval_history()
+INTERVAL_HISTORY = 1000
+
+# Weight of the newest sweep in the CPU cost average the overhead budget uses
+CPU_COST_SMOOTHING = 0.2
+
+
+class SystemSnapshot:
+    """Everything the monitors need from one sweep of the host"""
+
+    def __init__(self):
+        self.timestamp = datetime.now().isoformat()
+        self.processes: Dict[int, Dict[str, Any]] = {}
+        self.connections: List[Any] = []
+        self.resources: Dict[str, Any] = {}
+        self.errors: List[str] = []
+        self.sweep_ms = 0.0
+        self.changes = 0  # Processes and sockets that appeared or went away since the last sweep
+        self.interval: Optional[float] = None  # Seconds since the previous sweep started
+        self.scoped = False  # Limited to a ProcessScope rather than the whole host
+
+
+class AdaptiveInterval:
+    """Polling interval that shrinks while sweeps see changes and backs off when idle
+
+    After a sweep with changes the interval is multiplied by `shrink`, after a
+    quiet one by `grow`, always staying within [min_interval, max_interval].
+    """
+
+    def __init__(self, initial: float, min_interval: float, max_interval: float,
+                 shrink: float = 0.5, grow: float = 1.5):
+        if not 0 < min_interval <= max_interval:
+            raise ValueError("interval bounds must satisfy 0 < min_interval <= max_interval")
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.shrink = shrink
+        self.grow = grow
+        self.current = min(max(initial, min_interval), max_interval)
+
+    def update(self, changes: int) -> float:
+        factor = self.shrink if changes else self.grow
+        self.current = min(max(self.current * factor, self.min_interval), self.max_interval)
+        return self.current
+
+
+class SnapshotSampler:
+    """Single sampler thread shared by SystemMonitor, ProcessMonitor and NetworkMonitor
+
+    Each subscriber states which parts of the snapshot it needs; a part is only
+    collected while at least one subscriber wants it, so the process table and
+    the socket table are each walked at most once per tick.
+
+    With a `cpu_budget` (percent of one core), the wait between sweeps is
+    stretched whenever sampling plus the subscribers would otherwise use more
+    CPU than that.
+    """
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL, backend: str = DEFAULT_BACKEND,
+                 network_backend: str = DEFAULT_BACKEND, min_interval: Optional[float] = None,
+                 max_interval: Optional[float] = None, cpu_budget: Optional[float] = None):
+        if cpu_budget is not None and cpu_budget <= 0:
+            raise ValueError("cpu_budget must be a positive percentage")
+        self.interval = interval
+        self.cpu_budget = cpu_budget
+        # Fixed interval unless both bounds are given
+        self.scheduler = None
+        if min_interval is not None and max_interval is not None:
+            self.scheduler = AdaptiveInterval(interval, min_interval, max_interval)
+        self.scanner = create_scanner(backend)
+        self.net_scanner = create_net_scanner(network_backend)
+        self.sampler_thread = None
+        self.running = False
+
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._subscribers: Dict[Callable, frozenset] = {}
+        self._users = 0
+
+        self.ticks = 0
+        self.callback_errors = 0
+        self.last_sweep_ms = 0.0
+        self.total_sweep_ms = 0.0
+        self.sweep_errors = 0
+        self.last_error: Optional[str] = None
+        self.cpu_cost = 0.0  # Smoothed thread CPU seconds per tick, subscribers included
+        self.total_cpu_seconds = 0.0
+        self.throttled = 0  # Waits stretched to stay within cpu_budget
+        self._started_at = None
+
+        self._last_pids = None
+        self._last_sockets = None
+        self._last_sweep_start = None
+        self.interval_history = deque(maxlen=INTERVAL_HISTORY)
+
+        self.scope: Optional[ProcessScope] = None
+        self.host_snapshot: Optional[SystemSnapshot] = None  # Latest host-wide context sample
+        self._last_host_sample = None
+
+        monitor_stats.register('sampler', self)
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> 'SnapshotSampler':
+        """Build a sampler using the monitoring section of settings.json"""
+        monitoring = config.get('monitoring', {})
+        adaptive = monitoring.get('adaptive_polling', False)
+        return cls(monitoring.get('sample_interval', DEFAULT_INTERVAL),
+                   monitoring.get('process_backend', DEFAULT_BACKEND),
+                   monitoring.get('network_backend', DEFAULT_BACKEND),
+                   monitoring.get('min_interval') if adaptive else None,
+                   monitoring.get('max_interval') if adaptive else None,
+                   monitoring.get('cpu_budget_percent'))
+
+    def set_scope(self, scope: Optional[ProcessScope]):
+        """Limit sweeps to a process subtree; None goes back to the whole host"""
+        with self._lock:
+            self.scope = scope
+            self.host_snapshot = None
+            self._last_host_sample = None
+            # The next sweep is compared against a different population
+            self._last_pids = None
+            self._last_sockets = None
+
+    @property
+    def current_interval(self) -> float:
+        """Seconds until the next sweep"""
+        return self.scheduler.current if self.scheduler else self.interval
+
+    def next_wait(self) -> float:
+        """current_interval, stretched so the sampler stays within cpu_budget"""
+        wait = self.current_interval
+        if self.cpu_budget:
+            needed = self.cpu_cost * 100 / self.cpu_budget
+            if needed > wait:
+                self.throttled += 1
+                return needed
+        return wait
+
+    def subscribe(self, callback: Callable[[SystemSnapshot], None],
+                  needs: Iterable[str] = SNAPSHOT_PARTS):
+        """Register a callback for every snapshot"""
+        needs = frozenset(needs)
+        unknown = needs - set(SNAPSHOT_PARTS)
+        if unknown:
+            raise ValueError(f"Unknown snapshot parts: {', '.join(sorted(unknown))}")
+        with self._lock:
+            self._subscribers[callback] = needs
+
+    def unsubscribe(self, callback: Callable[[SystemSnapshot], None]):
+        with self._lock:
+            self._subscribers.pop(callback, None)
+
+    def start(self):
+        """Start sampling; each start() must be paired with a stop()"""
+        with self._lock:
+            self._users += 1
+            if self.running:
+                return
+            self.running = True
+            self._stop_event.clear()
+            self._last_sweep_start = None
+            self._started_at = time.monotonic()
+
+        self.sampler_thread = threading.Thread(target=self._sample_loop, name='malsim-sampler')
+        self.sampler_thread.daemon = True
+        self.sampler_thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Release one start(); the thread exits when the last user stops"""
+        with self._lock:
+            self._users = max(0, self._users - 1)
+            if self._users or not self.running:
+                return
+            self.running = False
+            self._stop_event.set()
+
+        if self.sampler_thread and self.sampler_thread is not threading.current_thread():
+            self.sampler_thread.join(timeout=timeout)
+
+    def get_stats(self) -> Dict[str, Any]:
+        elapsed = time.monotonic() - self._started_at if self._started_at else 0.0
+        return {
+            'interval': self.interval,
+            'current_interval': self.current_interval,
+            'adaptive': self.scheduler is not None,
+            'backend': self.scanner.name,
+            'network_backend': self.net_scanner.name,
+            'ticks': self.ticks,
+            'subscribers': len(self._subscribers),
+            'last_sweep_ms': self.last_sweep_ms,
+            'avg_sweep_ms': self.total_sweep_ms / self.ticks if self.ticks else 0.0,
+            'callback_errors': self.callback_errors,
+            'sweep_errors': self.sweep_errors,
+            'last_error': self.last_error,
+            'overhead_percent': self.total_cpu_seconds * 100 / elapsed if elapsed > 0 else 0.0,
+            'cpu_budget': self.cpu_budget,
+            'throttled': self.throttled,
+            'scoped': self.scope is not None,
+            'scope_adopted': len(self.scope.adopted) if self.scope else 0,
+            'host_processes': len(self.host_snapshot.processes) if self.host_snapshot else None,
+        }
+
+    def _sample_loop(self):
+        while not self._stop_event.is_set():
+            self.sample_once()
+            self._stop_event.wait(self.next_wait())
+
+    def get_interval_history(self) -> List[Dict[str, Any]]:
+        """Interval actually used before each recent sweep, with the changes it saw"""
+        return list(self.interval_history)
+
+    def _count_changes(self, snapshot: SystemSnapshot, needs: frozenset) -> int:
+        changes = 0
+        if 'processes' in needs:
+            pids = snapshot.processes.keys()
+            if self._last_pids is not None:
+                changes += len(pids ^ self._last_pids)
+            self._last_pids = set(pids)
+        else:
+            self._last_pids = None
+        if 'connections' in needs:
+            sockets = {(conn.laddr, conn.raddr, conn.status) for conn in snapshot.connections}
+            if self._last_sockets is not None:
+                changes += len(sockets ^ self._last_sockets)
+            self._last_sockets = sockets
+        else:
+            self._last_sockets = None
+        return changes
+
+    def sample_once(self) -> SystemSnapshot:
+        """Take one snapshot and deliver it to every subscriber"""
+        with self._lock:
+            subscribers = list(self._subscribers.items())
+        needs = frozenset().union(*(parts for _, parts in subscribers)) if subscribers else frozenset()
+
+        started = time.monotonic()
+        cpu_started = time.thread_time()
+        scope = self.scope
+        if scope is not None and scope.host_interval and (
+                self._last_host_sample is None or started - self._last_host_sample >= scope.host_interval):
+            self._sample_host(scope, needs)
+            self._last_host_sample = started
+
+        snapshot = self.take_snapshot(needs, scope)
+        snapshot.changes = self._count_changes(snapshot, needs)
+        if self._last_sweep_start is not None:
+            snapshot.interval = started - self._last_sweep_start
+        self._last_sweep_start = started
+
+        if self.scheduler:
+            self.scheduler.update(snapshot.changes)
+        self.interval_history.append({
+            'timestamp': snapshot.timestamp,
+            'interval': snapshot.interval,
+            'changes': snapshot.changes,
+            'sweep_ms': snapshot.sweep_ms,
+        })
+
+        self.ticks += 1
+        self.last_sweep_ms = snapshot.sweep_ms
+        self.total_sweep_ms += snapshot.sweep_ms
+
+        for callback, _ in subscribers:
+            try:
+                callback(snapshot)
+            except Exception as e:
+                self.callback_errors += 1
+                print(f"❌ Snapshot subscriber {getattr(callback, '__qualname__', callback)} failed: {e}")
+
+        if snapshot.errors:
+            self.sweep_errors += len(snapshot.errors)
+            self.last_error = snapshot.errors[-1]
+        cpu = time.thread_time() - cpu_started
+        self.total_cpu_seconds += cpu
+        self.cpu_cost = cpu if self.ticks == 1 else (
+            CPU_COST_SMOOTHING * cpu + (1 - CPU_COST_SMOOTHING) * self.cpu_cost)
+
+        return snapshot
+
+    def _sample_host(self, scope: ProcessScope, needs: frozenset):
+        """Low-rate host-wide sample: kept for context, and used to adopt
+        processes that touch the scope's watched paths"""
+        self.host_snapshot = self.take_snapshot(needs | {'processes'})
+        try:
+            scope.adopt_touching(self.host_snapshot.processes.keys())
+        except Exception as e:
+            self.host_snapshot.errors.append(f"scope: {e}")
+
+    def take_snapshot(self, needs: Iterable[str] = SNAPSHOT_PARTS,
+                      scope: Optional[ProcessScope] = None) -> SystemSnapshot:
+        """Collect the requested parts of a snapshot without notifying anyone"""
+        needs = set(needs)
+        snapshot = SystemSnapshot()
+        snapshot.scoped = scope is not None
+        t0 = time.perf_counter()
+
+        pids = None
+        if scope is not None and needs & {'processes', 'connections'}:
+            try:
+                pids = scope.pids()
+            except Exception as e:
+                snapshot.errors.append(f"scope: {e}")
+                pids = set()
+
+        if 'processes' in needs:
+            try:
+                snapshot.processes = self.scanner.scan(pids)
+            except Exception as e:
+                snapshot.errors.append(f"processes: {e}")
+
+        if 'connections' in needs:
+            try:
+                snapshot.connections = self.net_scanner.scan(pids)
+            except Exception as e:
+                snapshot.errors.append(f"connections: {e}")
+
+        if 'resources' in needs:
+            try:
+                memory = psutil.virtual_memory()
+                snapshot.resources = {
+                    'cpu_percent': psutil.cpu_percent(interval=None),
+                    'memory_percent': memory.percent,
+                    'memory_available': memory.available,
+                    'disk_percent': psutil.disk_usage('/').percent,
+                }
+            except Exception as e:
+                snapshot.errors.append(f"resources: {e}")
+
+        snapshot.sweep_ms = (time.perf_counter() - t0) * 1000
+        return snapshot
+
+
+_shared_sampler: Optional[SnapshotSampler] = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_sampler(interval: Optional[float] = None,
+                       backend: str = DEFAULT_BACKEND,
+                       network_backend: str = DEFAULT_BACKEND) -> SnapshotSampler:
+    """Return the process-wide sampler, creating it on first use"""
+    global _shared_sampler
+    with _shared_lock:
+        if _shared_sampler is None:
+            _shared_sampler = SnapshotSampler(interval or DEFAULT_INTERVAL, backend, network_backend)
+        elif interval is not None:
+            _shared_sampler.interval = interval
+        return _shared_sampler
@@ -13,21 +13,22 @@ This simulator demonstrates ransomware behavior patterns:
 
 import os
 import sys
-import time
 import json
 import shutil
 import hashlib
-import random
 import threading
-from datetime import datetime
 from pathlib import Path
 
-class RansomwareSimulator:
-    def __init__(self, config=None):
-        self.config = config or {}
-        self.is_running = False
-        self.test_dir = "/tmp/malsim_ransomware_test"
+from sim_pipeline import Phase, PhasedSimulator
+
+class RansomwareSimulator(PhasedSimulator):
+    sim_type = 'ransomware'
+    
+    def __init__(self, config=None, clock=None, seed=None):
+        super().__init__(config, clock, seed)
+        self.test_dir = self.config.get('test_dir', "/tmp/malsim_ransomware_test")
         self.encrypted_files = []
+        self.files_to_encrypt = []
         self.ransom_note = """
 ╔══════════════════════════════════════╗
 ║         🔒 YOUR FILES ARE ENCRYPTED! ║
@@ -114,12 +115,13 @@ for cybersecurity learning. No real encryption occurred.
         discovered_files = []
         
         for root, dirs, files in os.walk(self.test_dir):
-            for file in files:
+            dirs.sort()  # Stable order so a seeded run replays exactly
+            for file in sorted(files):
                 if not file.endswith('.ENCRYPTED') and not file.endswith('.txt'):
                     file_path = os.path.join(root, file)
                     discovered_files.append(file_path)
                     print(f"   📁 Found: {file_path}")
-                    time.sleep(0.1)  # Simulate processing time
+                    self.sleep(0.1)  # Simulate processing time
         
         return discovered_files
     
@@ -146,7 +148,7 @@ for cybersecurity learning. No real encryption occurred.
                 'original': file_path,
                 'encrypted': encrypted_path,
                 'size': len(original_data),
-                'timestamp': datetime.now().isoformat()
+                'timestamp': self.clock.now().isoformat()
             })
             
             return True
@@ -190,7 +192,7 @@ for cybersecurity learning. No real encryption occurred.
             for change in registry_changes:
                 f.write(f"ADDED: {change}\n")
                 print(f"   🔧 Simulated: {change}")
-                time.sleep(0.5)
+                self.sleep(0.5)
     
     def simulate_network_communication(self):
         """Simulate C&C server communication"""
@@ -204,133 +206,75 @@ for cybersecurity learning. No real encryption occurred.
         
         for server in fake_servers:
             print(f"   📡 Attempting connection to C&C server: {server}")
-            time.sleep(1)
+            self.sleep(1)
             print(f"   ✅ Sent victim info to: {server}")
     
-    def run_simulation(self, duration=300):
-        """Main simulation execution"""
-        self.is_running = True
-        start_time = datetime.now()
-        results = {
-            'type': 'ransomware',
-            'start_time': start_time.isoformat(),
-            'events': [],
+    def new_results(self):
+        return {
             'files_affected': 0,
             'directories_created': 0,
             'network_connections': 0,
             'system_changes': 0,
             'threat_level': 'CRITICAL'
         }
-        
-        try:
-            print("🔥 STARTING RANSOMWARE SIMULATION")
-            print("=" * 50)
-            
-            # Phase 1: Environment Setup
-            results['events'].append({
-                'time': datetime.now().isoformat(),
-                'phase': 'initialization',
-                'action': 'Setting up test environment',
-                'details': 'Creating fake user directories and files'
-            })
-            self.setup_test_environment()
-            
-            if not self.is_running:
-                return results
-            
-            # Phase 2: File Discovery
-            results['events'].append({
-                'time': datetime.now().isoformat(),
-                'phase': 'discovery',
-                'action': 'Scanning for files to encrypt',
-                'details': 'Enumerating target file types'
-            })
-            files_to_encrypt = self.simulate_file_discovery()
-            time.sleep(2)
-            
-            if not self.is_running:
-                return results
-            
-            # Phase 3: System Modification
-            results['events'].append({
-                'time': datetime.now().isoformat(),
-                'phase': 'system_modification',
-                'action': 'Modifying system settings',
-                'details': 'Disabling security features and adding persistence'
-            })
-            self.simulate_system_changes()
-            results['system_changes'] = 3
-            
-            if not self.is_running:
-                return results
-            
-            # Phase 4: Encryption Process
-            results['events'].append({
-                'time': datetime.now().isoformat(),
-                'phase': 'encryption',
-                'action': 'Starting file encryption',
-                'details': f'Beginning encryption of {len(files_to_encrypt)} files'
-            })
-            
-            for i, file_path in enumerate(files_to_encrypt[:20]):  # Limit for demo
-                if not self.is_running:
-                    break
-                    
-                print(f"🔒 Encrypting ({i+1}/{len(files_to_encrypt)}): {os.path.basename(file_path)}")
-                
-                if self.simulate_encryption(file_path):
-                    results['events'].append({
-                        'time': datetime.now().isoformat(),
-                        'phase': 'encryption',
-                        'action': 'File encrypted',
-                        'details': f'Encrypted: {os.path.basename(file_path)}'
-                    })
-                    results['files_affected'] += 1
-                
-                time.sleep(random.uniform(0.5, 2.0))  # Realistic encryption timing
-            
-            if not self.is_running:
-                return results
-            
-            # Phase 5: Ransom Note Creation
-            results['events'].append({
-                'time': datetime.now().isoformat(),
-                'phase': 'ransom',
-                'action': 'Creating ransom notes',
-                'details': 'Placing ransom notes in multiple locations'
-            })
-            self.create_ransom_notes()
-            
-            # Phase 6: Network Communication
-            results['events'].append({
-                'time': datetime.now().isoformat(),
-                'phase': 'communication',
-                'action': 'Contacting C&C servers',
-                'details': 'Reporting successful infection'
-            })
-            self.simulate_network_communication()
-            results['network_connections'] = 3
-            
-            # Final Results
-            results['end_time'] = datetime.now().isoformat()
-            results['duration'] = (datetime.now() - start_time).total_seconds()
-            results['directories_created'] = len(os.listdir(self.test_dir))
-            
-            print("\n🎯 RANSOMWARE SIMULATION COMPLETED")
-            print(f"📊 Files affected: {results['files_affected']}")
-            print(f"📂 Test directory: {self.test_dir}")
-            print(f"⏱️ Duration: {results['duration']:.1f} seconds")
-            print("\n⚠️ REMEMBER: This was a SAFE simulation for education!")
+    
+    def phases(self):
+        """Ransom notes and C&C reporting both only need encryption to be done"""
+        return [
+            Phase('initialization', self._initialize, 'Setting up test environment',
+                  'Creating fake user directories and files'),
+            Phase('discovery', self._discover, 'Scanning for files to encrypt',
+                  'Enumerating target file types'),
+            Phase('system_modification', self._modify_system, 'Modifying system settings',
+                  'Disabling security features and adding persistence'),
+            Phase('encryption', self._encrypt, 'Starting file encryption',
+                  lambda results: f'Beginning encryption of {len(self.files_to_encrypt)} files'),
+            Phase('ransom', lambda results: self.create_ransom_notes(), 'Creating ransom notes',
+                  'Placing ransom notes in multiple locations', after=['encryption']),
+            Phase('communication', self._communicate, 'Contacting C&C servers',
+                  'Reporting successful infection', after=['encryption']),
+        ]
+    
+    def _initialize(self, results):
+        print("🔥 STARTING RANSOMWARE SIMULATION")
+        print("=" * 50)
+        self.setup_test_environment()
+    
+    def _discover(self, results):
+        self.files_to_encrypt = self.simulate_file_discovery()
+        self.sleep(2)
+    
+    def _modify_system(self, results):
+        self.simulate_system_changes()
+        results['system_changes'] = 3
+    
+    def _encrypt(self, results):
+        for i, file_path in enumerate(self.files_to_encrypt[:20]):  # Limit for demo
+            print(f"🔒 Encrypting ({i+1}/{len(self.files_to_encrypt)}): {os.path.basename(file_path)}")
             
-            return results
+            if self.simulate_encryption(file_path):
+                results['events'].append({
+                    'time': self.clock.now().isoformat(),
+                    'phase': 'encryption',
+                    'action': 'File encrypted',
+                    'details': f'Encrypted: {os.path.basename(file_path)}'
+                })
+                results['files_affected'] += 1
             
-        except Exception as e:
-            print(f"❌ Simulation error: {e}")
-            results['error'] = str(e)
-            return results
+            self.sleep(self.rng.uniform(0.5, 2.0))  # Realistic encryption timing
+    
+    def _communicate(self, results):
+        self.simulate_network_communication()
+        results['network_connections'] = 3
+    
+    def summarize(self, results):
+        results['directories_created'] = len(os.listdir(self.test_dir))
         
-        finally:
-            self.is_running = False
+        print("\n🎯 RANSOMWARE SIMULATION COMPLETED")
+        print(f"📊 Files affected: {results['files_affected']}")
+        print(f"📂 Test directory: {self.test_dir}")
+        print(f"⏱️ Duration: {results['duration']:.1f} seconds")
+        print("\n⚠️ REMEMBER: This was a SAFE simulation for education!")
     
     def cleanup(self):
         """Clean up test environment"""
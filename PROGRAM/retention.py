@@ -0,0 +1,149 @@
+"""
+Retention Engine for MalSim Pro
+Deletes expired analysis sessions and their events, then reclaims disk space
+"""
+
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from db_migrations import SESSION_TABLES
+
+# Per-session tables cleared before the session row itself
+RETENTION_TABLES = SESSION_TABLES
+
+# PRAGMA auto_vacuum value of databases that support incremental_vacuum
+INCREMENTAL = 2
+
+
+class RetentionEngine:
+    """Background job enforcing database.retention_days
+
+    Expired sessions are removed a few at a time, each table in chunks of
+    `batch_size` rows per transaction with a short pause in between, so the
+    write lock is only ever held briefly. Freed pages are returned to the OS
+    with incremental vacuum, `vacuum_pages` at a time. A database created
+    before auto_vacuum=INCREMENTAL keeps its free pages for reuse until it is
+    converted once with `main.py --enable-incremental-vacuum`; this job never
+    runs the full VACUUM that conversion needs.
+    """
+
+    def __init__(self, db, retention_days: int = 30, batch_size: int = 500,
+                 interval: float = 3600.0, vacuum_pages: int = 256,
+                 pause: float = 0.01):
+        self.db = db
+        self.retention_days = retention_days
+        self.batch_size = batch_size
+        self.interval = interval
+        self.vacuum_pages = vacuum_pages
+        self.pause = pause
+
+        self.running = False
+        self.retention_thread = None
+        self._stop_event = threading.Event()
+        self._run_lock = threading.Lock()
+        self.last_report: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def from_config(cls, db, config: Dict[str, Any]) -> Optional['RetentionEngine']:
+        """Build an engine from the 'database' section of settings.json"""
+        db_config = config.get('database', {})
+        retention_days = db_config.get('retention_days')
+        if not retention_days:
+            return None
+
+        return cls(
+            db,
+            retention_days=retention_days,
+            interval=db_config.get('retention_interval_minutes', 60) * 60
+        )
+
+    def start(self):
+        """Run retention on a schedule in a background thread"""
+        if self.running:
+            return
+        self.running = True
+        self._stop_event.clear()
+        self.retention_thread = threading.Thread(target=self._retention_loop, name='malsim-retention')
+        self.retention_thread.daemon = True
+        self.retention_thread.start()
+
+        print(f"🧹 Retention enabled - keeping {self.retention_days} days of sessions")
+
+    def stop(self):
+        """Stop the scheduled job; an in-flight batch finishes first"""
+        self.running = False
+        self._stop_event.set()
+        if self.retention_thread:
+            self.retention_thread.join(timeout=10)
+
+    def _retention_loop(self):
+        while self.running:
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"❌ Retention run failed: {e}")
+            self._stop_event.wait(self.interval)
+
+    def run_once(self) -> Dict[str, Any]:
+        """Delete all expired sessions and vacuum; returns a report"""
+        with self._run_lock:
+            started = time.perf_counter()
+            before = self.db.get_storage_info()
+            report = {
+                'timestamp': datetime.now().isoformat(),
+                'retention_days': self.retention_days,
+                'sessions_deleted': 0,
+                'rows_deleted': {table: 0 for table in RETENTION_TABLES},
+                'incremental_vacuum': before['auto_vacuum'] == INCREMENTAL,
+                'pages_reclaimed': 0,
+                'bytes_reclaimed': 0,
+            }
+
+            while not self._stop_event.is_set():
+                expired = self.db.get_expired_session_ids(self.retention_days)
+                if not expired:
+                    break
+                for session_id in expired:
+                    if self._stop_event.is_set():
+                        break
+                    self._delete_session(session_id, report)
+
+            if report['incremental_vacuum'] and (report['sessions_deleted'] or before['freelist_count']):
+                report['pages_reclaimed'] = self._vacuum()
+
+            after = self.db.get_storage_info()
+            report['bytes_reclaimed'] = max(0, before['size_bytes'] - after['size_bytes'])
+            report['size_bytes'] = after['size_bytes']
+            report['duration_ms'] = (time.perf_counter() - started) * 1000
+
+            self.last_report = report
+            if report['sessions_deleted']:
+                total_rows = sum(report['rows_deleted'].values())
+                print(f"🧹 Retention removed {report['sessions_deleted']} sessions, "
+                      f"{total_rows} event rows, reclaimed {report['bytes_reclaimed']} bytes")
+            return report
+
+    def _delete_session(self, session_id: str, report: Dict[str, Any]):
+        """Delete one session's rows table by table, then the session itself"""
+        for table in RETENTION_TABLES:
+            while True:
+                deleted = self.db.delete_session_rows(table, session_id, self.batch_size)
+                report['rows_deleted'][table] += deleted
+                if deleted < self.batch_size:
+                    break
+                time.sleep(self.pause)  # let waiting writers in
+
+        report['sessions_deleted'] += self.db.delete_session_rows('sessions', session_id, 1)
+
+    def _vacuum(self) -> int:
+        """Release free pages in small steps; returns pages reclaimed"""
+        reclaimed = 0
+        while not self._stop_event.is_set():
+            freed = self.db.incremental_vacuum(self.vacuum_pages)
+            reclaimed += freed
+            if freed < self.vacuum_pages:
+                break
+            time.sleep(self.pause)
+        return reclaimed
@@ -0,0 +1,121 @@
+"""
+Event Ring Buffer for MalSim Pro
+Fixed-capacity in-memory event store for the monitors, with overflow spill
+"""
+
+import json
+import os
+import tempfile
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+
+class EventRingBuffer:
+    """Keeps the newest `capacity` events; older ones go to `spill`
+
+    Appends and evictions are O(1). When no spill target is configured, or
+    the spill raises, evicted events are counted as dropped.
+    """
+
+    def __init__(self, capacity: int, spill: Optional[Callable[[Dict[str, Any]], None]] = None):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self.spill = spill
+        self._events = deque()
+        self._lock = threading.Lock()
+
+        self.appended = 0
+        self.spilled = 0
+        self.dropped = 0
+
+    def append(self, event: Dict[str, Any]):
+        with self._lock:
+            evicted = self._events.popleft() if len(self._events) >= self.capacity else None
+            self._events.append(event)
+            self.appended += 1
+
+        if evicted is not None:
+            self._evict(evicted)
+
+    def _evict(self, event: Dict[str, Any]):
+        spilled = False
+        if self.spill is not None:
+            try:
+                self.spill(event)
+                spilled = True
+            except Exception:
+                pass
+
+        with self._lock:
+            if spilled:
+                self.spilled += 1
+            else:
+                self.dropped += 1
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Return the buffered events, oldest first"""
+        with self._lock:
+            return list(self._events)
+
+    def clear(self):
+        with self._lock:
+            self._events.clear()
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            'capacity': self.capacity,
+            'buffered': len(self._events),
+            'appended': self.appended,
+            'spilled': self.spilled,
+            'dropped': self.dropped,
+        }
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self.snapshot())
+
+
+class TempFileSpill:
+    """Append evicted events to a JSON-lines temp file"""
+
+    def __init__(self, prefix: str = 'malsim_events_', directory: Optional[str] = None):
+        fd, self.path = tempfile.mkstemp(prefix=prefix, suffix='.jsonl', dir=directory)
+        self._file = os.fdopen(fd, 'a', encoding='utf-8')
+        self._lock = threading.Lock()
+
+    def __call__(self, event: Dict[str, Any]):
+        line = json.dumps(event, default=str)
+        with self._lock:
+            self._file.write(line + '\n')
+
+    def read_events(self) -> Iterator[Dict[str, Any]]:
+        """Read back every spilled event"""
+        with self._lock:
+            self._file.flush()
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                yield json.loads(line)
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class DatabaseSpill:
+    """Hand evicted events to AnalysisDB as system events
+
+    With a batch writer started on the database these are queued, not
+    written inline, so spilling never blocks the monitor thread on SQLite.
+    """
+
+    def __init__(self, db, session_id: str, category: str):
+        self.db = db
+        self.session_id = session_id
+        self.category = category
+
+    def __call__(self, event: Dict[str, Any]):
+        self.db.save_system_event(self.session_id, event, category=self.category)
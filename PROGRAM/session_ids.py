@@ -0,0 +1,104 @@
+"""
+Session identifiers for MalSim Pro
+ULID-style ids: 48-bit millisecond timestamp + 80 random bits, Crockford base32
+
+Ids sort by creation time, so new sessions always land at the tail of the
+session_id index, and are unique across threads and processes.
+"""
+
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Optional
+
+CROCKFORD = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+RANDOM_BITS = 80
+RANDOM_MAX = (1 << RANDOM_BITS) - 1
+
+# session_YYYYmmdd_HHMMSS_<type>, as produced before ULID ids
+LEGACY_SESSION_ID = re.compile(r'^session_(\d{8}_\d{6})_(.+)$')
+SESSION_ID = re.compile(r'^session_([0-9A-HJKMNP-TV-Z]{26})_(.+)$')
+
+
+def _encode(value: int, length: int) -> str:
+    chars = []
+    for _ in range(length):
+        value, index = divmod(value, 32)
+        chars.append(CROCKFORD[index])
+    return ''.join(reversed(chars))
+
+
+class ULIDGenerator:
+    """Monotonic ULID generator
+
+    Within one millisecond the random part is incremented rather than redrawn,
+    so ids from the same process are strictly increasing. The random part is
+    redrawn after a fork so parent and child never continue the same sequence.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._last_ms = -1
+        self._last_random = 0
+        self._pid = os.getpid()
+
+    def new(self, timestamp_ms: Optional[int] = None) -> str:
+        """Return a new 26-character ULID"""
+        with self._lock:
+            now_ms = int(time.time() * 1000) if timestamp_ms is None else timestamp_ms
+            pid = os.getpid()
+
+            if timestamp_ms is None and pid == self._pid and now_ms <= self._last_ms:
+                # Same (or a backwards-stepped) millisecond: stay monotonic
+                now_ms = self._last_ms
+                random_part = self._last_random + 1
+                if random_part > RANDOM_MAX:
+                    now_ms += 1
+                    random_part = int.from_bytes(os.urandom(10), 'big')
+            else:
+                random_part = int.from_bytes(os.urandom(10), 'big')
+
+            if timestamp_ms is None:
+                self._last_ms = now_ms
+                self._last_random = random_part
+                self._pid = pid
+
+        return _encode(now_ms, 10) + _encode(random_part, 16)
+
+
+_generator = ULIDGenerator()
+
+
+def new_ulid(timestamp_ms: Optional[int] = None) -> str:
+    """Return a new ULID from the shared generator"""
+    return _generator.new(timestamp_ms)
+
+
+def new_session_id(malware_type: str, timestamp_ms: Optional[int] = None) -> str:
+    """Return a time-sortable session id such as session_01J9..._ransomware"""
+    return f"session_{new_ulid(timestamp_ms)}_{malware_type}"
+
+
+def ulid_timestamp(ulid: str) -> datetime:
+    """Return the creation time encoded in a ULID"""
+    value = 0
+    for char in ulid[:10]:
+        value = value * 32 + CROCKFORD.index(char)
+    return datetime.fromtimestamp(value / 1000)
+
+
+def is_legacy_session_id(session_id: str) -> bool:
+    """Check for the old session_YYYYmmdd_HHMMSS_<type> format"""
+    return LEGACY_SESSION_ID.match(session_id) is not None
+
+
+def convert_legacy_session_id(session_id: str) -> Optional[str]:
+    """Return a ULID session id carrying the legacy id's timestamp and type"""
+    match = LEGACY_SESSION_ID.match(session_id)
+    if not match:
+        return None
+
+    created = datetime.strptime(match.group(1), '%Y%m%d_%H%M%S')
+    return new_session_id(match.group(2), int(created.timestamp() * 1000))
@@ -0,0 +1,42 @@
+"""
+Simulation Seeds and Result Cache Keys for MalSim Pro
+A (type, config, seed, duration) run is deterministic, so its results can be reused
+"""
+
+import hashlib
+import json
+import random
+from typing import Any, Dict, Optional
+
+# Seeds are kept within SQLite's signed 64-bit INTEGER and JSON-safe ranges
+SEED_BITS = 32
+
+# Per-run config keys that do not change what a simulation does
+VOLATILE_CONFIG_KEYS = ('test_dir',)
+
+
+def new_seed() -> int:
+    """Fresh seed for a run that was not given one, so it can still be replayed"""
+    return random.SystemRandom().getrandbits(SEED_BITS)
+
+
+def resolve_seed(seed: Optional[Any], config: Optional[Dict[str, Any]] = None) -> int:
+    """Explicit seed, else config['seed'], else a fresh one"""
+    if seed is None and config:
+        seed = config.get('seed')
+    return new_seed() if seed is None else int(seed)
+
+
+def cache_key(sim_type: str, seed: int, duration: int,
+              config: Optional[Dict[str, Any]] = None) -> str:
+    """Stable key for the results of one deterministic run
+
+    The clock is deliberately not part of the key: it only changes how fast
+    the run is paced, not what it does. `duration` is hashed as an int, so a
+    JSON 300.0 and 300 share an entry.
+    """
+    config = {key: value for key, value in (config or {}).items()
+              if key not in VOLATILE_CONFIG_KEYS and key != 'seed'}
+    payload = json.dumps({'type': sim_type, 'seed': int(seed), 'duration': int(duration), 'config': config},
+                         sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
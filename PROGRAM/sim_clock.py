@@ -0,0 +1,128 @@
+"""
+Simulation Clocks for MalSim Pro
+Time source injected into the simulators: real time, scaled time, or instant virtual time
+"""
+
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+CLOCK_MODES = ('real', 'scaled', 'virtual')
+DEFAULT_MODE = 'real'
+DEFAULT_SCALE = 10.0
+
+
+class RealClock:
+    """Wall-clock time; sleep() really sleeps"""
+
+    mode = 'real'
+    scale = 1.0
+
+    def time(self) -> float:
+        return time.time()
+
+    def now(self) -> datetime:
+        return datetime.fromtimestamp(self.time())
+
+    def sleep(self, seconds: float, cancel: Optional[threading.Event] = None):
+        """Wait `seconds` of clock time; returns early once `cancel` is set"""
+        if seconds > 0:
+            self._wait(seconds, cancel)
+
+    def _wait(self, real_seconds: float, cancel: Optional[threading.Event]):
+        if cancel is not None:
+            cancel.wait(real_seconds)
+        else:
+            time.sleep(real_seconds)
+
+    def fork(self):
+        """Clock for a branch of the run that executes concurrently with others"""
+        return self
+
+    def join(self, branches):
+        """Bring this clock up to date with finished fork() branches"""
+
+    def describe(self) -> Dict[str, Any]:
+        return {'mode': self.mode, 'scale': self.scale}
+
+
+class ScaledClock(RealClock):
+    """Runs `scale` times faster than real time
+
+    Simulated time starts at the real time the clock was created and advances
+    `scale` seconds per real second, so sleep(s) waits s / scale real seconds.
+    """
+
+    mode = 'scaled'
+
+    def __init__(self, scale: float = DEFAULT_SCALE):
+        if scale <= 0:
+            raise ValueError("clock scale must be positive")
+        self.scale = scale
+        self._origin = time.time()
+        self._origin_monotonic = time.monotonic()
+
+    def time(self) -> float:
+        return self._origin + (time.monotonic() - self._origin_monotonic) * self.scale
+
+    def sleep(self, seconds: float, cancel: Optional[threading.Event] = None):
+        if seconds > 0:
+            self._wait(seconds / self.scale, cancel)
+
+
+class VirtualClock(RealClock):
+    """Instant virtual time: sleep() returns at once and only advances the clock
+
+    Starts at `start` (the current real time by default); time only moves
+    forward through sleep() and advance(), so a run's timeline is the same
+    however fast the host executes it. Concurrent parts of a run each sleep on
+    a fork() and are join()ed back, as real time would overlap them.
+    """
+
+    mode = 'virtual'
+    scale = None
+
+    def __init__(self, start: Optional[float] = None):
+        self._now = time.time() if start is None else start
+        self._lock = threading.Lock()
+
+    def time(self) -> float:
+        with self._lock:
+            return self._now
+
+    def sleep(self, seconds: float, cancel: Optional[threading.Event] = None):
+        if cancel is None or not cancel.is_set():
+            self.advance(seconds)
+
+    def advance(self, seconds: float):
+        if seconds > 0:
+            with self._lock:
+                self._now += seconds
+
+    def fork(self) -> 'VirtualClock':
+        """Independent timeline starting now, so concurrent branches do not add up"""
+        return VirtualClock(self.time())
+
+    def join(self, branches):
+        """Continue from the latest finished branch"""
+        latest = max((branch.time() for branch in branches), default=self.time())
+        self.advance(latest - self.time())
+
+
+def create_clock(mode: Optional[str] = DEFAULT_MODE, scale: Optional[float] = None):
+    """Build a simulation clock; `scale` only applies to 'scaled'"""
+    mode = mode or DEFAULT_MODE
+    if mode not in CLOCK_MODES:
+        raise ValueError(f"Unknown clock mode: {mode} (expected one of {', '.join(CLOCK_MODES)})")
+    if mode == 'scaled':
+        return ScaledClock(scale or DEFAULT_SCALE)
+    if mode == 'virtual':
+        return VirtualClock()
+    return RealClock()
+
+
+def clock_from_config(config: Optional[Dict[str, Any]]):
+    """Build a clock from the simulation section of settings.json"""
+    simulation = (config or {}).get('simulation', {})
+    return create_clock(simulation.get('clock', DEFAULT_MODE), simulation.get('clock_scale'))
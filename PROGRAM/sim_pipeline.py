@@ -0,0 +1,290 @@
+"""
+Simulation Pipeline for MalSim Pro
+Shared phase runner for the simulators: explicit phases, per-phase timings and cooperative cancellation
+"""
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
+
+from sim_cache import resolve_seed
+from sim_clock import clock_from_config
+
+
+class SimulationCancelled(Exception):
+    """Raised inside a phase once its simulation has been cancelled"""
+
+
+class CancellationToken(threading.Event):
+    """Set once to cancel a run; every simulator sleep waits on it
+
+    child() tokens are cancelled along with their parent but can also be
+    cancelled on their own, e.g. to stop one group of phases.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._children_lock = threading.Lock()
+        self._children: List['CancellationToken'] = []
+
+    def set(self):
+        with self._children_lock:
+            super().set()
+            children = list(self._children)
+        for child in children:
+            child.set()
+
+    def cancel(self):
+        self.set()
+
+    def child(self) -> 'CancellationToken':
+        token = CancellationToken()
+        with self._children_lock:
+            if self.is_set():
+                token.set()
+            else:
+                self._children.append(token)
+        return token
+
+    def detach(self, child: 'CancellationToken'):
+        """Stop propagating to a child that is no longer in use"""
+        with self._children_lock:
+            if child in self._children:
+                self._children.remove(child)
+
+    @property
+    def cancelled(self) -> bool:
+        return self.is_set()
+
+
+class Phase:
+    """One step of a simulation
+
+    `run` receives the results dict and updates it; `details` may be a
+    callable taking the results, for text known only once earlier phases have
+    run. `after` names the phases that must finish first; None means "after
+    the previous phase", so a plain list of phases runs in order. Phases whose
+    dependencies are met together run concurrently.
+    """
+
+    def __init__(self, name: str, run: Callable[[Dict[str, Any]], None], action: str,
+                 details: Union[str, Callable[[Dict[str, Any]], str]] = '',
+                 after: Optional[Sequence[str]] = None):
+        self.name = name
+        self.run = run
+        self.action = action
+        self.details = details
+        self.after = after
+
+
+class PhasedSimulator:
+    """Base class for simulators built from a list of Phases
+
+    Subclasses implement phases() and new_results(), and pace themselves with
+    self.sleep(); cancel() (or setting is_running = False) wakes any sleep at
+    once and ends the run with results['cancelled'] set. Each phase draws from
+    its own random.Random derived from the run's seed, and under a virtual
+    clock concurrent phases each get their own branch of simulated time, so
+    seeded runs stay reproducible whatever the thread interleaving.
+    """
+
+    sim_type = 'unknown'
+
+    def __init__(self, config=None, clock=None, seed=None):
+        self.config = config or {}
+        self._clock = clock or clock_from_config(self.config)  # Paces the run and stamps every event
+        self.seed = resolve_seed(seed, self.config)
+        self._rng = random.Random(self.seed)
+        self._branch = threading.local()
+        self.token = CancellationToken()
+        self._running = False
+        self.phase_timings: List[Dict[str, Any]] = []
+
+    @property
+    def clock(self):
+        return getattr(self._branch, 'clock', None) or self._clock
+
+    @property
+    def rng(self) -> random.Random:
+        """Random source of the phase running on this thread"""
+        return getattr(self._branch, 'rng', None) or self._rng
+
+    @property
+    def current_token(self) -> CancellationToken:
+        """Token of the phase running on this thread; a concurrent wave has its own"""
+        return getattr(self._branch, 'token', None) or self.token
+
+    @property
+    def is_running(self) -> bool:
+        return self._running and not self.current_token.cancelled
+
+    @is_running.setter
+    def is_running(self, value: bool):
+        # Kept for callers that stop a run by clearing is_running
+        if value:
+            self._running = True
+        else:
+            self.cancel()
+
+    def cancel(self):
+        self.token.cancel()
+
+    def check_cancelled(self):
+        if self.current_token.cancelled:
+            raise SimulationCancelled()
+
+    def sleep(self, seconds: float):
+        """Clock-paced wait that returns as soon as the run is cancelled"""
+        self.check_cancelled()
+        self.clock.sleep(seconds, self.current_token)
+        self.check_cancelled()
+
+    def phases(self) -> List[Phase]:
+        raise NotImplementedError
+
+    def new_results(self) -> Dict[str, Any]:
+        """Type-specific counters; start_time, events and timings are added by run_simulation"""
+        return {}
+
+    def summarize(self, results: Dict[str, Any]):
+        """Fill in final totals and print the summary of a completed run"""
+
+    def run_simulation(self, duration=300, token: Optional[CancellationToken] = None):
+        """Run every phase; concurrent where their dependencies allow
+
+        Pass the caller's `token` so a cancel issued before the run reaches
+        its first phase is not lost.
+        """
+        self.token = token or CancellationToken()
+        self._running = True
+        self.phase_timings = []
+        start_time = self._clock.now()
+        wall_start = time.monotonic()
+        results = {
+            'type': self.sim_type,
+            'start_time': start_time.isoformat(),
+            'clock': self._clock.describe(),
+            'seed': self.seed,
+            'events': [],
+        }
+        results.update(self.new_results())
+
+        completed = False
+        try:
+            for wave in self._waves(self.phases()):
+                self.check_cancelled()
+                for phase in wave:
+                    results['events'].append({
+                        'time': self._clock.now().isoformat(),
+                        'phase': phase.name,
+                        'action': phase.action,
+                        'details': phase.details(results) if callable(phase.details) else phase.details
+                    })
+                if len(wave) == 1:
+                    self._run_phase(wave[0], results, self._clock)
+                else:
+                    self._run_concurrently(wave, results)
+            completed = True
+
+        except SimulationCancelled:
+            results['cancelled'] = True
+            print(f"🛑 {self.sim_type.capitalize()} simulation cancelled")
+
+        except Exception as e:
+            print(f"❌ Simulation error: {e}")
+            results['error'] = str(e)
+
+        finally:
+            self._running = False
+            results['end_time'] = self._clock.now().isoformat()
+            results['duration'] = (self._clock.now() - start_time).total_seconds()
+            results['wall_duration'] = time.monotonic() - wall_start
+            results['phase_timings'] = sorted(self.phase_timings, key=lambda timing: timing['start'])
+
+        if completed:
+            self.summarize(results)
+        return results
+
+    def _waves(self, phases: List[Phase]) -> List[List[Phase]]:
+        """Group phases into waves; each wave only depends on earlier ones"""
+        names = [phase.name for phase in phases]
+        depends = {}
+        for i, phase in enumerate(phases):
+            if phase.after is None:
+                depends[phase.name] = set(names[i - 1:i])
+            else:
+                unknown = set(phase.after) - set(names)
+                if unknown:
+                    raise ValueError(f"Phase {phase.name} depends on unknown phase(s): {', '.join(sorted(unknown))}")
+                depends[phase.name] = set(phase.after)
+
+        waves, done, remaining = [], set(), list(phases)
+        while remaining:
+            wave = [phase for phase in remaining if depends[phase.name] <= done]
+            if not wave:
+                raise ValueError("Phase dependencies form a cycle")
+            waves.append(wave)
+            done.update(phase.name for phase in wave)
+            remaining = [phase for phase in remaining if phase.name not in done]
+        return waves
+
+    def _run_phase(self, phase: Phase, results: Dict[str, Any], clock,
+                   token: Optional[CancellationToken] = None):
+        self._branch.clock = clock
+        self._branch.token = token
+        self._branch.rng = random.Random(f'{self.seed}:{phase.name}')
+        started = clock.now()
+        wall_start = time.perf_counter()
+        status = 'completed'
+        try:
+            phase.run(results)
+        except SimulationCancelled:
+            status = 'cancelled'
+            raise
+        except Exception:
+            status = 'failed'
+            raise
+        finally:
+            self.phase_timings.append({
+                'phase': phase.name,
+                'start': started.isoformat(),
+                'duration': (clock.now() - started).total_seconds(),
+                'wall_ms': (time.perf_counter() - wall_start) * 1000,
+                'status': status,
+            })
+            self._branch.clock = None
+            self._branch.rng = None
+            self._branch.token = None
+
+    def _run_concurrently(self, wave: List[Phase], results: Dict[str, Any]):
+        # Cancelled with the run, or on its own by a failing phase; the caller's token stays untouched
+        wave_token = self.token.child()
+
+        def run(phase, branch):
+            try:
+                self._run_phase(phase, results, branch, wave_token)
+            except SimulationCancelled:
+                raise
+            except Exception:
+                # The run fails anyway; wake the sibling phases instead of letting them finish
+                wave_token.cancel()
+                raise
+
+        branches = [self._clock.fork() for _ in wave]
+        try:
+            with ThreadPoolExecutor(max_workers=len(wave), thread_name_prefix=f'malsim-{self.sim_type}') as pool:
+                futures = [pool.submit(run, phase, branch) for phase, branch in zip(wave, branches)]
+                errors = [future.exception() for future in futures]
+        finally:
+            self.token.detach(wave_token)
+        self._clock.join(branches)
+
+        # A failure takes precedence over the cancellation it may have caused elsewhere
+        for error in errors:
+            if error is not None and not isinstance(error, SimulationCancelled):
+                raise error
+        for error in errors:
+            if error is not None:
+                raise error
@@ -0,0 +1,146 @@
+"""
+Simulation Store for MalSim Pro
+The simulations table behind the dashboard, the batch runner and the result cache
+"""
+
+import json
+from datetime import datetime
+
+from db_pool import get_pool
+from pagination import build_page_query
+
+SIMULATION_FIELDS = ('id', 'type', 'status', 'start_time', 'end_time', 'duration', 'seed', 'results')
+
+# Columns shown in the dashboard table; everything except the results blob
+LIST_FIELDS = ('id', 'type', 'status', 'start_time', 'end_time', 'duration', 'seed')
+
+
+class SimpleDB:
+    def __init__(self, db_path="malsim_analysis.db"):
+        self.db_path = db_path
+        self.pool = get_pool(self.db_path)
+        self.init_db()
+    
+    def init_db(self):
+        """Initialize SQLite database"""
+        with self.pool.transaction() as cursor:
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS simulations (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    type TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    start_time TEXT NOT NULL,
+                    end_time TEXT,
+                    duration INTEGER,
+                    results TEXT,
+                    seed INTEGER,
+                    cache_key TEXT
+                )
+            ''')
+            
+            # Databases created before runs were seeded
+            columns = {row[1] for row in cursor.execute("PRAGMA table_info(simulations)")}
+            for column, column_type in (('seed', 'INTEGER'), ('cache_key', 'TEXT')):
+                if column not in columns:
+                    cursor.execute(f"ALTER TABLE simulations ADD COLUMN {column} {column_type}")
+            
+            # Keyset pagination indexes for get_simulations (id is the rowid)
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_simulations_start_time ON simulations (start_time)"
+            )
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_simulations_type_start_time ON simulations (type, start_time)"
+            )
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_simulations_cache_key ON simulations (cache_key)"
+            )
+    
+    def add_simulation(self, sim_type, status="running", seed=None, cache_key=None):
+        """Add new simulation record"""
+        with self.pool.transaction() as cursor:
+            cursor.execute(
+                "INSERT INTO simulations (type, status, start_time, seed, cache_key) VALUES (?, ?, ?, ?, ?)",
+                (sim_type, status, datetime.now().isoformat(), seed, cache_key)
+            )
+            sim_id = cursor.lastrowid
+        
+        return sim_id
+    
+    def update_simulation(self, sim_id, status, results=None):
+        """Update simulation record"""
+        with self.pool.transaction() as cursor:
+            if results:
+                cursor.execute(
+                    "UPDATE simulations SET status=?, end_time=?, results=? WHERE id=?",
+                    (status, datetime.now().isoformat(), json.dumps(results), sim_id)
+                )
+            else:
+                cursor.execute(
+                    "UPDATE simulations SET status=?, end_time=? WHERE id=?",
+                    (status, datetime.now().isoformat(), sim_id)
+                )
+    
+    def get_simulations(self, limit=50, after=None, sim_type=None, status=None,
+                        since=None, until=None, fields=None):
+        """Get simulation records, newest first
+        
+        `after` is a (start_time, id) pair from the previous page's last row;
+        `since`/`until` bound start_time as ISO strings. `fields` limits the
+        columns returned; the results JSON is only read and decoded when
+        'results' is requested.
+        """
+        columns = self._projection(fields)
+        sql, params = build_page_query(
+            'simulations', ', '.join(columns), 'start_time', after=after,
+            filters=[('type', sim_type), ('status', status)],
+            since=since, until=until, limit=limit
+        )
+        with self.pool.cursor() as cursor:
+            cursor.execute(sql, params)
+            results = cursor.fetchall()
+        
+        # Convert to dict format
+        simulations = []
+        for row in results:
+            simulation = dict(zip(columns, row))
+            if 'results' in simulation:
+                simulation['results'] = json.loads(simulation['results']) if simulation['results'] else {}
+            simulations.append(simulation)
+        
+        return simulations
+    
+    def _projection(self, fields):
+        """Validate requested fields; id and start_time are always included for paging"""
+        if not fields:
+            return list(SIMULATION_FIELDS)
+        
+        unknown = [field for field in fields if field not in SIMULATION_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown simulation field(s): {', '.join(unknown)}")
+        
+        return [field for field in SIMULATION_FIELDS
+                if field in fields or field in ('id', 'start_time')]
+    
+    def find_cached_results(self, cache_key):
+        """(id, results) of the latest completed run with this cache key, or None"""
+        with self.pool.cursor() as cursor:
+            cursor.execute(
+                "SELECT id, results FROM simulations WHERE cache_key = ? AND status = 'completed' "
+                "ORDER BY id DESC LIMIT 1",
+                (cache_key,)
+            )
+            row = cursor.fetchone()
+        
+        if row is None or not row[1]:
+            return None
+        return row[0], json.loads(row[1])
+    
+    def get_simulation_results(self, sim_id):
+        """Get the decoded results of one simulation, or None if it does not exist"""
+        with self.pool.cursor() as cursor:
+            cursor.execute("SELECT results FROM simulations WHERE id = ?", (sim_id,))
+            row = cursor.fetchone()
+        
+        if row is None:
+            return None
+        return json.loads(row[0]) if row[0] else {}
@@ -1 +1,171 @@
-# system_monitor.py - Created 2025-09-03 19:40:11.305181
+"""
+System Monitor for MalSim Pro
+Monitors system activities during malware simulations
+"""
+
+import time
+from datetime import datetime
+from typing import Dict, List, Any
+
+from monitor_stats import MonitorStats
+from proc_scanner import ProcessScope
+from process_sampler import SnapshotSampler, SystemSnapshot
+from ring_buffer import EventRingBuffer
+from timeseries import TimeSeriesRecorder
+
+# Keep only last 1000 events in memory; older ones go to the spill target
+MAX_EVENTS = 1000
+
+# Seconds between writes of closed time-series buckets to the database
+TIMESERIES_FLUSH_INTERVAL = 60
+
+class SystemMonitor:
+    def __init__(self, event_writer=None, sampler: SnapshotSampler = None, spill=None,
+                 db=None, session_id: str = None):
+        self.monitoring = False
+        self.spill = spill  # e.g. ring_buffer.DatabaseSpill or TempFileSpill
+        self.events = EventRingBuffer(MAX_EVENTS, spill=spill)
+        self.start_time = None
+        self.event_writer = event_writer  # BatchEventWriter flushed on stop
+        self.sampler = sampler or SnapshotSampler(interval=2)  # Monitor every 2 seconds
+        self.last_processes = set()
+        self.scope = None
+        self.db = db  # AnalysisDB the time series is saved to, see AnalysisDB.save_timeseries
+        self.session_id = session_id
+        self.timeseries = self._new_timeseries()  # Every resource sample
+        self.last_timeseries_flush = 0.0
+        self.stats = MonitorStats('system_monitor')
+
+    def start_monitoring(self, root_pid: int = None, watch_paths: List[str] = None,
+                         host_interval: float = None):
+        """Start system monitoring
+
+        With root_pid, the shared sampler only walks that process's subtree,
+        plus processes found using watch_paths (e.g. the simulation test
+        directory). host_interval adds a host-wide context sample every that
+        many seconds, which is also when watch_paths users are looked for.
+        """
+        self.monitoring = True
+        self.events = EventRingBuffer(MAX_EVENTS, spill=self.spill)
+        self.start_time = datetime.now()
+        self.last_processes = set()
+        self.timeseries = self._new_timeseries()
+        self.last_timeseries_flush = time.monotonic()
+        self.stats.reset()
+
+        if root_pid is not None:
+            self.scope = ProcessScope(root_pid, watch_paths or [], host_interval)
+            self.sampler.set_scope(self.scope)
+
+        self.sampler.subscribe(self._on_snapshot, needs=('processes', 'resources'))
+        self.sampler.start()
+
+        print("🔍 System monitoring started")
+
+    def stop_monitoring(self) -> List[Dict[str, Any]]:
+        """Stop monitoring and return collected events"""
+        self.monitoring = False
+
+        self.sampler.unsubscribe(self._on_snapshot)
+        self.sampler.stop()
+        if self.scope is not None:
+            if self.sampler.scope is self.scope:
+                self.sampler.set_scope(None)
+            self.scope = None
+        self.timeseries.close()
+        self._flush_timeseries()
+
+        # Make sure buffered events reach the database before reporting
+        if self.event_writer is not None:
+            self.event_writer.flush(timeout=10)
+
+        print(f"🛑 System monitoring stopped - Collected {len(self.events)} events")
+        return self.events.snapshot()
+
+    def _new_timeseries(self) -> TimeSeriesRecorder:
+        # Without a database there is nowhere to drain closed buckets to, so none are queued
+        if self._persists_timeseries():
+            return TimeSeriesRecorder()
+        return TimeSeriesRecorder(persisted=())
+
+    def _persists_timeseries(self) -> bool:
+        return self.db is not None and bool(self.session_id)
+
+    def _flush_timeseries(self):
+        """Hand closed rollup buckets to the database so they do not pile up in memory"""
+        self.last_timeseries_flush = time.monotonic()
+        if self._persists_timeseries():
+            try:
+                self.db.save_timeseries(self.session_id, self.timeseries)
+            except Exception as e:
+                self.stats.count_error(e)
+
+    def _on_snapshot(self, snapshot: SystemSnapshot):
+        """Process one shared snapshot from the sampler"""
+        if not self.monitoring:
+            return
+
+        with self.stats.sweep() as sweep:
+            sweep.items = len(snapshot.processes)
+            self._diff_snapshot(snapshot)
+
+    def _diff_snapshot(self, snapshot: SystemSnapshot):
+        """Log sampler errors, new processes and high resource usage"""
+        for error in snapshot.errors:
+            self.stats.count_error(error)
+            self._log_event({
+                'type': 'monitor_error',
+                'timestamp': snapshot.timestamp,
+                'error': error
+            })
+
+        # Monitor processes
+        current_processes = set(snapshot.processes)
+        for pid in current_processes - self.last_processes:
+            proc_info = snapshot.processes[pid]
+
+            # New process detected
+            self._log_event({
+                'type': 'process_created',
+                'timestamp': snapshot.timestamp,
+                'pid': pid,
+                'name': proc_info['name'],
+                'ppid': proc_info['ppid'],
+                'cmdline': ' '.join(proc_info['cmdline'] or []),
+                'create_time': proc_info['create_time']
+            })
+
+        # Monitor system resources
+        self._monitor_resources(snapshot.resources)
+
+        self.last_processes = current_processes
+
+    def _monitor_resources(self, resources: Dict[str, Any]):
+        """Monitor system resource usage"""
+        if not resources:
+            return  # Ignore resource monitoring errors
+
+        self.timeseries.record(time.time(), resources)
+        if time.monotonic() - self.last_timeseries_flush >= TIMESERIES_FLUSH_INTERVAL:
+            self._flush_timeseries()
+
+        # Log high resource usage
+        if resources['cpu_percent'] > 80:
+            self._log_event({
+                'type': 'high_cpu_usage',
+                'timestamp': datetime.now().isoformat(),
+                'cpu_percent': resources['cpu_percent']
+            })
+
+        if resources['memory_percent'] > 80:
+            self._log_event({
+                'type': 'high_memory_usage',
+                'timestamp': datetime.now().isoformat(),
+                'memory_percent': resources['memory_percent'],
+                'memory_available': resources['memory_available']
+            })
+
+    def _log_event(self, event: Dict[str, Any]):
+        """Log a monitoring event"""
+        self.events.append(event)
+        self.stats.count_event()
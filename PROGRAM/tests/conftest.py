@@ -0,0 +1,21 @@
+import os
+import sys
+
+import pytest
+
+# The PROGRAM modules import each other as top-level modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def web(tmp_path, monkeypatch):
+    """web_interface with both of its databases moved under tmp_path"""
+    monkeypatch.chdir(tmp_path)  # web_interface opens its SimpleDB in the working directory
+    import web_interface
+    from analysis_db import AnalysisDB
+    from simulation_db import SimpleDB
+
+    monkeypatch.setattr(web_interface, 'db', SimpleDB(str(tmp_path / 'simulations.db')))
+    monkeypatch.setattr(web_interface, 'analysis_db', AnalysisDB(str(tmp_path / 'analysis.db')))
+    monkeypatch.setattr(web_interface, 'current_simulations', {})
+    return web_interface
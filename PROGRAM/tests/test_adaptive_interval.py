@@ -0,0 +1,68 @@
+"""
+The sampler polls faster while the host is changing and backs off when it is quiet
+"""
+
+import pytest
+
+from process_sampler import AdaptiveInterval, SnapshotSampler
+
+
+class FakeScanner:
+    name = 'fake'
+
+    def __init__(self):
+        self.pids = [1]
+
+    def scan(self, pids=None):
+        return {pid: {'pid': pid} for pid in self.pids}
+
+
+def test_interval_shrinks_on_change_and_grows_when_idle():
+    interval = AdaptiveInterval(2.0, 0.5, 10.0)
+    assert interval.update(3) == 1.0
+    assert interval.update(1) == 0.5
+    assert interval.update(5) == 0.5  # Clamped to min_interval
+    assert interval.update(0) == 0.75
+    for _ in range(20):
+        interval.update(0)
+    assert interval.current == 10.0  # Clamped to max_interval
+
+
+def test_initial_interval_is_clamped_and_bounds_are_validated():
+    assert AdaptiveInterval(60, 1, 5).current == 5
+    with pytest.raises(ValueError):
+        AdaptiveInterval(1, 5, 1)
+    with pytest.raises(ValueError):
+        AdaptiveInterval(1, 0, 1)
+
+
+def test_sampler_adapts_to_process_churn():
+    sampler = SnapshotSampler(interval=2.0, min_interval=0.5, max_interval=8.0)
+    sampler.scanner = FakeScanner()
+    sampler.subscribe(lambda snapshot: None, needs=('processes',))
+
+    sampler.sample_once()  # First sweep has nothing to compare against
+    assert sampler.current_interval == 3.0
+    sampler.scanner.pids = [1, 2, 3]
+    snapshot = sampler.sample_once()
+    assert snapshot.changes == 2
+    assert sampler.current_interval == 1.5
+
+    history = sampler.get_interval_history()
+    assert [entry['changes'] for entry in history] == [0, 2]
+    assert history[0]['interval'] is None and history[1]['interval'] >= 0
+
+
+def test_fixed_interval_without_both_bounds():
+    sampler = SnapshotSampler(interval=2.0, min_interval=0.5)
+    sampler.scanner = FakeScanner()
+    sampler.sample_once()
+    assert sampler.scheduler is None
+    assert sampler.current_interval == 2.0
+
+
+def test_from_config_only_adapts_when_enabled():
+    monitoring = {'sample_interval': 2, 'min_interval': 0.5, 'max_interval': 6}
+    assert SnapshotSampler.from_config({'monitoring': monitoring}).scheduler is None
+    sampler = SnapshotSampler.from_config({'monitoring': dict(monitoring, adaptive_polling=True)})
+    assert (sampler.scheduler.min_interval, sampler.scheduler.max_interval) == (0.5, 6)
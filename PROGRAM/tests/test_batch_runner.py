@@ -0,0 +1,60 @@
+"""
+BatchRunner runs seeded simulations on a process pool and caches repeats
+"""
+
+import os
+
+import pytest
+
+from batch_runner import BatchRunner
+from simulation_db import SimpleDB
+
+
+@pytest.fixture
+def db(tmp_path):
+    return SimpleDB(str(tmp_path / 'simulations.db'))
+
+
+def runner(db, tmp_path, **kwargs):
+    return BatchRunner(db=db, workers=2, base_dir=str(tmp_path / 'runs'), seed=100, **kwargs)
+
+
+def test_batch_completes_every_run_and_cleans_up(db, tmp_path, capsys):
+    report = runner(db, tmp_path).run(['worm', 'trojan'], runs=4, duration=30)
+
+    assert (report['completed'], report['failed'], report['cached']) == (4, 0, 0)
+    simulations = db.get_simulations(limit=10)
+    assert sorted(s['type'] for s in simulations) == ['trojan', 'trojan', 'worm', 'worm']
+    assert {s['status'] for s in simulations} == {'completed'}
+    assert sorted(s['seed'] for s in simulations) == [100, 101, 102, 103]
+    for simulation in simulations:
+        assert 'work_dir' not in simulation['results']
+        assert simulation['results']['seed'] == simulation['seed']
+    assert not os.path.exists(report['base_dir'])
+
+
+def test_repeat_batch_is_served_from_cache(db, tmp_path, capsys):
+    runner(db, tmp_path).run(['worm'], runs=2, duration=30)
+    report = runner(db, tmp_path).run(['worm'], runs=2, duration=30)
+
+    assert (report['completed'], report['cached']) == (0, 2)
+    cached = [s for s in db.get_simulations(limit=10) if 'cached_from' in s['results']]
+    assert len(cached) == 2
+
+
+def test_different_config_is_not_served_from_cache(db, tmp_path, capsys):
+    runner(db, tmp_path).run(['worm'], runs=1, duration=30)
+    report = runner(db, tmp_path, config={'variant': 'b'}).run(['worm'], runs=1, duration=30)
+    assert (report['completed'], report['cached']) == (1, 0)
+
+
+def test_kept_work_dirs_are_reported(db, tmp_path, capsys):
+    runner(db, tmp_path, keep_dirs=True, use_cache=False).run(['worm'], runs=2, duration=30)
+
+    for simulation in db.get_simulations(limit=10):
+        assert os.path.isdir(simulation['results']['work_dir'])
+
+
+def test_unknown_simulation_type_is_rejected(db, tmp_path):
+    with pytest.raises(ValueError):
+        runner(db, tmp_path).run(['spyware'], runs=1)
@@ -0,0 +1,99 @@
+"""
+BatchEventWriter groups queued inserts into batched transactions
+"""
+
+import time
+
+import pytest
+
+from analysis_db import AnalysisDB
+from batch_writer import BatchEventWriter
+from db_pool import ConnectionPool
+
+INSERT = "INSERT INTO t (x) VALUES (?)"
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = ConnectionPool(str(tmp_path / 'events.db'))
+    with pool.transaction() as cursor:
+        cursor.execute("CREATE TABLE t (x INTEGER)")
+    yield pool
+    pool.close_all()
+
+
+def count(pool):
+    with pool.cursor() as cursor:
+        return cursor.execute("SELECT COUNT(*) FROM t").fetchone()[0]
+
+
+def test_events_are_written_in_batches_of_batch_size(pool):
+    writer = BatchEventWriter(pool, batch_size=10, flush_interval=60)
+    writer.start()
+    for i in range(25):
+        assert writer.submit(INSERT, (i,))
+    writer.stop()
+
+    stats = writer.get_stats()
+    assert count(pool) == 25
+    assert stats['events_written'] == 25
+    assert stats['batches_flushed'] == 3  # 10 + 10, and the remaining 5 on stop
+    assert stats['events_dropped'] == 0
+
+
+def test_flush_interval_writes_a_partial_batch(pool):
+    writer = BatchEventWriter(pool, batch_size=1000, flush_interval=0.05)
+    writer.start()
+    writer.submit(INSERT, (1,))
+    deadline = time.monotonic() + 2
+    while count(pool) == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert count(pool) == 1
+    writer.stop()
+
+
+def test_flush_waits_for_everything_queued_so_far(pool):
+    writer = BatchEventWriter(pool, batch_size=1000, flush_interval=60)
+    writer.start()
+    for i in range(100):
+        writer.submit(INSERT, (i,))
+    assert writer.flush(timeout=5)
+    assert count(pool) == 100
+    writer.stop()
+
+
+def test_full_queue_drops_after_the_put_timeout(pool):
+    writer = BatchEventWriter(pool, max_queue=2, put_timeout=0.01)  # Not started, so nothing drains
+    assert writer.submit(INSERT, (1,))
+    assert writer.submit(INSERT, (2,))
+    assert not writer.submit(INSERT, (3,))
+    assert writer.get_stats()['events_dropped'] == 1
+    assert writer.get_stats()['queue_depth'] == 2
+
+
+def test_failed_batch_is_counted_as_dropped(pool):
+    writer = BatchEventWriter(pool, batch_size=1000, flush_interval=60)
+    writer.start()
+    writer.submit(INSERT, (1,))
+    writer.submit("INSERT INTO missing (x) VALUES (?)", (2,))
+    writer.stop()
+
+    stats = writer.get_stats()
+    assert count(pool) == 0  # One transaction per batch
+    assert stats['flush_errors'] == 1
+    assert stats['events_dropped'] == 2
+
+
+def test_analysis_db_routes_events_through_the_writer(tmp_path):
+    db = AnalysisDB(str(tmp_path / 'analysis.db'))
+    session_id = db.save_analysis_session({'type': 'worm', 'timestamp': '2024-01-01T00:00:00'})
+    writer = db.start_batch_writer(batch_size=1000, flush_interval=60)
+    for i in range(20):
+        db.save_process_event(session_id, {'event_type': 'process_created', 'pid': i})
+    db.flush_events()
+    assert writer.get_stats()['batches_flushed'] == 1
+    db.stop_batch_writer()
+
+    with db.pool.cursor() as cursor:
+        assert cursor.execute("SELECT COUNT(*) FROM process_events").fetchone()[0] == 20
+    db.close()
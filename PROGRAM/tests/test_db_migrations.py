@@ -0,0 +1,77 @@
+"""
+Schema migrations bring any older database up to SCHEMA_VERSION exactly once
+"""
+
+import pytest
+
+from analysis_db import AnalysisDB
+from db_migrations import MIGRATIONS, SCHEMA_VERSION, get_schema_version, migrate
+from db_pool import ConnectionPool
+from session_ids import SESSION_ID
+
+LEGACY_ID = 'session_20240102_030405_worm'
+
+
+@pytest.fixture
+def v1_pool(tmp_path):
+    """A database as the pre-migration code left it: base tables, user_version 1"""
+    pool = ConnectionPool(str(tmp_path / 'old.db'))
+    with pool.transaction() as cursor:
+        MIGRATIONS[0][2](cursor)
+        cursor.execute("PRAGMA user_version = 1")
+        cursor.execute(
+            "INSERT INTO sessions (session_id, malware_type, start_time) VALUES (?, 'worm', '2024-01-02')",
+            (LEGACY_ID,)
+        )
+        cursor.executemany(
+            "INSERT INTO process_events (session_id, timestamp, event_type) VALUES (?, ?, 'process_created')",
+            [(LEGACY_ID, f'2024-01-02T03:04:0{i}') for i in range(3)]
+        )
+    yield pool
+    pool.close_all()
+
+
+def index_names(pool):
+    with pool.cursor() as cursor:
+        return {row[0] for row in cursor.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+
+
+def test_fresh_database_is_created_at_the_current_version(tmp_path):
+    pool = ConnectionPool(str(tmp_path / 'new.db'))
+    assert migrate(pool) == [version for version, _, _ in MIGRATIONS]
+    assert get_schema_version(pool) == SCHEMA_VERSION
+    assert migrate(pool) == []
+    pool.close_all()
+
+
+def test_upgrade_applies_only_the_missing_steps(v1_pool):
+    assert migrate(v1_pool) == list(range(2, SCHEMA_VERSION + 1))
+    assert get_schema_version(v1_pool) == SCHEMA_VERSION
+
+    indexes = index_names(v1_pool)
+    assert {'idx_process_events_session_ts', 'idx_sessions_created_at',
+            'idx_sessions_type_created_at'} <= indexes
+    assert 'idx_sessions_type' not in indexes  # Superseded in v4
+
+
+def test_session_event_query_uses_the_session_timestamp_index(v1_pool):
+    migrate(v1_pool)
+    with v1_pool.cursor() as cursor:
+        plan = ' '.join(row[-1] for row in cursor.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM process_events WHERE session_id = ? ORDER BY timestamp", ('x',)
+        ))
+    assert 'idx_process_events_session_ts' in plan
+    assert 'TEMP B-TREE' not in plan  # The index also provides the order
+
+
+def test_upgrade_seeds_counters_and_rewrites_legacy_ids(v1_pool):
+    migrate(v1_pool)
+    db = AnalysisDB(v1_pool.db_path)
+
+    session_id = db.resolve_session_id(LEGACY_ID)
+    assert SESSION_ID.match(session_id)
+    assert session_id.endswith('_worm')
+    assert len(db.get_session_events(session_id)['processes']) == 3
+    assert db.get_statistics()['total_process_events'] == 3
+    assert db.get_statistics()['sessions_by_type'] == {'worm': 1}
+    db.close()
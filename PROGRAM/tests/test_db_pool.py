@@ -0,0 +1,103 @@
+"""
+ConnectionPool keeps one tuned connection per thread and retries a busy write lock
+"""
+
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from db_pool import LOCK_RETRIES, ConnectionPool, get_pool
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = ConnectionPool(str(tmp_path / 'pool.db'), busy_timeout=0)
+    yield pool
+    pool.close_all()
+
+
+def in_thread(fn):
+    result = []
+    thread = threading.Thread(target=lambda: result.append(fn()))
+    thread.start()
+    thread.join()
+    return result[0]
+
+
+def test_connection_is_reused_per_thread_and_separate_across_threads(pool):
+    conn = pool.connection()
+    assert pool.connection() is conn
+    assert in_thread(pool.connection) is not conn
+
+
+def test_connections_are_opened_in_wal_mode(pool):
+    with pool.cursor() as cursor:
+        assert cursor.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+        assert cursor.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+        assert cursor.execute("PRAGMA auto_vacuum").fetchone()[0] == 2  # INCREMENTAL
+
+
+def test_wal_lets_readers_see_committed_rows_while_a_writer_holds_the_lock(pool):
+    with pool.transaction() as cursor:
+        cursor.execute("CREATE TABLE t (x INTEGER)")
+        cursor.execute("INSERT INTO t VALUES (1)")
+
+    with pool.transaction() as cursor:
+        cursor.execute("INSERT INTO t VALUES (2)")
+        # A reader on another thread is not blocked and sees the last commit
+        assert in_thread(lambda: pool.connection().execute("SELECT COUNT(*) FROM t").fetchone()[0]) == 1
+
+
+def test_transaction_rolls_back_on_error(pool):
+    with pool.transaction() as cursor:
+        cursor.execute("CREATE TABLE t (x INTEGER)")
+    with pytest.raises(RuntimeError):
+        with pool.transaction() as cursor:
+            cursor.execute("INSERT INTO t VALUES (1)")
+            raise RuntimeError
+    with pool.cursor() as cursor:
+        assert cursor.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+
+
+def test_begin_immediate_retries_until_the_lock_is_released(pool):
+    pool.connection()
+    blocker = sqlite3.connect(pool.db_path, timeout=0, check_same_thread=False)
+    blocker.execute("BEGIN IMMEDIATE")
+    threading.Timer(0.1, blocker.rollback).start()
+
+    with pool.transaction() as cursor:
+        cursor.execute("CREATE TABLE t (x INTEGER)")
+    blocker.close()
+
+
+def test_begin_immediate_gives_up_after_the_retry_budget(pool, monkeypatch):
+    monkeypatch.setattr(time, 'sleep', lambda delay: None)
+    real_connection = pool.connection()
+    blocker = sqlite3.connect(pool.db_path, timeout=0)
+    blocker.execute("BEGIN IMMEDIATE")
+    attempts = []
+
+    class CountingConnection:
+        def execute(self, sql):
+            attempts.append(sql)
+            return real_connection.execute(sql)
+
+    with pytest.raises(sqlite3.OperationalError, match='locked'):
+        pool._begin_immediate(CountingConnection())
+    assert len(attempts) == LOCK_RETRIES
+    blocker.rollback()
+    blocker.close()
+
+
+def test_close_all_closes_connections_from_other_threads(pool):
+    conn = in_thread(pool.connection)
+    pool.close_all()
+    with pytest.raises(sqlite3.ProgrammingError):
+        conn.execute("SELECT 1")
+
+
+def test_get_pool_shares_one_pool_per_file(tmp_path):
+    path = tmp_path / 'shared.db'
+    assert get_pool(str(path)) is get_pool(str(path))
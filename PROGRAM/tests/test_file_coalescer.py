@@ -0,0 +1,122 @@
+"""
+EventCoalescer merges per-path bursts and emits them in first-seen order
+"""
+
+import pytest
+
+import file_monitor
+from file_monitor import EventCoalescer, MAX_AGE_WINDOWS
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(file_monitor.time, 'monotonic', clock)
+    return clock
+
+
+@pytest.fixture
+def coalescer(clock):
+    emitted = []
+    coalescer = EventCoalescer(emitted.append, window=1.0)
+    coalescer.emitted = emitted
+    return coalescer
+
+
+def event(kind, path, **extra):
+    return dict({'type': f'file_{kind}', 'path': path, 'timestamp': f'{kind}@{path}'}, **extra)
+
+
+def test_burst_is_merged_into_one_record(coalescer, clock):
+    coalescer.add(event('created', '/t/a'))
+    for _ in range(12):
+        coalescer.add(event('modified', '/t/a'))
+    coalescer.add(event('deleted', '/t/a'))
+
+    clock.now += 1.0
+    coalescer.flush()
+
+    assert len(coalescer.emitted) == 1
+    record = coalescer.emitted[0]
+    assert record['type'] == 'file_activity'
+    assert record['operation'] == 'created+modified x12+deleted'
+    assert record['raw_count'] == 14
+    assert record['timestamp'] == record['first_timestamp'] == 'created@/t/a'
+    assert record['last_timestamp'] == 'deleted@/t/a'
+
+    stats = coalescer.get_stats()
+    assert (stats['raw_events'], stats['emitted_events'], stats['pending']) == (14, 1, 0)
+    assert stats['ratio'] == 14.0
+
+
+def test_single_event_keeps_its_own_type(coalescer, clock):
+    coalescer.add(event('created', '/t/a'))
+    clock.now += 1.0
+    coalescer.flush()
+
+    assert coalescer.emitted[0]['type'] == 'file_created'
+    assert coalescer.emitted[0]['operation'] == 'created'
+
+
+def test_interleaved_paths_are_emitted_in_first_seen_order(coalescer, clock):
+    # /t/b goes quiet first, but /t/a was seen first
+    coalescer.add(event('created', '/t/a'))
+    coalescer.add(event('created', '/t/b'))
+    clock.now += 0.5
+    coalescer.add(event('modified', '/t/b'))
+    coalescer.add(event('modified', '/t/a'))
+    clock.now += 0.2
+    coalescer.add(event('modified', '/t/a'))
+
+    clock.now += 1.0
+    coalescer.flush()
+
+    assert [record['path'] for record in coalescer.emitted] == ['/t/a', '/t/b']
+    assert [record['operation'] for record in coalescer.emitted] == ['created+modified x2', 'created+modified']
+
+
+def test_busy_path_does_not_hold_back_quiet_ones(coalescer, clock):
+    coalescer.add(event('created', '/t/busy'))
+    coalescer.add(event('created', '/t/quiet'))
+    for _ in range(3):
+        clock.now += 0.6
+        coalescer.add(event('modified', '/t/busy'))
+        coalescer.flush()
+
+    assert [record['path'] for record in coalescer.emitted] == ['/t/quiet']
+    assert coalescer.get_stats()['pending'] == 1
+
+
+def test_path_that_never_goes_quiet_is_emitted_after_max_age(coalescer, clock):
+    coalescer.add(event('created', '/t/a'))
+    for _ in range(MAX_AGE_WINDOWS * 2):
+        clock.now += 0.5
+        coalescer.add(event('modified', '/t/a'))
+        coalescer.flush()
+        if coalescer.emitted:
+            break
+
+    assert len(coalescer.emitted) == 1
+    assert clock.now - 1000.0 == pytest.approx(MAX_AGE_WINDOWS * coalescer.window)
+
+
+def test_move_closes_the_record_at_once(coalescer, clock):
+    coalescer.add(event('created', '/t/a'))
+    coalescer.add(event('moved', '/t/a', dest_path='/t/b'))
+    coalescer.add(event('modified', '/t/b'))
+    coalescer.flush()
+
+    assert len(coalescer.emitted) == 1
+    assert coalescer.emitted[0]['operation'] == 'created+moved'
+    assert coalescer.emitted[0]['dest_path'] == '/t/b'
+
+    coalescer.flush(force=True)
+    assert [record['path'] for record in coalescer.emitted] == ['/t/a', '/t/b']
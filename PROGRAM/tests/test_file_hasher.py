@@ -0,0 +1,90 @@
+"""
+FileHashPool attaches size and SHA-256 to file events off the observer thread
+"""
+
+import hashlib
+import os
+
+import pytest
+
+from file_hasher import SAMPLE_CHUNK, SAMPLE_CHUNKS, FileHashPool, hash_target, sha256_file
+
+
+@pytest.fixture
+def pool():
+    pool = FileHashPool(workers=2)
+    pool.start()
+    yield pool
+    pool.stop()
+
+
+def write(path, data):
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_events_get_size_and_hash(pool, tmp_path):
+    path = write(tmp_path / 'a.txt', b'hello')
+    event = {'type': 'file_created', 'path': path}
+
+    assert pool.submit(event)
+    assert pool.drain(5)
+    assert event['file_size'] == 5
+    assert event['file_hash'] == hashlib.sha256(b'hello').hexdigest()
+    assert event['hash_mode'] == 'full'
+
+
+def test_unchanged_files_are_read_once(pool, tmp_path):
+    path = write(tmp_path / 'a.txt', b'x' * 1000)
+    events = [{'type': 'file_modified', 'path': path} for _ in range(5)]
+    for event in events:
+        pool.submit(event)
+        pool.drain(5)  # One at a time, so later ones find the cached hash
+
+    assert {event['file_hash'] for event in events} == {hashlib.sha256(b'x' * 1000).hexdigest()}
+    stats = pool.get_stats()
+    assert stats['files_hashed'] == 1
+    assert stats['dedupe_hits'] == 4
+
+
+def test_only_events_that_leave_content_behind_are_hashed(tmp_path):
+    assert hash_target({'type': 'file_deleted', 'path': '/x'}) is None
+    assert hash_target({'type': 'file_created', 'path': '/x', 'is_directory': True}) is None
+    assert hash_target({'type': 'file_moved', 'path': '/x', 'dest_path': '/y'}) == '/y'
+    # Coalesced records: the last operation decides
+    assert hash_target({'operation': 'created+modified', 'path': '/x'}) == '/x'
+    assert hash_target({'operation': 'created+deleted', 'path': '/x'}) is None
+
+
+def test_files_gone_before_hashing_are_counted_missing(pool, tmp_path):
+    event = {'type': 'file_created', 'path': str(tmp_path / 'gone')}
+    pool.submit(event)
+    pool.drain(5)
+    assert 'file_hash' not in event
+    assert pool.get_stats()['missing'] == 1
+
+
+def test_full_queue_drops_without_blocking(tmp_path):
+    pool = FileHashPool(workers=1, max_queue=1)  # Not started, so nothing drains
+    path = write(tmp_path / 'a.txt', b'a')
+    assert pool.submit({'type': 'file_created', 'path': path})
+    assert not pool.submit({'type': 'file_created', 'path': path})
+    assert pool.get_stats()['dropped'] == 1
+
+
+def test_large_files_get_a_sampled_hash_that_still_sees_in_place_changes(tmp_path):
+    path = tmp_path / 'big.bin'
+    size = SAMPLE_CHUNK * SAMPLE_CHUNKS * 2
+    with open(path, 'wb') as f:
+        f.truncate(size)
+
+    before, mode, read = sha256_file(str(path), size, sample_threshold=0)
+    assert mode == 'sampled'
+    assert read == SAMPLE_CHUNK * SAMPLE_CHUNKS
+
+    with open(path, 'r+b') as f:
+        f.seek(size - 10)
+        f.write(b'encrypted!')
+    after, _, _ = sha256_file(str(path), size, sample_threshold=0)
+    assert after != before
+    assert os.path.getsize(path) == size
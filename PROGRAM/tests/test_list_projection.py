@@ -0,0 +1,58 @@
+"""
+List projection returns only the requested columns and skips the results blob
+"""
+
+import json
+
+import pytest
+
+from simulation_db import LIST_FIELDS, SIMULATION_FIELDS, SimpleDB
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = SimpleDB(str(tmp_path / 'simulations.db'))
+    sim_id = db.add_simulation('worm', seed=7)
+    db.update_simulation(sim_id, 'completed', {'type': 'worm', 'infected': list(range(1000))})
+    return db
+
+
+def test_default_listing_decodes_results(db):
+    [row] = db.get_simulations()
+    assert set(row) == set(SIMULATION_FIELDS)
+    assert row['results']['infected'][-1] == 999
+
+
+def test_projection_always_keeps_the_paging_columns(db):
+    [row] = db.get_simulations(fields=['status'])
+    assert set(row) == {'id', 'start_time', 'status'}
+
+
+def test_list_fields_never_read_the_results_column(db):
+    statements = []
+    db.pool.connection().set_trace_callback(statements.append)
+    [row] = db.get_simulations(fields=LIST_FIELDS)
+    db.pool.connection().set_trace_callback(None)
+
+    assert 'results' not in row
+    assert row['seed'] == 7
+    select = next(sql for sql in statements if sql.startswith('SELECT'))
+    assert 'results' not in select
+
+
+def test_unknown_fields_are_rejected(db):
+    with pytest.raises(ValueError, match='bogus'):
+        db.get_simulations(fields=['status', 'bogus'])
+
+
+def test_results_endpoint_serves_the_blob_lazily(web):
+    client = web.create_app().test_client()
+    sim_id = web.db.add_simulation('worm')
+    web.db.update_simulation(sim_id, 'completed', {'type': 'worm', 'score': 3})
+
+    [row] = client.get('/api/simulations?fields=id,type,status').get_json()
+    assert 'results' not in row
+    assert client.get(f'/api/simulations/{sim_id}/results').get_json() == {'type': 'worm', 'score': 3}
+    assert client.get('/api/simulations/999/results').status_code == 404
+    assert client.get('/api/simulations?fields=results,nope').status_code == 400
+    assert json.loads(client.get('/api/simulations').data)[0]['results']['score'] == 3
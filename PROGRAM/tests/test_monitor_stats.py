@@ -0,0 +1,85 @@
+"""
+Monitors account for their own cost, and the sampler stays within its CPU budget
+"""
+
+import gc
+from collections import namedtuple
+
+import pytest
+
+import monitor_stats
+from monitor_stats import MonitorStats
+from network_monitor import NetworkMonitor
+from process_sampler import SnapshotSampler, SystemSnapshot
+
+Addr = namedtuple('Addr', 'ip port')
+Conn = namedtuple('Conn', 'laddr raddr status pid')
+
+
+def test_sweeps_events_and_errors_are_counted():
+    stats = MonitorStats('test_monitor')
+    for items in (3, 5):
+        with stats.sweep() as sweep:
+            sweep.items = items
+    stats.count_event()
+    stats.count_error(OSError('denied'))
+
+    result = stats.get_stats()
+    assert result['sweeps'] == 2
+    assert result['items_scanned'] == 8
+    assert result['events_emitted'] == 1
+    assert (result['errors'], result['last_error']) == (1, 'denied')
+    assert result['max_sweep_ms'] >= result['avg_sweep_ms'] >= 0
+
+
+def test_a_failing_sweep_is_still_timed():
+    stats = MonitorStats('test_monitor')
+    with pytest.raises(ValueError):
+        with stats.sweep():
+            raise ValueError
+    assert stats.sweeps == 1
+
+
+def test_registry_only_lists_live_objects():
+    stats = MonitorStats('short_lived')
+    key = stats.key
+    assert monitor_stats.collect()[key]['monitor'] == 'short_lived'
+    del stats
+    gc.collect()
+    assert key not in monitor_stats.collect()
+
+
+def test_network_monitor_counts_sweeps_events_and_snapshot_errors():
+    monitor = NetworkMonitor()
+    monitor.monitoring = True
+    snapshot = SystemSnapshot()
+    snapshot.connections = [Conn(Addr('127.0.0.1', 8080), None, 'LISTEN', 1),
+                            Conn(Addr('10.0.0.2', 5000), Addr('10.0.0.9', 443), 'TIME_WAIT', 2)]
+    monitor._on_snapshot(snapshot)
+
+    failed = SystemSnapshot()
+    failed.errors = ['connections: permission denied']
+    monitor._on_snapshot(failed)
+
+    stats = monitor.stats.get_stats()
+    assert (stats['sweeps'], stats['items_scanned'], stats['events_emitted']) == (1, 2, 1)
+    assert stats['last_error'] == 'connections: permission denied'
+
+
+def test_cpu_budget_stretches_the_wait_between_sweeps():
+    sampler = SnapshotSampler(interval=1.0, cpu_budget=5)
+    sampler.cpu_cost = 0.01  # 10ms per tick fits in 5% of a 1s interval
+    assert sampler.next_wait() == 1.0
+    sampler.cpu_cost = 0.2  # 200ms per tick needs 4s between ticks to stay at 5%
+    assert sampler.next_wait() == pytest.approx(4.0)
+    assert sampler.get_stats()['throttled'] == 1
+
+    with pytest.raises(ValueError):
+        SnapshotSampler(cpu_budget=0)
+
+
+def test_metrics_endpoint_reports_registered_monitors(web):
+    monitor = NetworkMonitor()
+    metrics = web.create_app().test_client().get('/api/monitoring/metrics').get_json()
+    assert metrics[monitor.stats.key]['monitor'] == 'network_monitor'
+    assert any(key.startswith('sampler-') and 'ticks' in value for key, value in metrics.items())
@@ -0,0 +1,49 @@
+"""
+Session events stream as NDJSON, merged across tables in timestamp order
+"""
+
+import json
+
+import pytest
+
+
+@pytest.fixture
+def session(web):
+    adb = web.analysis_db
+    session_id = adb.save_analysis_session({'type': 'worm', 'timestamp': '2024-01-01T00:00:00'})
+    for i in range(300):
+        timestamp = f'2024-01-01T00:{i // 60:02d}:{i % 60:02d}'
+        if i % 3 == 0:
+            adb.save_process_event(session_id, {'event_type': 'process_created', 'pid': i, 'timestamp': timestamp})
+        elif i % 3 == 1:
+            adb.save_file_event(session_id, {'event_type': 'file_created', 'path': f'/tmp/{i}', 'timestamp': timestamp})
+        else:
+            adb.save_network_event(session_id, {'event_type': 'connection_established', 'timestamp': timestamp})
+    return session_id
+
+
+def test_iter_session_events_merges_tables_in_timestamp_order(web, session):
+    events = list(web.analysis_db.iter_session_events(session))
+    timestamps = [event['timestamp'] for event in events]
+
+    assert len(events) == 300
+    assert timestamps == sorted(timestamps)
+    assert [event['category'] for event in events[:3]] == ['processes', 'files', 'network']
+
+
+def test_export_streams_one_json_object_per_line(web, session):
+    client = web.create_app().test_client()
+    response = client.get(f'/api/sessions/{session}/events.ndjson')
+
+    assert response.mimetype == 'application/x-ndjson'
+    assert response.is_streamed
+    lines = response.get_data(as_text=True).splitlines()
+    events = [json.loads(line) for line in lines]
+    assert len(events) == 300
+    assert [event['timestamp'] for event in events] == sorted(event['timestamp'] for event in events)
+    assert events[1]['file_path'] == '/tmp/1'
+
+
+def test_export_of_an_unknown_session_is_404(web):
+    client = web.create_app().test_client()
+    assert client.get('/api/sessions/session_missing_worm/events.ndjson').status_code == 404
@@ -0,0 +1,139 @@
+"""
+ProcNetScanner parsing and inode-to-pid caching against a fake /proc tree
+"""
+
+import os
+import socket
+
+import psutil
+import pytest
+
+from net_scanner import ProcNetScanner, decode_address
+
+HEADER = '  sl  local_address rem_address   st tx_queue rx_queue tr tm->when retrnsmt   uid  timeout inode\n'
+
+
+class FakeProc:
+    """Minimal /proc with net/tcp and per-pid fd symlinks"""
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(os.path.join(root, 'net'))
+        self.sockets = []
+
+    def add_socket(self, local, remote, state, inode):
+        self.sockets.append((local, remote, state, inode))
+        self._write()
+
+    def remove_socket(self, inode):
+        self.sockets = [row for row in self.sockets if row[3] != inode]
+        self._write()
+
+    def _write(self):
+        with open(os.path.join(self.root, 'net', 'tcp'), 'w') as f:
+            f.write(HEADER)
+            for i, (local, remote, state, inode) in enumerate(self.sockets):
+                f.write(f'   {i}: {local} {remote} {state} 00000000:00000000 00:00000000 00000000  '
+                        f'1000        0 {inode} 1 0000000000000000 20 4 30 10 -1\n')
+
+    def add_process(self, pid, *inodes):
+        fd_dir = os.path.join(self.root, str(pid), 'fd')
+        os.makedirs(fd_dir, exist_ok=True)
+        for fd, inode in enumerate(inodes, start=3):
+            link = os.path.join(fd_dir, str(fd))
+            if not os.path.lexists(link):
+                os.symlink(f'socket:[{inode}]', link)
+
+
+@pytest.fixture
+def proc(tmp_path):
+    return FakeProc(str(tmp_path / 'proc'))
+
+
+def test_decode_ipv4_address():
+    assert decode_address('0100007F:0035', socket.AF_INET) == ('127.0.0.1', 53)
+    assert decode_address('0101A8C0:1F90', socket.AF_INET) == ('192.168.1.1', 8080)
+
+
+def test_decode_ipv6_address():
+    loopback = '00000000000000000000000001000000:01BB'
+    assert decode_address(loopback, socket.AF_INET6) == ('::1', 443)
+
+
+def test_scan_parses_state_addresses_and_owner(proc):
+    proc.add_socket('0100007F:1F90', '00000000:0000', '0A', 111)
+    proc.add_socket('0100007F:C350', '0100007F:1F90', '01', 222)
+    proc.add_process(42, 111, 222)
+
+    scanner = ProcNetScanner(proc.root)
+    connections = sorted(scanner.scan(), key=lambda conn: conn.laddr.port)
+
+    listen, established = connections
+    assert listen.status == psutil.CONN_LISTEN
+    assert listen.laddr == ('127.0.0.1', 8080)
+    assert listen.raddr == ()
+    assert established.status == psutil.CONN_ESTABLISHED
+    assert established.raddr == ('127.0.0.1', 8080)
+    assert {conn.pid for conn in connections} == {42}
+    assert {conn.fd for conn in connections} == {3, 4}
+
+
+def test_known_pids_are_not_reread_every_scan(proc):
+    proc.add_socket('0100007F:1F90', '00000000:0000', '0A', 111)
+    proc.add_process(42, 111)
+    scanner = ProcNetScanner(proc.root)
+
+    scanner.scan()
+    reads = scanner.fd_dirs_read
+    for _ in range(5):
+        scanner.scan()
+    assert scanner.fd_dirs_read == reads
+
+
+def test_unowned_socket_is_not_chased_when_new_pids_appear(proc):
+    proc.add_process(42)
+    proc.add_socket('0100007F:1F90', '00000000:0000', '0A', 999)  # Owned by nobody we can see
+    scanner = ProcNetScanner(proc.root)
+
+    scanner.scan()
+    assert scanner.get_stats()['unresolved_sockets'] == 1
+
+    proc.add_process(43)
+    reads = scanner.fd_dirs_read
+    scanner.scan()
+    # Only the new pid's fd table is read; pid 42 is not walked again for inode 999
+    assert scanner.fd_dirs_read == reads + 1
+    assert scanner.get_stats()['unresolved_sockets'] == 1
+
+
+def test_unresolved_inode_expires_with_its_socket(proc):
+    proc.add_process(42)
+    proc.add_socket('0100007F:1F90', '00000000:0000', '0A', 999)
+    scanner = ProcNetScanner(proc.root)
+    scanner.scan()
+
+    proc.remove_socket(999)
+    scanner.scan()
+    assert scanner.get_stats()['unresolved_sockets'] == 0
+
+
+def test_new_socket_of_known_pid_is_resolved(proc):
+    proc.add_socket('0100007F:1F90', '00000000:0000', '0A', 111)
+    proc.add_process(42, 111)
+    scanner = ProcNetScanner(proc.root)
+    scanner.scan()
+
+    proc.add_process(42, 111, 333)  # fd 3 already exists, fd 4 is the new socket
+    proc.add_socket('0100007F:1F91', '00000000:0000', '0A', 333)
+    connections = scanner.scan(pids=[42])
+    assert {conn.laddr.port for conn in connections} == {8080, 8081}
+
+
+def test_scope_filters_other_pids(proc):
+    proc.add_socket('0100007F:1F90', '00000000:0000', '0A', 111)
+    proc.add_socket('0100007F:1F91', '00000000:0000', '0A', 222)
+    proc.add_process(42, 111)
+    proc.add_process(43, 222)
+
+    connections = ProcNetScanner(proc.root).scan(pids=[43])
+    assert [(conn.pid, conn.laddr.port) for conn in connections] == [(43, 8081)]
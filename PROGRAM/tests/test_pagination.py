@@ -0,0 +1,104 @@
+"""
+Keyset pagination walks every row exactly once, newest first
+"""
+
+import pytest
+
+from analysis_db import AnalysisDB
+from pagination import MAX_PAGE_SIZE, build_page_query, decode_cursor, encode_cursor
+from simulation_db import SimpleDB
+
+# Several rows share each start_time, so pages must break ties on id
+START_TIMES = ['2024-01-0%dT00:00:00' % (i // 3 + 1) for i in range(17)]
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = SimpleDB(str(tmp_path / 'simulations.db'))
+    for i, start_time in enumerate(START_TIMES):
+        sim_id = db.add_simulation('worm' if i % 2 else 'trojan', status='completed')
+        with db.pool.transaction() as cursor:
+            cursor.execute("UPDATE simulations SET start_time = ? WHERE id = ?", (start_time, sim_id))
+    return db
+
+
+def walk(db, limit, **filters):
+    pages, after = [], None
+    while True:
+        page = db.get_simulations(limit=limit, after=after, fields=['id'], **filters)
+        if not page:
+            return pages
+        pages.append([row['id'] for row in page])
+        after = (page[-1]['start_time'], page[-1]['id'])
+
+
+@pytest.mark.parametrize('limit', [1, 2, 3, 4, 50])
+def test_pages_cover_every_row_once_across_tied_sort_values(db, limit):
+    ids = [sim_id for page in walk(db, limit) for sim_id in page]
+    expected = [row['id'] for row in db.get_simulations(limit=100, fields=['id'])]
+
+    assert ids == expected
+    assert len(set(ids)) == len(START_TIMES)
+    assert all(len(page) <= limit for page in walk(db, limit))
+
+
+def test_cursor_excludes_the_boundary_row_and_keeps_its_tied_neighbours(db):
+    # Rows 4, 5 and 6 (ids) all start on 2024-01-02
+    page = db.get_simulations(limit=10, after=('2024-01-02T00:00:00', 5), fields=['id'])
+    ids = [row['id'] for row in page]
+    assert ids[0] == 4  # Same start_time, smaller id
+    assert 5 not in ids and 6 not in ids
+
+
+def test_filters_and_time_bounds_combine_with_the_cursor(db):
+    ids = [sim_id for page in walk(db, 2, sim_type='worm', since='2024-01-02', until='2024-01-05')
+           for sim_id in page]
+    rows = db.get_simulations(limit=100, fields=['id', 'type'])
+    expected = [row['id'] for row in rows
+                if row['type'] == 'worm' and '2024-01-02' <= row['start_time'] < '2024-01-05']
+    assert ids == expected
+
+
+def test_query_orders_by_sort_column_then_id_and_clamps_the_limit():
+    sql, params = build_page_query('t', '*', 'created_at', after=('2024', 7), limit=10 ** 6)
+    assert '(created_at, id) < (?, ?)' in sql
+    assert sql.endswith('ORDER BY created_at DESC, id DESC LIMIT ?')
+    assert params == ['2024', 7, MAX_PAGE_SIZE]
+
+
+def test_cursor_round_trips_values_containing_commas():
+    assert decode_cursor(encode_cursor('a,b', 12)) == ('a,b', 12)
+    for bad in ('', '12', ',12', 'x,y'):
+        with pytest.raises(ValueError):
+            decode_cursor(bad)
+
+
+def test_session_listing_pages_on_created_at(tmp_path):
+    adb = AnalysisDB(str(tmp_path / 'analysis.db'))
+    for _ in range(5):
+        adb.save_analysis_session({'type': 'worm', 'timestamp': '2024-01-01T00:00:00'})
+
+    seen, after = [], None
+    while True:
+        page = adb.get_sessions(limit=2, after=after)
+        if not page:
+            break
+        seen.extend(row['id'] for row in page)
+        after = (page[-1]['created_at'], page[-1]['id'])
+    assert seen == [5, 4, 3, 2, 1]  # All created within the same second
+    adb.close()
+
+
+def test_api_returns_the_next_cursor_header(web):
+    client = web.create_app().test_client()
+    for _ in range(3):
+        web.db.add_simulation('worm')
+
+    first = client.get('/api/simulations?limit=2')
+    cursor = first.headers['X-Next-Cursor']
+    second = client.get('/api/simulations', query_string={'limit': 2, 'after': cursor})
+
+    ids = [row['id'] for row in first.get_json() + second.get_json()]
+    assert sorted(ids, reverse=True) == ids and len(set(ids)) == 3
+    assert 'X-Next-Cursor' not in second.headers
+    assert client.get('/api/simulations?after=garbage').status_code == 400
@@ -0,0 +1,106 @@
+"""
+ProcfsScanner against a fake /proc tree
+"""
+
+import os
+
+import pytest
+
+import proc_scanner
+from proc_scanner import ProcfsScanner, list_pids
+
+BOOT_TIME = 1_700_000_000
+
+
+class FakeProc:
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root)
+        with open(os.path.join(root, 'stat'), 'w') as f:
+            f.write(f'cpu  1 2 3 4\nbtime {BOOT_TIME}\n')
+        with open(os.path.join(root, 'meminfo'), 'w') as f:
+            f.write('MemTotal:        1024000 kB\n')
+
+    def add(self, pid, comm, ppid=1, cmdline=(), utime=0, stime=0, start_ticks=100, rss_pages=10):
+        base = os.path.join(self.root, str(pid))
+        os.makedirs(base, exist_ok=True)
+        # Fields after "(comm)": state ppid pgrp session tty tpgid flags minflt cminflt majflt cmajflt
+        # utime stime cutime cstime priority nice threads itrealvalue starttime vsize rss
+        rest = ['S', ppid, pid, pid, 0, -1, 0, 0, 0, 0, 0, utime, stime, 0, 0, 20, 0, 1, 0,
+                start_ticks, 0, rss_pages]
+        with open(os.path.join(base, 'stat'), 'w') as f:
+            f.write(f"{pid} ({comm}) {' '.join(str(field) for field in rest)}\n")
+        with open(os.path.join(base, 'cmdline'), 'wb') as f:
+            f.write(b''.join(arg.encode() + b'\0' for arg in cmdline))
+
+
+@pytest.fixture
+def proc(tmp_path):
+    return FakeProc(str(tmp_path / 'proc'))
+
+
+def test_scan_reads_stat_and_cmdline(proc):
+    proc.add(42, 'python3', ppid=7, cmdline=['python3', '-m', 'http.server'], start_ticks=500, rss_pages=25)
+    scanner = ProcfsScanner(proc.root)
+
+    info = scanner.scan()[42]
+    assert info['name'] == 'python3'
+    assert info['ppid'] == 7
+    assert info['cmdline'] == ['python3', '-m', 'http.server']
+    assert info['create_time'] == pytest.approx(BOOT_TIME + 500 / scanner.clock_ticks)
+    assert info['memory_percent'] == pytest.approx(25 * scanner.page_size / (1024000 * 1024) * 100)
+    assert list_pids(proc.root) == [42]
+
+
+def test_comm_with_spaces_and_parentheses(proc):
+    proc.add(42, 'odd (name) x')
+    assert ProcfsScanner(proc.root).scan()[42]['name'] == 'odd (name) x'
+
+
+def test_truncated_comm_is_recovered_from_cmdline(proc):
+    proc.add(42, 'a_very_long_pro', cmdline=['/usr/bin/a_very_long_program_name'])
+    assert ProcfsScanner(proc.root).scan()[42]['name'] == 'a_very_long_program_name'
+
+
+def test_static_fields_are_cached_until_pid_reuse(proc):
+    proc.add(42, 'first', cmdline=['first'], start_ticks=100)
+    scanner = ProcfsScanner(proc.root)
+    scanner.scan()
+    scanner.scan()
+    assert (scanner.cache_misses, scanner.cache_hits) == (1, 1)
+
+    proc.add(42, 'second', cmdline=['second'], start_ticks=900)  # Same pid, new process
+    assert scanner.scan()[42]['cmdline'] == ['second']
+    assert scanner.cache_misses == 2
+
+
+def test_exited_processes_are_forgotten(proc):
+    proc.add(42, 'a')
+    proc.add(43, 'b')
+    scanner = ProcfsScanner(proc.root)
+    scanner.scan()
+
+    os.remove(os.path.join(proc.root, '43', 'stat'))
+    assert set(scanner.scan()) == {42}
+    assert scanner.get_stats()['cached_processes'] == 1
+
+
+def test_unreadable_process_is_skipped(proc, monkeypatch):
+    proc.add(42, 'mine')
+    proc.add(43, 'theirs')
+    denied = os.path.join(proc.root, '43')
+
+    def guarded_open(path, *args, **kwargs):
+        if str(path).startswith(denied):
+            raise PermissionError(13, 'Permission denied', path)
+        return open(path, *args, **kwargs)
+
+    scanner = ProcfsScanner(proc.root)
+    monkeypatch.setattr(proc_scanner, 'open', guarded_open, raising=False)
+    assert set(scanner.scan()) == {42}
+
+
+def test_scoped_scan_only_reads_requested_pids(proc):
+    proc.add(42, 'a')
+    proc.add(43, 'b')
+    assert set(ProcfsScanner(proc.root).scan(pids=[43, 99])) == {43}
@@ -0,0 +1,73 @@
+"""
+ProcessLineage keeps the session's process tree, even across pid reuse
+"""
+
+import pytest
+
+from analysis_db import AnalysisDB
+from process_lineage import ProcessLineage
+
+
+@pytest.fixture
+def lineage():
+    lineage = ProcessLineage()
+    lineage.add(1, 0, 100.0, 'init')
+    lineage.add(10, 1, 200.0, 'bash')
+    lineage.add(20, 10, 300.0, 'python', ['python', 'worm.py'])
+    lineage.add(21, 20, 310.0, 'sh')
+    lineage.add(22, 20, 320.0, 'curl')
+    return lineage
+
+
+def test_ancestry_and_descendants(lineage):
+    assert lineage.ancestors((21, 310.0)) == [(20, 300.0), (10, 200.0), (1, 100.0)]
+    assert lineage.descendants((10, 200.0)) == [(20, 300.0), (21, 310.0), (22, 320.0)]
+    assert lineage.is_descendant((22, 320.0), (10, 200.0))
+    assert not lineage.is_descendant((10, 200.0), (22, 320.0))
+    assert lineage.roots() == [(1, 100.0)]
+
+
+def test_reused_pid_is_a_new_node_and_closes_the_old_one(lineage):
+    lineage.mark_exited(21, '2024-01-01T00:00:00')
+    reused = lineage.add(21, 1, 400.0, 'miner')
+
+    assert len(lineage) == 6
+    assert lineage.lookup(21) == reused
+    assert lineage.nodes[(21, 310.0)]['exit_time'] == '2024-01-01T00:00:00'
+    assert lineage.ancestors(reused) == [(1, 100.0)]
+    assert (21, 310.0) in lineage.descendants((20, 300.0))  # Exited processes stay in the tree
+
+
+def test_pid_reused_without_an_exit_seen_is_closed_at_the_new_start(lineage):
+    lineage.add(22, 1, 500.0, 'other')
+    assert lineage.nodes[(22, 320.0)]['exit_time'] is not None
+
+
+def test_parent_started_after_the_child_is_not_its_parent(lineage):
+    # ppid 10 now belongs to a process created after this child: a reused pid
+    lineage.mark_exited(10, 'x')
+    lineage.add(10, 1, 600.0, 'new-bash')
+    orphan = lineage.add(30, 10, 550.0, 'orphan')
+    assert lineage.parent(orphan) is None
+
+
+def test_to_tree_nests_children(lineage):
+    [root] = lineage.to_tree()
+    assert root['name'] == 'init'
+    python = root['children'][0]['children'][0]
+    assert python['cmdline'] == 'python worm.py'
+    assert [child['name'] for child in python['children']] == ['sh', 'curl']
+    assert [node['name'] for node in lineage.to_tree((20, 300.0))] == ['python']
+
+
+def test_saved_lineage_round_trips_through_the_database(tmp_path, lineage):
+    db = AnalysisDB(str(tmp_path / 'lineage.db'))
+    session_id = db.save_analysis_session({'type': 'worm', 'timestamp': '2024-01-01T00:00:00'})
+    db.save_process_lineage(session_id, lineage.to_rows())
+    lineage.mark_exited(22, '2024-01-01T00:05:00')
+    db.save_process_lineage(session_id, lineage.to_rows())  # Re-save only updates exit_time
+
+    assert db.get_process_tree(session_id) == lineage.to_tree()
+    [subtree] = db.get_process_tree(session_id, (20, 300.0))
+    assert [child['exit_time'] for child in subtree['children']] == [None, '2024-01-01T00:05:00']
+    db.close()
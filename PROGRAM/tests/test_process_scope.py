@@ -0,0 +1,82 @@
+"""
+ProcessScope limits sweeps to the simulation's own process subtree
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+from process_sampler import SnapshotSampler
+from proc_scanner import ProcessScope, list_subtree
+
+# Spawns a grandchild, prints its pid, then waits
+PARENT = (
+    "import subprocess, sys, time\n"
+    "child = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(30)'])\n"
+    "print(child.pid, flush=True)\n"
+    "time.sleep(30)\n"
+)
+
+
+@pytest.fixture
+def tree():
+    parent = subprocess.Popen([sys.executable, '-c', PARENT], stdout=subprocess.PIPE, text=True)
+    grandchild = int(parent.stdout.readline())
+    yield parent.pid, grandchild
+    for pid in (grandchild, parent.pid):
+        try:
+            os.kill(pid, 9)
+        except ProcessLookupError:
+            pass
+    parent.wait()
+
+
+@pytest.fixture
+def outsider(tmp_path):
+    """An unrelated process working inside tmp_path"""
+    proc = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(30)'], cwd=str(tmp_path))
+    yield proc
+    proc.kill()
+    proc.wait()
+
+
+def test_subtree_includes_grandchildren_and_nothing_else(tree):
+    parent, grandchild = tree
+    assert list_subtree([parent]) == {parent, grandchild}
+
+
+def test_processes_working_in_watched_paths_are_adopted(tmp_path, tree, outsider):
+    parent, grandchild = tree
+    outsider = outsider.pid
+    scope = ProcessScope(parent, watch_paths=[str(tmp_path)])
+
+    assert outsider not in scope.pids()
+    assert scope.adopt_touching([outsider, os.getpid()]) == {outsider}
+    assert scope.pids() == {parent, grandchild, outsider}
+
+
+def test_adopted_processes_are_forgotten_once_they_exit(tmp_path, outsider):
+    scope = ProcessScope(os.getpid(), watch_paths=[str(tmp_path)])
+    assert scope.adopt_touching([outsider.pid]) == {outsider.pid}
+    outsider.kill()
+    outsider.wait()
+    assert outsider.pid not in scope.pids()
+    assert not scope.adopted
+
+
+def test_scoped_sweeps_only_see_the_subtree(tree):
+    parent, grandchild = tree
+    sampler = SnapshotSampler(interval=1)
+    sampler.subscribe(lambda snapshot: None, needs=('processes',))
+    sampler.set_scope(ProcessScope(parent, host_interval=60))
+
+    snapshot = sampler.sample_once()
+    assert snapshot.scoped
+    assert set(snapshot.processes) == {parent, grandchild}
+    assert len(sampler.host_snapshot.processes) > 2  # Low-rate host-wide context
+    assert sampler.get_stats()['scoped']
+
+    sampler.set_scope(None)
+    assert not sampler.sample_once().scoped
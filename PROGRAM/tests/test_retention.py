@@ -0,0 +1,85 @@
+"""
+RetentionEngine removes expired sessions in small chunks and reclaims their pages
+"""
+
+import pytest
+
+from analysis_db import AnalysisDB
+from retention import RetentionEngine
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = AnalysisDB(str(tmp_path / 'retention.db'))
+    yield db
+    db.close()
+
+
+def add_session(db, age_days, events=40):
+    session_id = db.save_analysis_session({'type': 'worm', 'timestamp': '2024-01-01T00:00:00'})
+    for i in range(events):
+        db.save_process_event(session_id, {'event_type': 'process_created', 'pid': i, 'blob': 'x' * 2000})
+        db.save_file_event(session_id, {'event_type': 'file_created', 'path': f'/tmp/{i}'})
+    with db.pool.transaction() as cursor:
+        cursor.execute(
+            "UPDATE sessions SET created_at = datetime('now', ?) WHERE session_id = ?",
+            (f'-{age_days} days', session_id)
+        )
+    return session_id
+
+
+def test_expired_sessions_and_their_events_are_deleted(db):
+    old = [add_session(db, 40), add_session(db, 31)]
+    fresh = add_session(db, 1)
+
+    report = RetentionEngine(db, retention_days=30, batch_size=7, pause=0).run_once()
+
+    assert report['sessions_deleted'] == 2
+    assert report['rows_deleted']['process_events'] == 80
+    assert report['rows_deleted']['file_events'] == 80
+    assert not any(db.session_exists(session_id) for session_id in old)
+    assert db.session_exists(fresh)
+    assert len(db.get_session_events(fresh)['processes']) == 40
+    assert db.get_statistics()['total_process_events'] == 40  # Counters follow the deletes
+
+
+def test_deletes_run_in_chunks_of_batch_size(db, monkeypatch):
+    add_session(db, 40)
+    chunks = []
+    delete = db.delete_session_rows
+
+    def recording_delete(table, session_id, batch_size=500):
+        deleted = delete(table, session_id, batch_size)
+        chunks.append((table, deleted))
+        return deleted
+
+    monkeypatch.setattr(db, 'delete_session_rows', recording_delete)
+    RetentionEngine(db, retention_days=30, batch_size=7, pause=0).run_once()
+
+    process_chunks = [deleted for table, deleted in chunks if table == 'process_events']
+    assert process_chunks == [7] * 5 + [5]
+
+
+def test_freed_pages_are_returned_to_the_os(db):
+    for _ in range(3):
+        add_session(db, 40, events=200)
+    report = RetentionEngine(db, retention_days=30, pause=0, vacuum_pages=16).run_once()
+
+    assert report['incremental_vacuum']
+    assert report['pages_reclaimed'] > 0
+    assert report['bytes_reclaimed'] > 0
+    assert db.get_storage_info()['freelist_count'] == 0
+
+
+def test_nothing_to_do_leaves_the_database_alone(db):
+    fresh = add_session(db, 0)
+    report = RetentionEngine(db, retention_days=30, pause=0).run_once()
+    assert report['sessions_deleted'] == 0
+    assert report['pages_reclaimed'] == 0
+    assert db.session_exists(fresh)
+
+
+def test_from_config_is_disabled_without_retention_days(db):
+    assert RetentionEngine.from_config(db, {}) is None
+    engine = RetentionEngine.from_config(db, {'database': {'retention_days': 7, 'retention_interval_minutes': 5}})
+    assert (engine.retention_days, engine.interval) == (7, 300)
@@ -0,0 +1,77 @@
+"""
+EventRingBuffer keeps the newest events and spills the rest instead of losing them
+"""
+
+import pytest
+
+from analysis_db import AnalysisDB
+from network_monitor import NetworkMonitor
+from ring_buffer import DatabaseSpill, EventRingBuffer, TempFileSpill
+
+
+def test_keeps_the_newest_capacity_events_in_order():
+    buffer = EventRingBuffer(3)
+    for i in range(5):
+        buffer.append({'n': i})
+
+    assert [event['n'] for event in buffer] == [2, 3, 4]
+    assert buffer.get_stats() == {'capacity': 3, 'buffered': 3, 'appended': 5, 'spilled': 0, 'dropped': 2}
+
+
+def test_evicted_events_go_to_the_spill_oldest_first():
+    spilled = []
+    buffer = EventRingBuffer(2, spill=spilled.append)
+    for i in range(6):
+        buffer.append({'n': i})
+
+    assert [event['n'] for event in spilled] == [0, 1, 2, 3]
+    assert [event['n'] for event in buffer] == [4, 5]
+    assert buffer.spilled == 4 and buffer.dropped == 0
+
+
+def test_a_failing_spill_counts_the_event_as_dropped():
+    def broken(event):
+        raise OSError('disk full')
+
+    buffer = EventRingBuffer(1, spill=broken)
+    buffer.append({'n': 0})
+    buffer.append({'n': 1})
+    assert buffer.dropped == 1 and buffer.spilled == 0
+
+
+def test_capacity_must_be_positive():
+    with pytest.raises(ValueError):
+        EventRingBuffer(0)
+
+
+def test_temp_file_spill_round_trips_events(tmp_path):
+    spill = TempFileSpill(directory=str(tmp_path))
+    buffer = EventRingBuffer(10, spill=spill)
+    for i in range(25):
+        buffer.append({'n': i})
+
+    assert [event['n'] for event in spill.read_events()] == list(range(15))
+    spill.close()
+
+
+def test_database_spill_stores_events_for_the_session(tmp_path):
+    db = AnalysisDB(str(tmp_path / 'spill.db'))
+    session_id = db.save_analysis_session({'type': 'worm', 'timestamp': '2024-01-01T00:00:00'})
+    buffer = EventRingBuffer(2, spill=DatabaseSpill(db, session_id, 'network'))
+    for i in range(5):
+        buffer.append({'type': 'connection_established', 'n': i})
+
+    system_events = db.get_session_events(session_id)['system']
+    assert len(system_events) == 3
+    assert {event['category'] for event in system_events} == {'network'}
+    db.close()
+
+
+def test_monitor_memory_is_bounded(monkeypatch):
+    monkeypatch.setattr('network_monitor.MAX_EVENTS', 4)
+    spilled = []
+    monitor = NetworkMonitor(spill=spilled.append)
+    for i in range(10):
+        monitor._log_event({'type': 'connection_closed', 'n': i})
+    assert len(monitor.events) == 4
+    assert len(spilled) == 6
@@ -0,0 +1,75 @@
+"""
+Session ids are unique and sort by creation time
+"""
+
+import threading
+import time
+from datetime import datetime
+
+import session_ids
+from session_ids import (SESSION_ID, ULIDGenerator, convert_legacy_session_id, is_legacy_session_id,
+                         new_session_id, ulid_timestamp)
+
+
+def test_ids_within_one_millisecond_are_strictly_increasing(monkeypatch):
+    monkeypatch.setattr(time, 'time', lambda: 1700000000.123)
+    generator = ULIDGenerator()
+    ids = [generator.new() for _ in range(1000)]
+
+    assert ids == sorted(ids)
+    assert len(set(ids)) == 1000
+    assert {ulid[:10] for ulid in ids} == {ids[0][:10]}  # Same millisecond prefix throughout
+
+
+def test_clock_stepping_backwards_does_not_break_ordering(monkeypatch):
+    now = [1700000000.500]
+    monkeypatch.setattr(time, 'time', lambda: now[0])
+    generator = ULIDGenerator()
+    first = generator.new()
+    now[0] -= 5
+    assert generator.new() > first
+
+
+def test_random_overflow_carries_into_the_timestamp(monkeypatch):
+    monkeypatch.setattr(time, 'time', lambda: 1700000000.0)
+    generator = ULIDGenerator()
+    first = generator.new()
+    generator._last_random = session_ids.RANDOM_MAX
+    second = generator.new()
+    assert second > first
+    assert ulid_timestamp(second) > ulid_timestamp(first)
+
+
+def test_concurrent_threads_never_collide():
+    ids = []
+    lock = threading.Lock()
+
+    def make():
+        batch = [new_session_id('worm') for _ in range(500)]
+        with lock:
+            ids.extend(batch)
+
+    threads = [threading.Thread(target=make) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(set(ids)) == 4000
+
+
+def test_session_id_format_and_embedded_time():
+    session_id = new_session_id('ransomware', timestamp_ms=1700000000123)
+    match = SESSION_ID.match(session_id)
+    assert match and match.group(2) == 'ransomware'
+    assert ulid_timestamp(match.group(1)) == datetime.fromtimestamp(1700000000.123)
+
+
+def test_legacy_ids_convert_to_ulids_at_the_same_time():
+    legacy = 'session_20240102_030405_trojan'
+    assert is_legacy_session_id(legacy)
+    converted = convert_legacy_session_id(legacy)
+    match = SESSION_ID.match(converted)
+    assert match.group(2) == 'trojan'
+    assert ulid_timestamp(match.group(1)) == datetime(2024, 1, 2, 3, 4, 5)
+    assert not is_legacy_session_id(converted)
+    assert convert_legacy_session_id('not-a-session') is None
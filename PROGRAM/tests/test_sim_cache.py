@@ -0,0 +1,55 @@
+"""
+Seeded runs are reproducible, and cache keys cover (type, config, seed, duration)
+"""
+
+import pytest
+
+from sim_cache import cache_key, resolve_seed
+from sim_clock import VirtualClock
+from worm_sim import WormSimulator
+
+
+def run_worm(tmp_path, seed):
+    simulator = WormSimulator(config={'test_dir': str(tmp_path / 'worm')}, clock=VirtualClock(0), seed=seed)
+    results = simulator.run_simulation(30)
+    simulator.cleanup()
+    # Host timing is the only thing allowed to differ between replays
+    results.pop('wall_duration')
+    for timing in results['phase_timings']:
+        timing.pop('wall_ms')
+    return results
+
+
+def test_same_seed_gives_same_results(tmp_path, capsys):
+    assert run_worm(tmp_path, 1234) == run_worm(tmp_path, 1234)
+
+
+def test_different_seeds_diverge(tmp_path, capsys):
+    runs = [run_worm(tmp_path, seed) for seed in (1, 2, 3)]
+    assert len({repr(run['events']) + repr(run['hosts_infected']) for run in runs}) > 1
+
+
+def test_resolve_seed_prefers_explicit_then_config():
+    assert resolve_seed(7, {'seed': 9}) == 7
+    assert resolve_seed(None, {'seed': '9'}) == 9
+    assert 0 <= resolve_seed(None) < 2 ** 32
+
+
+def test_cache_key_depends_on_config():
+    base = cache_key('worm', 1, 300)
+    assert cache_key('worm', 1, 300, {}) == base
+    assert cache_key('worm', 1, 300, {'subnets': ['10.0.0.0/24']}) != base
+    assert cache_key('worm', 2, 300) != base
+    assert cache_key('trojan', 1, 300) != base
+
+
+def test_cache_key_ignores_volatile_config_and_duration_type():
+    base = cache_key('worm', 1, 300)
+    assert cache_key('worm', 1, 300, {'test_dir': '/tmp/run-1', 'seed': 99}) == base
+    assert cache_key('worm', 1, 300.0) == base
+    assert cache_key('worm', 1, 301) != base
+
+
+def test_cache_key_rejects_non_numeric_duration():
+    with pytest.raises((TypeError, ValueError)):
+        cache_key('worm', 1, 'forever')
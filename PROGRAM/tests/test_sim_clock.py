@@ -0,0 +1,77 @@
+"""
+Simulation clocks: virtual time is instant, scaled time is faster than real time
+"""
+
+import threading
+import time
+
+import pytest
+
+from sim_clock import RealClock, ScaledClock, VirtualClock, clock_from_config, create_clock
+from worm_sim import WormSimulator
+
+
+def test_virtual_sleep_returns_at_once_and_advances_the_clock():
+    clock = VirtualClock(1000.0)
+    started = time.monotonic()
+    clock.sleep(3600)
+    assert time.monotonic() - started < 0.1
+    assert clock.time() == 4600.0
+    clock.sleep(-5)
+    assert clock.time() == 4600.0
+
+
+def test_cancelled_virtual_sleep_does_not_advance():
+    clock = VirtualClock(0)
+    cancel = threading.Event()
+    cancel.set()
+    clock.sleep(10, cancel)
+    assert clock.time() == 0
+
+
+def test_concurrent_branches_overlap_instead_of_adding_up():
+    clock = VirtualClock(0)
+    left, right = clock.fork(), clock.fork()
+    left.sleep(5)
+    right.sleep(8)
+    assert clock.time() == 0
+    clock.join([left, right])
+    assert clock.time() == 8
+
+
+def test_scaled_sleep_waits_a_fraction_of_real_time():
+    clock = ScaledClock(scale=50)
+    started_real, started_sim = time.monotonic(), clock.time()
+    clock.sleep(5)
+    real = time.monotonic() - started_real
+    assert 0.09 <= real < 0.5
+    assert clock.time() - started_sim == pytest.approx(real * 50, rel=0.2)
+    with pytest.raises(ValueError):
+        ScaledClock(0)
+
+
+def test_real_sleep_returns_early_on_cancel():
+    cancel = threading.Event()
+    threading.Timer(0.05, cancel.set).start()
+    started = time.monotonic()
+    RealClock().sleep(10, cancel)
+    assert time.monotonic() - started < 1
+
+
+def test_clocks_are_built_from_settings():
+    assert isinstance(clock_from_config(None), RealClock)
+    clock = clock_from_config({'simulation': {'clock': 'scaled', 'clock_scale': 4}})
+    assert (clock.mode, clock.scale) == ('scaled', 4)
+    assert create_clock('virtual').describe() == {'mode': 'virtual', 'scale': None}
+    with pytest.raises(ValueError, match='warp'):
+        create_clock('warp')
+
+
+def test_a_long_simulation_finishes_instantly_on_virtual_time(tmp_path):
+    clock = VirtualClock(0)
+    simulator = WormSimulator({'test_dir': str(tmp_path)}, clock=clock, seed=3)
+    started = time.monotonic()
+    results = simulator.run_simulation(duration=600)
+    assert time.monotonic() - started < 5
+    assert clock.time() > 0
+    assert results['type'] == 'worm'
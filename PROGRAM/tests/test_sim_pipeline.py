@@ -0,0 +1,160 @@
+"""
+PhasedSimulator ordering, timings and cooperative cancellation
+"""
+
+import threading
+import time
+
+import pytest
+
+from sim_clock import RealClock, VirtualClock
+from sim_pipeline import CancellationToken, Phase, PhasedSimulator
+
+
+class Pipeline(PhasedSimulator):
+    sim_type = 'test'
+
+    def __init__(self, phases, clock=None):
+        super().__init__(clock=clock or VirtualClock(0), seed=1)
+        self._phases = phases
+
+    def phases(self):
+        return self._phases
+
+
+def sleeper(simulator_ref, seconds, log=None, name=None):
+    def run(results):
+        if log is not None:
+            log.append(name)
+        simulator_ref[0].sleep(seconds)
+    return run
+
+
+def build(specs, clock=None):
+    """specs: (name, seconds, after) -> Pipeline whose phases sleep that long"""
+    ref, log = [None], []
+    phases = [Phase(name, sleeper(ref, seconds, log, name), name, after=after)
+              for name, seconds, after in specs]
+    ref[0] = Pipeline(phases, clock)
+    return ref[0], log
+
+
+def test_sequential_phases_run_in_order_and_are_timed():
+    simulator, log = build([('a', 10, None), ('b', 5, None), ('c', 1, None)])
+    results = simulator.run_simulation()
+
+    assert log == ['a', 'b', 'c']
+    assert [event['phase'] for event in results['events']] == ['a', 'b', 'c']
+    assert [(t['phase'], t['duration'], t['status']) for t in results['phase_timings']] == [
+        ('a', 10.0, 'completed'), ('b', 5.0, 'completed'), ('c', 1.0, 'completed')]
+    assert results['duration'] == 16.0
+    assert 'cancelled' not in results and 'error' not in results
+
+
+def test_concurrent_phases_overlap_in_virtual_time():
+    simulator, _ = build([('setup', 1, None), ('left', 10, ['setup']), ('right', 4, ['setup']),
+                          ('report', 2, ['left', 'right'])])
+    results = simulator.run_simulation()
+
+    # setup, then max(left, right), then report
+    assert results['duration'] == 13.0
+    assert [t['phase'] for t in results['phase_timings']][0] == 'setup'
+    assert results['phase_timings'][-1]['phase'] == 'report'
+
+
+def test_dependency_cycle_is_reported():
+    simulator, _ = build([('a', 1, ['b']), ('b', 1, ['a'])])
+    results = simulator.run_simulation()
+    assert 'cycle' in results['error']
+
+
+def test_cancel_wakes_a_sleeping_phase_at_once(capsys):
+    simulator, _ = build([('long', 60, None), ('never', 1, None)], clock=RealClock())
+    token = CancellationToken()
+    threading.Timer(0.05, token.cancel).start()
+
+    started = time.monotonic()
+    results = simulator.run_simulation(token=token)
+
+    assert time.monotonic() - started < 1.0
+    assert results['cancelled'] is True
+    assert [(t['phase'], t['status']) for t in results['phase_timings']] == [('long', 'cancelled')]
+
+
+def test_cancel_before_the_run_starts_is_not_lost(capsys):
+    simulator, log = build([('a', 1, None)])
+    token = CancellationToken()
+    token.cancel()
+
+    results = simulator.run_simulation(token=token)
+    assert results['cancelled'] is True
+    assert log == []
+
+
+def test_failing_phase_cancels_siblings_but_not_the_callers_token(capsys):
+    ref = [None]
+
+    def boom(results):
+        raise RuntimeError('boom')
+
+    phases = [Phase('boom', boom, 'boom', after=()),
+              Phase('slow', sleeper(ref, 60), 'slow', after=())]
+    ref[0] = simulator = Pipeline(phases, RealClock())
+    token = CancellationToken()
+
+    started = time.monotonic()
+    results = simulator.run_simulation(token=token)
+
+    assert time.monotonic() - started < 1.0
+    assert results['error'] == 'boom'
+    assert {t['phase']: t['status'] for t in results['phase_timings']} == {'boom': 'failed', 'slow': 'cancelled'}
+    assert not token.cancelled
+
+
+def test_child_token_follows_its_parent():
+    parent = CancellationToken()
+    child = parent.child()
+    child.cancel()
+    assert child.cancelled and not parent.cancelled
+
+    other = parent.child()
+    parent.cancel()
+    assert other.cancelled
+    assert parent.child().cancelled
+
+
+def test_phases_get_independent_seeded_randomness():
+    draws = {}
+
+    def draw(name):
+        def run(results):
+            draws.setdefault(name, []).append(ref[0].rng.random())
+        return run
+
+    ref = [None]
+    for _ in range(2):
+        ref[0] = Pipeline([Phase('a', draw('a'), 'a'), Phase('b', draw('b'), 'b')])
+        ref[0].run_simulation()
+
+    assert draws['a'][0] == draws['a'][1]
+    assert draws['a'][0] != draws['b'][0]
+
+
+@pytest.mark.parametrize('clock', [VirtualClock(0), RealClock()])
+def test_is_running_clears_after_the_run(clock):
+    simulator, _ = build([('a', 0, None)], clock=clock)
+    simulator.run_simulation()
+    assert not simulator.is_running
+
+
+def test_cancel_reaches_phases_of_a_concurrent_wave(capsys):
+    simulator, _ = build([('left', 60, ()), ('right', 60, ())], clock=RealClock())
+    token = CancellationToken()
+    threading.Timer(0.05, token.cancel).start()
+
+    started = time.monotonic()
+    results = simulator.run_simulation(token=token)
+
+    assert time.monotonic() - started < 1.0
+    assert results['cancelled'] is True
+    assert {t['status'] for t in results['phase_timings']} == {'cancelled'}
@@ -0,0 +1,90 @@
+"""
+One sampler sweep serves every subscribed monitor
+"""
+
+import threading
+
+import pytest
+
+from process_sampler import SnapshotSampler
+
+
+class CountingScanner:
+    name = 'fake'
+
+    def __init__(self, result):
+        self.result = result
+        self.calls = 0
+
+    def scan(self, pids=None):
+        self.calls += 1
+        return self.result
+
+
+@pytest.fixture
+def sampler():
+    sampler = SnapshotSampler(interval=0.01)
+    sampler.scanner = CountingScanner({1: {'pid': 1, 'name': 'init'}})
+    sampler.net_scanner = CountingScanner([])
+    yield sampler
+    while sampler.running:
+        sampler.stop()
+
+
+def test_each_part_is_collected_once_per_tick_for_all_subscribers(sampler):
+    process_view, network_view = [], []
+    sampler.subscribe(process_view.append, needs=('processes',))
+    sampler.subscribe(network_view.append, needs=('processes', 'connections'))
+
+    sampler.sample_once()
+    assert sampler.scanner.calls == 1
+    assert sampler.net_scanner.calls == 1
+    assert process_view[0] is network_view[0]
+    assert process_view[0].processes == {1: {'pid': 1, 'name': 'init'}}
+
+
+def test_parts_nobody_needs_are_not_collected(sampler):
+    sampler.subscribe(lambda snapshot: None, needs=('processes',))
+    sampler.sample_once()
+    assert sampler.net_scanner.calls == 0
+
+    with pytest.raises(ValueError):
+        sampler.subscribe(lambda snapshot: None, needs=('registry',))
+
+
+def test_failing_subscriber_does_not_starve_the_others(sampler):
+    received = []
+
+    def broken(snapshot):
+        raise RuntimeError('boom')
+
+    sampler.subscribe(broken, needs=('processes',))
+    sampler.subscribe(received.append, needs=('processes',))
+    sampler.sample_once()
+    assert len(received) == 1
+    assert sampler.callback_errors == 1
+
+
+def test_scanner_errors_are_reported_on_the_snapshot(sampler):
+    def fail(pids=None):
+        raise OSError('no /proc')
+
+    sampler.scanner.scan = fail
+    sampler.subscribe(lambda snapshot: None, needs=('processes',))
+    snapshot = sampler.sample_once()
+    assert snapshot.errors == ['processes: no /proc']
+    assert sampler.get_stats()['sweep_errors'] == 1
+
+
+def test_thread_runs_until_the_last_user_stops(sampler):
+    ticked = threading.Event()
+    sampler.subscribe(lambda snapshot: ticked.set(), needs=('processes',))
+    sampler.start()
+    sampler.start()
+    assert ticked.wait(2)
+
+    sampler.stop()
+    assert sampler.running and sampler.sampler_thread.is_alive()
+    sampler.stop()
+    assert not sampler.running
+    assert not sampler.sampler_thread.is_alive()
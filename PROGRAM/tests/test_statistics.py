@@ -0,0 +1,91 @@
+"""
+Trigger-maintained statistics counters must always match a full recount
+"""
+
+from datetime import datetime
+
+import pytest
+
+from analysis_db import AnalysisDB
+from db_migrations import COUNTED_TABLES, SESSION_TABLES
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = AnalysisDB(str(tmp_path / 'stats.db'))
+    yield db
+    db.close()
+
+
+def add_session(db, malware_type, events=3):
+    session_id = db.save_analysis_session({
+        'type': malware_type,
+        'timestamp': datetime.now().isoformat(),
+    })
+    for i in range(events):
+        db.save_process_event(session_id, {'event_type': 'process_created', 'pid': i})
+        db.save_file_event(session_id, {'event_type': 'file_created', 'path': f'/tmp/f{i}'})
+        db.save_network_event(session_id, {'event_type': 'connection_established'})
+        db.save_system_event(session_id, {'event_type': 'high_cpu'})
+    return session_id
+
+
+def delete_session(db, session_id, batch_size=2):
+    """Cascade delete in small chunks, the way RetentionEngine does"""
+    for table in SESSION_TABLES:
+        while db.delete_session_rows(table, session_id, batch_size) == batch_size:
+            pass
+    db.delete_session_rows('sessions', session_id, 1)
+
+
+def recount(db):
+    with db.pool.cursor() as cursor:
+        counts = {table: cursor.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+                  for table in COUNTED_TABLES}
+        cursor.execute('SELECT malware_type, COUNT(*) FROM sessions GROUP BY malware_type')
+        counts['sessions_by_type'] = dict(cursor.fetchall())
+    return counts
+
+
+def assert_counters_match(db):
+    stats = db.get_statistics()
+    actual = recount(db)
+    assert stats['sessions_by_type'] == actual['sessions_by_type']
+    for table in ('process_events', 'file_events', 'network_events'):
+        assert stats[f'total_{table}'] == actual[table]
+    assert db.recompute_statistics() == {}
+
+
+def test_counters_match_recount_with_direct_writes(db):
+    sessions = [add_session(db, 'ransomware'), add_session(db, 'worm', events=5),
+                add_session(db, 'ransomware', events=1)]
+    assert_counters_match(db)
+
+    delete_session(db, sessions[1])
+    assert_counters_match(db)
+
+    delete_session(db, sessions[0])
+    delete_session(db, sessions[2])
+    assert_counters_match(db)
+    assert db.get_statistics()['sessions_by_type'] == {}
+
+
+def test_counters_match_recount_with_batch_writer(db):
+    db.start_batch_writer()
+    sessions = [add_session(db, 'trojan', events=7) for _ in range(4)]
+    db.flush_events()
+    assert_counters_match(db)
+
+    delete_session(db, sessions[0], batch_size=3)
+    add_session(db, 'spyware', events=2)
+    db.flush_events()
+    assert_counters_match(db)
+
+
+def test_recompute_reports_and_repairs_drift(db):
+    add_session(db, 'worm')
+    with db.pool.transaction() as cursor:
+        cursor.execute("UPDATE stats_counters SET value = value + 5 WHERE name = 'file_events'")
+
+    assert db.recompute_statistics() == {'file_events': (8, 3)}
+    assert_counters_match(db)
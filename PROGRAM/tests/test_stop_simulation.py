@@ -0,0 +1,87 @@
+"""
+Stop requests reach the running simulator within the deadline
+"""
+
+import threading
+import time
+
+import pytest
+
+
+def start(web, client, run, monkeypatch):
+    """Start a simulation whose body is `run(simulator)`"""
+    monkeypatch.setattr(web.MalwareSimulator, '_run', lambda self, duration: run(self))
+    response = client.post('/api/start_simulation', json={'type': 'worm', 'duration': 30, 'no_cache': True})
+    return response.get_json()['simulation_id']
+
+
+@pytest.fixture
+def client_for(web):
+    def build(stop_deadline=2.0):
+        app = web.create_app({'simulation': {'stop_deadline_seconds': stop_deadline}})
+        return app.test_client()
+    return build
+
+
+def status(web, sim_id):
+    simulations = web.db.get_simulations(limit=10, fields=['id', 'status'])
+    return next(sim['status'] for sim in simulations if sim['id'] == sim_id)
+
+
+def test_stop_wakes_the_run_and_is_recorded_before_the_reply(web, client_for, monkeypatch):
+    client = client_for()
+
+    def run(simulator):
+        simulator.token.wait(30)
+        return {'type': 'worm', 'cancelled': simulator.token.cancelled}
+
+    sim_id = start(web, client, run, monkeypatch)
+    time.sleep(0.05)
+    started = time.monotonic()
+    reply = client.post('/api/stop_simulation', json={'simulation_id': sim_id}).get_json()
+
+    assert time.monotonic() - started < 1.0
+    assert reply['status'] == 'stopped'
+    assert 0 <= reply['stop_latency_ms'] < 1000
+    assert status(web, sim_id) == 'stopped'
+    assert web.db.get_simulation_results(sim_id)['cancelled'] is True
+
+
+def test_stuck_run_is_killed_and_cannot_overwrite_the_verdict(web, client_for, monkeypatch):
+    client = client_for(stop_deadline=0.1)
+    release = threading.Event()
+    finished = threading.Event()
+
+    def run(simulator):
+        release.wait(10)  # Ignores the token
+        finished.set()
+        return {'type': 'worm'}
+
+    sim_id = start(web, client, run, monkeypatch)
+    simulator = web.current_simulations[sim_id]
+    reply = client.post('/api/stop_simulation', json={'simulation_id': sim_id}).get_json()
+    assert reply == {'success': True, 'status': 'killed', 'stop_latency_ms': None}
+
+    release.set()
+    assert simulator.recorded.wait(5)
+    assert finished.is_set()
+    assert status(web, sim_id) == 'killed'
+
+
+def test_stop_after_the_run_finished_is_a_no_op(web):
+    simulator = web.MalwareSimulator('worm')
+    simulator._run = lambda duration: {'type': 'worm'}
+    simulator.run_simulation(1)
+
+    assert simulator.stop() is False
+    assert not simulator.stopped
+    assert simulator.stop_latency is None
+    assert simulator.kill() is False
+    assert simulator.claim_result()
+
+
+def test_kill_only_applies_to_a_busy_worker(web):
+    simulator = web.MalwareSimulator('worm')
+    assert simulator.stop() is True
+    assert simulator.kill() is True
+    assert not simulator.claim_result()
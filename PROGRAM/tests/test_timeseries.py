@@ -0,0 +1,119 @@
+"""
+Rollup buckets, compact chunk encoding and downsampling
+"""
+
+import pytest
+
+from timeseries import (CHUNK_BUCKETS, CHUNK_FIELDS, MIN_POINTS, RollupSeries, TimeSeriesRecorder,
+                        decode_chunk, downsample, lttb, minmax)
+
+START = 1_700_000_000.0
+
+
+def sample(cpu, memory=50.0, disk=10.0):
+    return {'cpu_percent': cpu, 'memory_percent': memory, 'disk_percent': disk}
+
+
+def test_buckets_hold_avg_min_max():
+    series = RollupSeries(10, ['cpu_percent'], capacity=4)
+    for offset, value in ((0, 10.0), (3, 30.0), (9, 20.0), (10, 5.0)):
+        series.add(START + offset, {'cpu_percent': value})
+    series.close_bucket()
+
+    assert series.points('cpu_percent') == [(START, 20.0, 10.0, 30.0), (START + 10, 5.0, 5.0, 5.0)]
+
+
+def test_ring_keeps_only_the_newest_buckets():
+    series = RollupSeries(1, ['cpu_percent'], capacity=3)
+    for i in range(5):
+        series.add(START + i, {'cpu_percent': float(i)})
+    series.close_bucket()
+
+    assert [point[0] for point in series.points('cpu_percent')] == [START + 2, START + 3, START + 4]
+
+
+def test_chunks_store_no_time_column_and_round_trip():
+    series = RollupSeries(10, ['cpu_percent'], capacity=10, persist=True)
+    for i in range(5):
+        series.add(START + i * 10, {'cpu_percent': float(i)})
+    series.close_bucket()
+
+    [chunk] = series.drain_chunks()
+    assert chunk['count'] == 5
+    assert len(chunk['data']) == 5 * CHUNK_FIELDS * 4  # float32 avg, min, max per bucket
+    assert decode_chunk(chunk['start_time'], 10, chunk['data']) == series.points('cpu_percent')
+    assert series.drain_chunks() == []
+
+
+def test_gaps_start_a_new_chunk():
+    series = RollupSeries(10, ['cpu_percent'], capacity=10, persist=True)
+    for offset in (0, 10, 50, 60, 70):
+        series.add(START + offset, {'cpu_percent': 1.0})
+    series.close_bucket()
+
+    chunks = series.drain_chunks()
+    assert [(chunk['start_time'] - START, chunk['count']) for chunk in chunks] == [(0, 2), (50, 3)]
+    times = [bucket[0] - START for chunk in chunks
+             for bucket in decode_chunk(chunk['start_time'], 10, chunk['data'])]
+    assert times == [0, 10, 50, 60, 70]
+
+
+def test_long_runs_are_split_at_chunk_size():
+    series = RollupSeries(1, ['cpu_percent'], capacity=CHUNK_BUCKETS * 3, persist=True)
+    for i in range(CHUNK_BUCKETS + 10):
+        series.add(START + i, {'cpu_percent': 1.0})
+    series.close_bucket()
+
+    assert [chunk['count'] for chunk in series.drain_chunks()] == [CHUNK_BUCKETS, 10]
+
+
+def test_recorder_only_queues_persisted_resolutions():
+    recorder = TimeSeriesRecorder()
+    for i in range(120):
+        recorder.record(START + i, sample(float(i)))
+    recorder.close()
+
+    chunks = recorder.drain_chunks()
+    assert {chunk['resolution'] for chunk in chunks} == {10, 60}
+    assert {chunk['metric'] for chunk in chunks} == {'cpu_percent', 'memory_percent', 'disk_percent'}
+
+
+def test_recorder_query_uses_the_finest_complete_rollup():
+    recorder = TimeSeriesRecorder(rollups={1: 10, 10: 100})
+    for i in range(50):
+        recorder.record(START + i, sample(float(i)))
+    recorder.close()
+
+    points = recorder.query('cpu_percent', max_points=100)
+    assert len(points) == 5  # 1s ring has wrapped, so the 10s rollup is used
+    with pytest.raises(ValueError):
+        recorder.query('gpu_percent')
+
+
+def test_lttb_keeps_ends_and_spike():
+    points = [(float(i), 0.0) for i in range(100)]
+    points[37] = (37.0, 100.0)
+    sampled = lttb(points, 10)
+
+    assert len(sampled) == 10
+    assert sampled[0] == points[0] and sampled[-1] == points[-1]
+    assert (37.0, 100.0) in sampled
+
+
+def test_minmax_keeps_both_extremes_of_each_group():
+    buckets = [(float(i), 5.0, 5.0 - i % 3, 5.0 + i % 7) for i in range(60)]
+    points = minmax(buckets, 10)
+
+    assert len(points) == 10
+    assert [p[0] for p in points] == sorted(p[0] for p in points)
+    assert min(p[1] for p in points) == min(b[2] for b in buckets)
+    assert max(p[1] for p in points) == max(b[3] for b in buckets)
+
+
+def test_downsample_rejects_too_few_points_and_unknown_methods():
+    buckets = [(float(i), 1.0, 1.0, 1.0) for i in range(10)]
+    with pytest.raises(ValueError):
+        downsample(buckets, MIN_POINTS - 1)
+    with pytest.raises(ValueError):
+        downsample(buckets, 5, method='mean')
+    assert len(downsample(buckets, MIN_POINTS)) == MIN_POINTS
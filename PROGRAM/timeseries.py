@@ -0,0 +1,285 @@
+"""
+Time-Series Recorder for MalSim Pro
+Array-backed resource metric history with 1s/10s/1m rollups and downsampling for charts
+"""
+
+import math
+import threading
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+DEFAULT_METRICS = ('cpu_percent', 'memory_percent', 'disk_percent')
+
+# resolution in seconds -> buckets kept in memory (15 minutes, 3 hours, 24 hours)
+DEFAULT_ROLLUPS = {1: 900, 10: 1080, 60: 1440}
+
+# Rollups written to the metric_series table; 1s stays in memory only
+PERSISTED_RESOLUTIONS = (10, 60)
+
+# Buckets per stored chunk row
+CHUNK_BUCKETS = 360
+
+# Persisted chunk layout: per bucket, float32 [avg, min, max]. Buckets in a chunk are
+# contiguous, so bucket i starts at start_time + i * resolution
+CHUNK_FIELDS = 3
+
+# Fewest points a downsampled curve can have; LTTB always keeps both ends plus one
+MIN_POINTS = 3
+
+Point = Tuple[float, float]
+
+
+class RollupSeries:
+    """Fixed-size ring of (time, avg, min, max) buckets at one resolution, per metric"""
+
+    def __init__(self, resolution: int, metrics: Sequence[str], capacity: int, persist: bool = False):
+        self.resolution = resolution
+        self.metrics = tuple(metrics)
+        self.capacity = capacity
+        self.persist = persist
+
+        self.times = array('d', bytes(8 * capacity))
+        # metric -> flat [avg, min, max] * capacity
+        self.values = {metric: array('d', bytes(24 * capacity)) for metric in self.metrics}
+        self.head = 0
+        self.size = 0
+
+        # Closed buckets not yet written to the database, same flat layout in float32
+        self.pending_times = array('d')
+        self.pending_values = {metric: array('f') for metric in self.metrics}
+
+        self._bucket = None
+        self._sum = {}
+        self._min = {}
+        self._max = {}
+        self._count = 0
+
+    def add(self, timestamp: float, values: Dict[str, float]):
+        bucket = timestamp - timestamp % self.resolution
+        if bucket != self._bucket:
+            self.close_bucket()
+            self._bucket = bucket
+            self._sum = dict.fromkeys(self.metrics, 0.0)
+            self._min = dict.fromkeys(self.metrics, math.inf)
+            self._max = dict.fromkeys(self.metrics, -math.inf)
+            self._count = 0
+
+        for metric in self.metrics:
+            value = values[metric]
+            self._sum[metric] += value
+            if value < self._min[metric]:
+                self._min[metric] = value
+            if value > self._max[metric]:
+                self._max[metric] = value
+        self._count += 1
+
+    def close_bucket(self):
+        """Move the open bucket into the ring (and the persistence queue)"""
+        if self._bucket is None or not self._count:
+            return
+
+        slot = self.head
+        self.times[slot] = self._bucket
+        for metric in self.metrics:
+            stats = (self._sum[metric] / self._count, self._min[metric], self._max[metric])
+            self.values[metric][slot * 3:slot * 3 + 3] = array('d', stats)
+            if self.persist:
+                self.pending_values[metric].extend(stats)
+        if self.persist:
+            self.pending_times.append(self._bucket)
+
+        self.head = (self.head + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+        self._bucket = None
+        self._count = 0
+
+    def points(self, metric: str, start: Optional[float] = None,
+               end: Optional[float] = None) -> List[Tuple[float, float, float, float]]:
+        """Closed buckets as (time, avg, min, max), oldest first"""
+        values = self.values[metric]
+        first = (self.head - self.size) % self.capacity
+        result = []
+        for i in range(self.size):
+            slot = (first + i) % self.capacity
+            t = self.times[slot]
+            if (start is None or t >= start) and (end is None or t <= end):
+                result.append((t, values[slot * 3], values[slot * 3 + 1], values[slot * 3 + 2]))
+        return result
+
+    def _runs(self) -> List[Tuple[int, int]]:
+        """(begin, stop) ranges of pending buckets with no gap, at most CHUNK_BUCKETS long"""
+        times = self.pending_times
+        runs = []
+        begin = 0
+        for i in range(1, len(times) + 1):
+            if (i == len(times) or i - begin == CHUNK_BUCKETS
+                    or abs(times[i] - times[i - 1] - self.resolution) > 1e-6):
+                runs.append((begin, i))
+                begin = i
+        return runs
+
+    def drain_chunks(self) -> List[Dict[str, Any]]:
+        """Pending buckets packed as metric_series rows, one per gap-free run of buckets"""
+        chunks = []
+        for begin, stop in self._runs():
+            start_time = self.pending_times[begin]
+            for metric in self.metrics:
+                packed = self.pending_values[metric][begin * 3:stop * 3]
+                chunks.append({
+                    'metric': metric,
+                    'resolution': self.resolution,
+                    'start_time': start_time,
+                    'count': stop - begin,
+                    'data': packed.tobytes(),
+                })
+
+        self.pending_times = array('d')
+        self.pending_values = {metric: array('f') for metric in self.metrics}
+        return chunks
+
+    def memory_bytes(self) -> int:
+        size = self.times.itemsize * len(self.times)
+        size += sum(v.itemsize * len(v) for v in self.values.values())
+        size += self.pending_times.itemsize * len(self.pending_times)
+        size += sum(v.itemsize * len(v) for v in self.pending_values.values())
+        return size
+
+
+class TimeSeriesRecorder:
+    """Records every resource sample into 1s/10s/1m rollups
+
+    Memory is fixed by the ring capacities (DEFAULT_ROLLUPS), so it does not
+    grow with run length; closed 10s and 1m buckets are queued for
+    AnalysisDB.save_timeseries as packed float32 chunks.
+    """
+
+    def __init__(self, metrics: Sequence[str] = DEFAULT_METRICS,
+                 rollups: Optional[Dict[int, int]] = None,
+                 persisted: Iterable[int] = PERSISTED_RESOLUTIONS):
+        rollups = rollups or DEFAULT_ROLLUPS
+        persisted = set(persisted)
+        self.metrics = tuple(metrics)
+        self.series = {
+            resolution: RollupSeries(resolution, self.metrics, capacity, resolution in persisted)
+            for resolution, capacity in sorted(rollups.items())
+        }
+        self._lock = threading.Lock()
+        self.samples = 0
+
+    def record(self, timestamp: float, values: Dict[str, float]):
+        """Add one sample; `values` must hold every recorded metric"""
+        with self._lock:
+            for series in self.series.values():
+                series.add(timestamp, values)
+            self.samples += 1
+
+    def close(self):
+        """Close the open buckets, e.g. when monitoring stops"""
+        with self._lock:
+            for series in self.series.values():
+                series.close_bucket()
+
+    def drain_chunks(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            chunks = []
+            for series in self.series.values():
+                chunks.extend(series.drain_chunks())
+            return chunks
+
+    def query(self, metric: str, start: Optional[float] = None, end: Optional[float] = None,
+              max_points: int = 500, method: str = 'lttb') -> List[Point]:
+        """Chart-ready points from the finest rollup that still covers `start`
+
+        Without `start`, the finest rollup that has not wrapped yet, i.e. that
+        still holds the whole run.
+        """
+        if metric not in self.metrics:
+            raise ValueError(f"Unknown metric: {metric}")
+        with self._lock:
+            chosen = None
+            for series in self.series.values():
+                if not series.size:
+                    continue
+                chosen = series
+                if start is None:
+                    if series.size < series.capacity:
+                        break
+                elif series.times[(series.head - series.size) % series.capacity] <= start:
+                    break
+            buckets = chosen.points(metric, start, end) if chosen else []
+        return downsample(buckets, max_points, method)
+
+    def memory_bytes(self) -> int:
+        return sum(series.memory_bytes() for series in self.series.values())
+
+
+def decode_chunk(start_time: float, resolution: int, data: bytes) -> List[Tuple[float, float, float, float]]:
+    """Unpack a metric_series chunk into (time, avg, min, max) buckets"""
+    packed = array('f')
+    packed.frombytes(data)
+    return [
+        (start_time + i // CHUNK_FIELDS * resolution, packed[i], packed[i + 1], packed[i + 2])
+        for i in range(0, len(packed), CHUNK_FIELDS)
+    ]
+
+
+def downsample(buckets: List[Tuple[float, float, float, float]], max_points: int,
+               method: str = 'lttb') -> List[Point]:
+    """Reduce (time, avg, min, max) buckets to at most max_points (time, value) points
+
+    'lttb' keeps the visual shape of the avg curve (Largest-Triangle-Three-
+    Buckets); 'minmax' keeps each bucket's extremes so short spikes survive.
+    """
+    if max_points < MIN_POINTS:
+        raise ValueError(f"points must be at least {MIN_POINTS}")
+    if method == 'lttb':
+        return lttb([(b[0], b[1]) for b in buckets], max_points)
+    if method == 'minmax':
+        return minmax(buckets, max_points)
+    raise ValueError(f"Unknown downsampling method: {method}")
+
+
+def lttb(points: List[Point], threshold: int) -> List[Point]:
+    """Largest-Triangle-Three-Buckets downsampling"""
+    if threshold >= len(points) or threshold < 3:
+        return list(points)
+
+    sampled = [points[0]]
+    every = (len(points) - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        # Average of the next bucket is the third triangle vertex
+        next_start = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, len(points))
+        next_bucket = points[next_start:next_end]
+        avg_x = sum(p[0] for p in next_bucket) / len(next_bucket)
+        avg_y = sum(p[1] for p in next_bucket) / len(next_bucket)
+
+        ax, ay = points[a]
+        best, best_area = None, -1.0
+        for j in range(int(i * every) + 1, int((i + 1) * every) + 1):
+            area = abs((ax - avg_x) * (points[j][1] - ay) - (ax - points[j][0]) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+        sampled.append(points[best])
+        a = best
+
+    sampled.append(points[-1])
+    return sampled
+
+
+def minmax(buckets: List[Tuple[float, float, float, float]], max_points: int) -> List[Point]:
+    """Min and max of each of max_points/2 groups, in time order"""
+    groups = max(1, max_points // 2)
+    if len(buckets) <= groups:
+        return [point for b in buckets for point in ((b[0], b[2]), (b[0], b[3]))]
+
+    per_group = len(buckets) / groups
+    result = []
+    for g in range(groups):
+        group = buckets[int(g * per_group):int((g + 1) * per_group)]
+        low = min(group, key=lambda b: b[2])
+        high = max(group, key=lambda b: b[3])
+        first, second = sorted(((low[0], low[2]), (high[0], high[3])))
+        result.extend((first, second))
+    return result
@@ -13,19 +13,19 @@ This simulator demonstrates trojan behavior patterns:
 
 import os
 import sys
-import time
 import json
-import random
 import socket
 import threading
-from datetime import datetime
 from pathlib import Path
 
-class TrojanSimulator:
-    def __init__(self, config=None):
-        self.config = config or {}
-        self.is_running = False
-        self.test_dir = "/tmp/malsim_trojan_test"
+from sim_pipeline import Phase, PhasedSimulator
+
+class TrojanSimulator(PhasedSimulator):
+    sim_type = 'trojan'
+    
+    def __init__(self, config=None, clock=None, seed=None):
+        super().__init__(config, clock, seed)
+        self.test_dir = self.config.get('test_dir', "/tmp/malsim_trojan_test")
         self.keylog_data = []
         self.stolen_data = []
         self.backdoor_active = False
@@ -64,7 +64,7 @@ class TrojanSimulator:
             file_path = os.path.join(self.test_dir, backdoor_file)
             backdoor_content = f"""
 FAKE BACKDOOR PAYLOAD - {backdoor_file}
-Created: {datetime.now()}
+Created: {self.clock.now()}
 Capabilities: Remote shell, File transfer, Keylogging
 C&C Server: 192.168.1.100:4444
 Persistence: Registry Run key
@@ -74,7 +74,7 @@ Encryption: XOR with key 0xAB
                 f.write(backdoor_content)
             
             print(f"   📁 Created: {backdoor_file}")
-            time.sleep(0.5)
+            self.sleep(0.5)
         
         self.backdoor_active = True
         return len(backdoor_files)
@@ -102,10 +102,7 @@ Encryption: XOR with key 0xAB
         ]
         
         for i, keystroke in enumerate(fake_keystrokes):
-            if not self.is_running:
-                break
-                
-            timestamp = datetime.now()
+            timestamp = self.clock.now()
             self.keylog_data.append({
                 'timestamp': timestamp.isoformat(),
                 'application': keystroke.split(' - ')[0] if ' - ' in keystroke else 'system',
@@ -114,7 +111,7 @@ Encryption: XOR with key 0xAB
             })
             
             print(f"   📝 Captured: {keystroke}")
-            time.sleep(random.uniform(1, 3))
+            self.sleep(self.rng.uniform(1, 3))
         
         # Save keylog data
         keylog_file = os.path.join(self.test_dir, "keylog_data.log")
@@ -134,7 +131,8 @@ Encryption: XOR with key 0xAB
         ]
         
         for root, dirs, files in os.walk(self.test_dir):
-            for file in files:
+            dirs.sort()  # Stable order so a seeded run replays exactly
+            for file in sorted(files):
                 file_path = os.path.join(root, file)
                 file_size = os.path.getsize(file_path)
                 
@@ -145,13 +143,13 @@ Encryption: XOR with key 0xAB
                 self.stolen_data.append({
                     'file': file_path,
                     'size': file_size,
-                    'timestamp': datetime.now().isoformat(),
+                    'timestamp': self.clock.now().isoformat(),
                     'content_preview': content_preview,
                     'risk_level': self.assess_risk_level(file, content_preview)
                 })
                 
                 print(f"   💾 Stolen: {file} ({file_size} bytes)")
-                time.sleep(0.5)
+                self.sleep(0.5)
         
         return len(self.stolen_data)
     
@@ -186,17 +184,17 @@ Encryption: XOR with key 0xAB
             print(f"   🔗 Connecting to {server['type']}: {server['host']}:{server['port']}")
             
             # Simulate connection attempt
-            time.sleep(1)
+            self.sleep(1)
             
             # Simulate data exchange
             message = {
-                'victim_id': 'VM_' + str(random.randint(10000, 99999)),
+                'victim_id': 'VM_' + str(self.rng.randint(10000, 99999)),
                 'os': 'Linux Ubuntu 24.04',
                 'hostname': 'victim-machine',
                 'ip': '192.168.1.75',
                 'data_stolen': len(self.stolen_data),
                 'keylog_entries': len(self.keylog_data),
-                'timestamp': datetime.now().isoformat()
+                'timestamp': self.clock.now().isoformat()
             }
             
             communications.append({
@@ -208,7 +206,7 @@ Encryption: XOR with key 0xAB
             
             print(f"   ✅ Data sent to {server['host']}")
             print(f"   📥 Received commands from server")
-            time.sleep(1)
+            self.sleep(1)
         
         return communications
     
@@ -232,21 +230,18 @@ Encryption: XOR with key 0xAB
         shell_log = []
         
         for command in fake_commands:
-            if not self.is_running:
-                break
-                
             print(f"   🖥️ Executing: {command}")
             
             # Simulate command output
             fake_output = self.generate_fake_output(command)
             
             shell_log.append({
-                'timestamp': datetime.now().isoformat(),
+                'timestamp': self.clock.now().isoformat(),
                 'command': command,
                 'output': fake_output
             })
             
-            time.sleep(random.uniform(0.5, 2))
+            self.sleep(self.rng.uniform(0.5, 2))
         
         # Save shell log
         shell_log_file = os.path.join(self.test_dir, "remote_shell.log")
@@ -266,110 +261,58 @@ Encryption: XOR with key 0xAB
         }
         return outputs.get(command, f"Command '{command}' executed successfully")
     
-    def run_simulation(self, duration=300):
-        """Main trojan simulation execution"""
-        self.is_running = True
-        start_time = datetime.now()
-        results = {
-            'type': 'trojan',
-            'start_time': start_time.isoformat(),
-            'events': [],
+    def new_results(self):
+        return {
             'files_affected': 0,
             'network_connections': 0,
             'data_stolen': 0,
             'keylog_entries': 0,
             'threat_level': 'HIGH'
         }
-        
-        try:
-            print("🐴 STARTING TROJAN/BACKDOOR SIMULATION")
-            print("=" * 50)
-            
-            # Phase 1: Environment Setup
-            results['events'].append({
-                'time': datetime.now().isoformat(),
-                'phase': 'initialization',
-                'action': 'Setting up test environment',
-                'details': 'Creating fake sensitive files'
-            })
-            self.setup_test_environment()
-            
-            # Phase 2: Backdoor Installation
-            results['events'].append({
-                'time': datetime.now().isoformat(),
-                'phase': 'installation',
-                'action': 'Installing backdoor',
-                'details': 'Creating persistent access mechanism'
-            })
-            backdoor_files = self.simulate_backdoor_installation()
-            results['files_affected'] += backdoor_files
-            
-            if not self.is_running:
-                return results
-            
-            # Phase 3: Data Theft
-            results['events'].append({
-                'time': datetime.now().isoformat(),
-                'phase': 'data_theft',
-                'action': 'Stealing sensitive data',
-                'details': 'Searching and exfiltrating user files'
-            })
-            stolen_count = self.simulate_data_theft()
-            results['data_stolen'] = stolen_count
-            
-            # Phase 4: Keylogger
-            results['events'].append({
-                'time': datetime.now().isoformat(),
-                'phase': 'keylogging',
-                'action': 'Starting keylogger',
-                'details': 'Capturing user keystrokes'
-            })
-            keylog_count = self.simulate_keylogger()
-            results['keylog_entries'] = keylog_count
-            
-            if not self.is_running:
-                return results
-            
-            # Phase 5: C&C Communication
-            results['events'].append({
-                'time': datetime.now().isoformat(),
-                'phase': 'communication',
-                'action': 'Contacting C&C servers',
-                'details': 'Sending stolen data and receiving commands'
-            })
-            communications = self.simulate_c2_communication()
-            results['network_connections'] = len(communications)
-            
-            # Phase 6: Remote Shell
-            results['events'].append({
-                'time': datetime.now().isoformat(),
-                'phase': 'remote_access',
-                'action': 'Providing remote shell access',
-                'details': 'Executing commands from attacker'
-            })
-            shell_commands = self.simulate_remote_shell()
-            
-            # Final Results
-            results['end_time'] = datetime.now().isoformat()
-            results['duration'] = (datetime.now() - start_time).total_seconds()
-            
-            print("\n🎯 TROJAN SIMULATION COMPLETED")
-            print(f"📊 Files affected: {results['files_affected']}")
-            print(f"💾 Data items stolen: {results['data_stolen']}")
-            print(f"⌨️ Keylog entries: {results['keylog_entries']}")
-            print(f"🌐 Network connections: {results['network_connections']}")
-            print(f"📂 Test directory: {self.test_dir}")
-            print("\n⚠️ REMEMBER: This was a SAFE simulation for education!")
-            
-            return results
-            
-        except Exception as e:
-            print(f"❌ Simulation error: {e}")
-            results['error'] = str(e)
-            return results
-        
-        finally:
-            self.is_running = False
+    
+    def phases(self):
+        """The remote shell does not wait for C&C reporting; both follow the keylogger"""
+        return [
+            Phase('initialization', self._initialize, 'Setting up test environment',
+                  'Creating fake sensitive files'),
+            Phase('installation', self._install_backdoor, 'Installing backdoor',
+                  'Creating persistent access mechanism'),
+            Phase('data_theft', self._steal_data, 'Stealing sensitive data',
+                  'Searching and exfiltrating user files'),
+            Phase('keylogging', self._log_keys, 'Starting keylogger',
+                  'Capturing user keystrokes'),
+            Phase('communication', self._communicate, 'Contacting C&C servers',
+                  'Sending stolen data and receiving commands', after=['keylogging']),
+            Phase('remote_access', lambda results: self.simulate_remote_shell(),
+                  'Providing remote shell access', 'Executing commands from attacker',
+                  after=['keylogging']),
+        ]
+    
+    def _initialize(self, results):
+        print("🐴 STARTING TROJAN/BACKDOOR SIMULATION")
+        print("=" * 50)
+        self.setup_test_environment()
+    
+    def _install_backdoor(self, results):
+        results['files_affected'] += self.simulate_backdoor_installation()
+    
+    def _steal_data(self, results):
+        results['data_stolen'] = self.simulate_data_theft()
+    
+    def _log_keys(self, results):
+        results['keylog_entries'] = self.simulate_keylogger()
+    
+    def _communicate(self, results):
+        results['network_connections'] = len(self.simulate_c2_communication())
+    
+    def summarize(self, results):
+        print("\n🎯 TROJAN SIMULATION COMPLETED")
+        print(f"📊 Files affected: {results['files_affected']}")
+        print(f"💾 Data items stolen: {results['data_stolen']}")
+        print(f"⌨️ Keylog entries: {results['keylog_entries']}")
+        print(f"🌐 Network connections: {results['network_connections']}")
+        print(f"📂 Test directory: {self.test_dir}")
+        print("\n⚠️ REMEMBER: This was a SAFE simulation for education!")
     
     def cleanup(self):
         """Clean up test environment"""
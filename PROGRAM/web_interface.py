@@ -4,135 +4,123 @@ MalSim Pro Web Interface
 Simple Flask-based dashboard for malware simulation
 """
 
-from flask import Flask, render_template, jsonify, request, redirect, url_for, render_template_string
+from flask import Flask, Response, render_template, jsonify, request, redirect, url_for, render_template_string, stream_with_context
 import json
 import os
 import sys
 import time
 import threading
-from datetime import datetime
-import sqlite3
 
-class SimpleDB:
-    def __init__(self):
-        self.db_path = "malsim_analysis.db"
-        self.init_db()
+import monitor_stats
+from pagination import MAX_PAGE_SIZE, decode_cursor, encode_cursor
+from sim_cache import cache_key, resolve_seed
+from sim_clock import RealClock, clock_from_config, create_clock
+from sim_pipeline import CancellationToken
+from simulation_db import LIST_FIELDS, SimpleDB
+
+# Events per chunk written to streaming NDJSON exports
+NDJSON_CHUNK_SIZE = 200
+
+# Seconds a stopped simulation gets to wind down before it is detached as killed
+STOP_DEADLINE = 5.0
+
+class MalwareSimulator:
+    """Simple malware behavior simulator
     
-    def init_db(self):
-        """Initialize SQLite database"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS simulations (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                type TEXT NOT NULL,
-                status TEXT NOT NULL,
-                start_time TEXT NOT NULL,
-                end_time TEXT,
-                duration INTEGER,
-                results TEXT
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
+    stop() cancels the run through a token shared with the dedicated
+    simulator, so every sleep inside it wakes at once; `idle` is set as soon
+    as run_simulation has returned and the worker is free again, and
+    `recorded` once the run's outcome has been written to the database.
+    """
     
-    def add_simulation(self, sim_type, status="running"):
-        """Add new simulation record"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute(
-            "INSERT INTO simulations (type, status, start_time) VALUES (?, ?, ?)",
-            (sim_type, status, datetime.now().isoformat())
-        )
-        
-        sim_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
-        return sim_id
+    def __init__(self, sim_type, clock=None, seed=None, config=None):
+        self.sim_type = sim_type
+        self.clock = clock or RealClock()
+        self.config = config or {}  # Passed to the dedicated simulator classes
+        self.seed = resolve_seed(seed)
+        self.token = CancellationToken()
+        self.idle = threading.Event()
+        self.recorded = threading.Event()
+        self._stop_lock = threading.Lock()
+        self.stop_requested_at = None  # Only set by a stop() that arrived before the run ended
+        self.stop_latency = None  # Seconds from stop() until the worker was idle
+        self.killed = False  # Missed the stop deadline; its results are discarded
+        
+    @property
+    def is_running(self):
+        return not self.idle.is_set() and not self.token.cancelled
     
-    def update_simulation(self, sim_id, status, results=None):
-        """Update simulation record"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        if results:
-            cursor.execute(
-                "UPDATE simulations SET status=?, end_time=?, results=? WHERE id=?",
-                (status, datetime.now().isoformat(), json.dumps(results), sim_id)
-            )
-        else:
-            cursor.execute(
-                "UPDATE simulations SET status=?, end_time=? WHERE id=?",
-                (status, datetime.now().isoformat(), sim_id)
-            )
-        
-        conn.commit()
-        conn.close()
+    @property
+    def stopped(self):
+        """Whether a stop() arrived before the run ended"""
+        return self.stop_requested_at is not None
     
-    def get_simulations(self, limit=50):
-        """Get simulation records"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute(
-            "SELECT * FROM simulations ORDER BY start_time DESC LIMIT ?",
-            (limit,)
-        )
-        
-        results = cursor.fetchall()
-        conn.close()
-        
-        # Convert to dict format
-        simulations = []
-        for row in results:
-            simulations.append({
-                'id': row[0],
-                'type': row[1],
-                'status': row[2],
-                'start_time': row[3],
-                'end_time': row[4],
-                'duration': row[5],
-                'results': json.loads(row[6]) if row[6] else {}
-            })
-        
-        return simulations
-
-class MalwareSimulator:
-    """Simple malware behavior simulator"""
+    def stop(self):
+        """Cancel the run; safe to call before it starts or more than once
+        
+        Returns False when the run had already finished on its own.
+        """
+        with self._stop_lock:
+            if self.idle.is_set():
+                return False
+            if self.stop_requested_at is None:
+                self.stop_requested_at = time.monotonic()
+            self.token.cancel()
+            return True
+    
+    def wait_idle(self, timeout=None):
+        return self.idle.wait(timeout)
+    
+    def kill(self):
+        """Give up on a run that missed the stop deadline
+        
+        Returns False if the worker went idle just in time; then run_sim
+        records the run as usual.
+        """
+        with self._stop_lock:
+            if self.idle.is_set():
+                return False
+            self.killed = True
+            return True
+    
+    def claim_result(self):
+        """Whether the worker may record its outcome; False once it was killed"""
+        with self._stop_lock:
+            return not self.killed
     
-    def __init__(self, sim_type):
-        self.sim_type = sim_type
-        self.is_running = False
-        
     def run_simulation(self, duration=300):
         """Run malware simulation safely"""
-        self.is_running = True
-        
+        try:
+            return self._run(duration)
+        finally:
+            with self._stop_lock:
+                if self.stop_requested_at is not None:
+                    self.stop_latency = time.monotonic() - self.stop_requested_at
+                self.idle.set()
+    
+    def _run(self, duration):
         print(f"🔬 Starting {self.sim_type} simulation...")
         
         # Use the dedicated simulator classes
         if self.sim_type == 'ransomware':
             from ransomware_sim import RansomwareSimulator
-            simulator = RansomwareSimulator()
-            return simulator.run_simulation(duration)
+            simulator = RansomwareSimulator(config=self.config, clock=self.clock, seed=self.seed)
+            return simulator.run_simulation(duration, self.token)
         elif self.sim_type == 'trojan':
             from trojan_sim import TrojanSimulator
-            simulator = TrojanSimulator()
-            return simulator.run_simulation(duration)
+            simulator = TrojanSimulator(config=self.config, clock=self.clock, seed=self.seed)
+            return simulator.run_simulation(duration, self.token)
         elif self.sim_type == 'worm':
             from worm_sim import WormSimulator
-            simulator = WormSimulator()
-            return simulator.run_simulation(duration)
+            simulator = WormSimulator(config=self.config, clock=self.clock, seed=self.seed)
+            return simulator.run_simulation(duration, self.token)
         elif self.sim_type == 'spyware':
             results = self._simulate_spyware(duration)
         else:
             # Fallback to basic simulation
             results = {
                 'type': self.sim_type,
-                'start_time': datetime.now().isoformat(),
+                'start_time': self.clock.now().isoformat(),
                 'events': [],
                 'files_affected': 0,
                 'processes_spawned': 0,
@@ -140,9 +128,12 @@ class MalwareSimulator:
                 'threat_level': 'LOW'
             }
         
-        results['end_time'] = datetime.now().isoformat()
+        results['end_time'] = self.clock.now().isoformat()
         results['duration'] = duration
-        self.is_running = False
+        results['clock'] = self.clock.describe()
+        results['seed'] = self.seed
+        if self.token.cancelled:
+            results['cancelled'] = True
         
         return results
     
@@ -156,7 +147,7 @@ class MalwareSimulator:
         
         # Simulate file operations
         for i in range(min(10, duration//30)):
-            time.sleep(1)
+            self.clock.sleep(1, self.token)
             filename = f"test_file_{i}.txt"
             filepath = os.path.join(test_dir, filename)
             
@@ -165,13 +156,13 @@ class MalwareSimulator:
                 f.write(f"Test data for simulation {i}")
             
             events.append({
-                'time': datetime.now().isoformat(),
+                'time': self.clock.now().isoformat(),
                 'type': 'file_encrypt',
                 'target': filepath,
                 'description': f'Encrypted file: {filename}'
             })
             
-            if not self.is_running:
+            if self.token.cancelled:
                 break
         
         # Cleanup
@@ -193,15 +184,15 @@ class MalwareSimulator:
         events = []
         
         for i in range(min(5, duration//60)):
-            time.sleep(1)
+            self.clock.sleep(1, self.token)
             events.append({
-                'time': datetime.now().isoformat(),
+                'time': self.clock.now().isoformat(),
                 'type': 'backdoor_connection',
                 'target': f'192.168.1.{100+i}',
                 'description': f'Attempted backdoor connection to remote server'
             })
             
-            if not self.is_running:
+            if self.token.cancelled:
                 break
         
         return {
@@ -218,15 +209,15 @@ class MalwareSimulator:
         events = []
         
         for i in range(min(8, duration//40)):
-            time.sleep(1)
+            self.clock.sleep(1, self.token)
             events.append({
-                'time': datetime.now().isoformat(),
+                'time': self.clock.now().isoformat(),
                 'type': 'network_scan',
                 'target': f'192.168.1.{i+1}',
                 'description': f'Scanning network host for vulnerabilities'
             })
             
-            if not self.is_running:
+            if self.token.cancelled:
                 break
         
         return {
@@ -243,15 +234,15 @@ class MalwareSimulator:
         events = []
         
         for i in range(min(15, duration//20)):
-            time.sleep(1)
+            self.clock.sleep(1, self.token)
             events.append({
-                'time': datetime.now().isoformat(),
+                'time': self.clock.now().isoformat(),
                 'type': 'data_collection',
                 'target': f'keystrokes_{i}',
                 'description': f'Captured user input data'
             })
             
-            if not self.is_running:
+            if self.token.cancelled:
                 break
         
         return {
@@ -266,16 +257,35 @@ class MalwareSimulator:
 # Global variables for simulation state
 db = SimpleDB()
 current_simulations = {}
+analysis_db = None
 
-def create_app():
+def get_analysis_db():
+    """Open the monitoring database on first use"""
+    global analysis_db
+    if analysis_db is None:
+        from analysis_db import AnalysisDB
+        analysis_db = AnalysisDB()
+    return analysis_db
+
+def create_app(config=None):
     """Create Flask application"""
     app = Flask(__name__)
     app.secret_key = 'malsim_pro_demo_key'
     
+    stop_deadline = (config or {}).get('simulation', {}).get('stop_deadline_seconds', STOP_DEADLINE)
+    
+    # Enforce database.retention_days from settings.json in the background
+    retention = None
+    if config:
+        from retention import RetentionEngine
+        retention = RetentionEngine.from_config(get_analysis_db(), config)
+        if retention:
+            retention.start()
+    
     @app.route('/')
     def dashboard():
         """Main dashboard"""
-        simulations = db.get_simulations(10)
+        simulations = db.get_simulations(10, fields=LIST_FIELDS)
         return render_template_string(DASHBOARD_HTML, simulations=simulations)
     
     @app.route('/api/start_simulation', methods=['POST'])
@@ -285,47 +295,212 @@ def create_app():
         sim_type = data.get('type', 'ransomware')
         duration = data.get('duration', 30)  # Short duration for demo
         
+        # Optional clock override, e.g. {"clock": "scaled", "clock_scale": 10}
+        try:
+            if data.get('clock'):
+                clock = create_clock(data['clock'], data.get('clock_scale'))
+            else:
+                clock = clock_from_config(config)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
+        # Optional simulator config, e.g. {"config": {"test_dir": "/tmp/run1"}}
+        sim_config = data.get('config') or {}
+        if not isinstance(sim_config, dict):
+            return jsonify({'success': False, 'error': 'config must be an object'}), 400
+        
+        # Runs with the same type, config, seed and duration are identical; serve repeats from the cache
+        try:
+            seed = resolve_seed(data.get('seed'))
+            key = cache_key(sim_type, seed, duration, sim_config)
+        except (TypeError, ValueError):
+            return jsonify({'success': False, 'error': 'seed and duration must be numbers'}), 400
+        cached = None if data.get('no_cache') else db.find_cached_results(key)
+        if cached:
+            cached_id, results = cached
+            sim_id = db.add_simulation(sim_type, "completed", seed, key)
+            db.update_simulation(sim_id, "completed", dict(results, cached_from=cached_id))
+            return jsonify({'success': True, 'simulation_id': sim_id, 'seed': seed, 'cached': True})
+        
         # Create simulation record
-        sim_id = db.add_simulation(sim_type, "running")
+        sim_id = db.add_simulation(sim_type, "running", seed, key)
         
         # Start simulation in background thread
-        simulator = MalwareSimulator(sim_type)
+        simulator = MalwareSimulator(sim_type, clock, seed, sim_config)
         current_simulations[sim_id] = simulator
         
         def run_sim():
             try:
                 results = simulator.run_simulation(duration)
-                db.update_simulation(sim_id, "completed", results)
+                if not simulator.claim_result():
+                    return  # stop_simulation already recorded it as killed
+                if simulator.stopped:
+                    results['stop_latency_ms'] = simulator.stop_latency * 1000
+                    db.update_simulation(sim_id, "stopped", results)
+                else:
+                    db.update_simulation(sim_id, "completed", results)
             except Exception as e:
-                db.update_simulation(sim_id, "failed", {"error": str(e)})
+                if simulator.claim_result():
+                    db.update_simulation(sim_id, "failed", {"error": str(e)})
             finally:
-                if sim_id in current_simulations:
+                simulator.recorded.set()
+                if current_simulations.get(sim_id) is simulator:
                     del current_simulations[sim_id]
         
         thread = threading.Thread(target=run_sim)
         thread.daemon = True
         thread.start()
         
-        return jsonify({'success': True, 'simulation_id': sim_id})
+        return jsonify({'success': True, 'simulation_id': sim_id, 'seed': seed, 'cached': False})
     
     @app.route('/api/simulations')
     def get_simulations():
-        """Get simulation list"""
-        simulations = db.get_simulations()
-        return jsonify(simulations)
+        """Get simulation list
+        
+        Query args: limit, after=<start_time,id>, type, status, since, until,
+        fields=<comma separated columns>. The cursor for the next page is
+        returned in the X-Next-Cursor header.
+        """
+        limit = request.args.get('limit', 50, type=int)
+        after = request.args.get('after')
+        fields = request.args.get('fields')
+        try:
+            after = decode_cursor(after) if after else None
+            simulations = db.get_simulations(
+                limit=limit,
+                after=after,
+                sim_type=request.args.get('type'),
+                status=request.args.get('status'),
+                since=request.args.get('since'),
+                until=request.args.get('until'),
+                fields=[field.strip() for field in fields.split(',')] if fields else None
+            )
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
+        response = jsonify(simulations)
+        if simulations and len(simulations) >= min(limit, MAX_PAGE_SIZE):
+            last = simulations[-1]
+            response.headers['X-Next-Cursor'] = encode_cursor(last['start_time'], last['id'])
+        return response
+    
+    @app.route('/api/simulations/<int:sim_id>/results')
+    def get_simulation_results(sim_id):
+        """Get the full results of a single simulation"""
+        results = db.get_simulation_results(sim_id)
+        if results is None:
+            return jsonify({'success': False, 'error': 'Simulation not found'}), 404
+        return jsonify(results)
+    
+    @app.route('/api/sessions/<session_id>/events.ndjson')
+    def export_session_events(session_id):
+        """Stream every event of a monitoring session as NDJSON"""
+        adb = get_analysis_db()
+        session_id = adb.resolve_session_id(session_id)
+        if not adb.session_exists(session_id):
+            return jsonify({'success': False, 'error': 'Session not found'}), 404
+        
+        def generate():
+            chunk = []
+            for event in adb.iter_session_events(session_id):
+                chunk.append(json.dumps(event, default=str))
+                if len(chunk) >= NDJSON_CHUNK_SIZE:
+                    yield '\n'.join(chunk) + '\n'
+                    chunk = []
+            if chunk:
+                yield '\n'.join(chunk) + '\n'
+        
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    
+    @app.route('/api/sessions/<session_id>/process_tree')
+    def get_process_tree(session_id):
+        """Get the process tree recorded for a monitoring session
+        
+        Query args: pid and create_time select a single subtree.
+        """
+        adb = get_analysis_db()
+        session_id = adb.resolve_session_id(session_id)
+        if not adb.session_exists(session_id):
+            return jsonify({'success': False, 'error': 'Session not found'}), 404
+        
+        pid = request.args.get('pid', type=int)
+        create_time = request.args.get('create_time', type=float)
+        root = (pid, create_time) if pid is not None and create_time is not None else None
+        return jsonify(adb.get_process_tree(session_id, root))
+    
+    @app.route('/api/sessions/<session_id>/metrics/<metric>')
+    def get_session_metric(session_id, metric):
+        """Get a downsampled resource curve for charting
+        
+        Query args: points (default 500), method=lttb|minmax, resolution=10|60.
+        """
+        adb = get_analysis_db()
+        session_id = adb.resolve_session_id(session_id)
+        if not adb.session_exists(session_id):
+            return jsonify({'success': False, 'error': 'Session not found'}), 404
+        
+        try:
+            series = adb.get_timeseries(
+                session_id, metric,
+                resolution=request.args.get('resolution', type=int),
+                max_points=min(request.args.get('points', 500, type=int), MAX_PAGE_SIZE * 10),
+                method=request.args.get('method', 'lttb')
+            )
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        return jsonify(series)
+    
+    @app.route('/api/retention')
+    def get_retention_report():
+        """Get the result of the most recent retention run"""
+        if retention is None:
+            return jsonify({'enabled': False})
+        return jsonify({
+            'enabled': True,
+            'retention_days': retention.retention_days,
+            'last_run': retention.last_report
+        })
+    
+    @app.route('/api/monitoring/metrics')
+    def get_monitoring_metrics():
+        """Get sweep cost, event and error counters of the live monitors and sampler"""
+        return jsonify(monitor_stats.collect())
     
     @app.route('/api/stop_simulation', methods=['POST'])
     def stop_simulation():
-        """Stop running simulation"""
+        """Stop running simulation
+        
+        Waits up to the stop deadline for the worker to go idle. A run that
+        misses it is detached and recorded as killed; its thread cannot be
+        interrupted, but whatever it returns later is discarded.
+        """
         data = request.get_json()
         sim_id = data.get('simulation_id')
-        
-        if sim_id and sim_id in current_simulations:
-            current_simulations[sim_id].is_running = False
-            db.update_simulation(sim_id, "stopped")
-            return jsonify({'success': True})
-        
-        return jsonify({'success': False, 'error': 'Simulation not found'})
+        simulator = current_simulations.get(sim_id) if sim_id else None
+        
+        if simulator is None:
+            return jsonify({'success': False, 'error': 'Simulation not found'})
+        
+        deadline = time.monotonic() + stop_deadline
+        if not simulator.stop():
+            # Finished on its own before the stop arrived; run_sim records its real outcome
+            simulator.recorded.wait(stop_deadline)
+            return jsonify({'success': True, 'status': 'finished', 'stop_latency_ms': None})
+        
+        # A worker that goes idle between the timeout and kill() is not killed after all
+        if simulator.wait_idle(stop_deadline) or not simulator.kill():
+            # Reply once run_sim has recorded the stopped run with its partial results
+            simulator.recorded.wait(max(0.0, deadline - time.monotonic()))
+            return jsonify({'success': True, 'status': 'stopped',
+                            'stop_latency_ms': simulator.stop_latency * 1000})
+        
+        if current_simulations.get(sim_id) is simulator:
+            del current_simulations[sim_id]
+        db.update_simulation(sim_id, "killed", {
+            'error': f'Did not stop within {stop_deadline}s',
+            'seed': simulator.seed
+        })
+        return jsonify({'success': True, 'status': 'killed', 'stop_latency_ms': None})
     
     return app
 
@@ -347,6 +522,8 @@ DASHBOARD_HTML = '''
         .status.running { background: #f39c12; }
         .status.completed { background: #27ae60; }
         .status.failed { background: #e74c3c; }
+        .status.stopped { background: #7f8c8d; }
+        .status.killed { background: #8e44ad; }
         table { width: 100%; border-collapse: collapse; margin-top: 10px; }
         th, td { padding: 10px; text-align: left; border-bottom: 1px solid #ddd; }
         th { background: #34495e; color: white; }
@@ -13,19 +13,20 @@ This simulator demonstrates worm behavior patterns:
 
 import os
 import sys
-import time
 import json
-import random
 import threading
-from datetime import datetime
 
-class WormSimulator:
-    def __init__(self, config=None):
-        self.config = config or {}
-        self.is_running = False
-        self.test_dir = "/tmp/malsim_worm_test"
+from sim_pipeline import Phase, PhasedSimulator
+
+class WormSimulator(PhasedSimulator):
+    sim_type = 'worm'
+    
+    def __init__(self, config=None, clock=None, seed=None):
+        super().__init__(config, clock, seed)
+        self.test_dir = self.config.get('test_dir', "/tmp/malsim_worm_test")
         self.infected_hosts = []
         self.network_scans = []
+        self.network_map = {}
         
     def setup_test_environment(self):
         """Create test environment for worm simulation"""
@@ -67,14 +68,11 @@ class WormSimulator:
             print(f"   🌐 Scanning subnet: {subnet}")
             
             for ip, info in hosts.items():
-                if not self.is_running:
-                    break
-                    
                 print(f"   🎯 Scanning host: {ip}")
                 
                 for technique in scan_techniques:
                     scan_result = {
-                        'timestamp': datetime.now().isoformat(),
+                        'timestamp': self.clock.now().isoformat(),
                         'target_ip': ip,
                         'technique': technique,
                         'os_detected': info['os'],
@@ -84,7 +82,7 @@ class WormSimulator:
                     
                     self.network_scans.append(scan_result)
                     print(f"     📡 {technique}: {ip} ({info['os']}) - {len(scan_result['vulnerabilities'])} vulns found")
-                    time.sleep(random.uniform(0.5, 1.5))
+                    self.sleep(self.rng.uniform(0.5, 1.5))
         
         return len(self.network_scans)
     
@@ -123,8 +121,8 @@ class WormSimulator:
         available_vulns = possible_vulns.get(os_type, ["Unknown vulnerability"])
         
         # Randomly select 1-3 vulnerabilities
-        num_vulns = random.randint(1, min(3, len(available_vulns)))
-        return random.sample(available_vulns, num_vulns)
+        num_vulns = self.rng.randint(1, min(3, len(available_vulns)))
+        return self.rng.sample(available_vulns, num_vulns)
     
     def simulate_exploitation(self):
         """Simulate exploitation attempts"""
@@ -133,16 +131,10 @@ class WormSimulator:
         successful_infections = []
         
         for scan in self.network_scans:
-            if not self.is_running:
-                break
-                
             target_ip = scan['target_ip']
             vulnerabilities = scan['vulnerabilities']
             
             for vuln in vulnerabilities:
-                if not self.is_running:
-                    break
-                    
                 print(f"   🔓 Exploiting {vuln} on {target_ip}")
                 
                 # Simulate exploitation success rate
@@ -156,9 +148,9 @@ class WormSimulator:
                 base_success = 0.3  # Default success rate
                 actual_success = success_rate.get(vuln.split()[0], base_success)
                 
-                if random.random() < actual_success:
+                if self.rng.random() < actual_success:
                     infection = {
-                        'timestamp': datetime.now().isoformat(),
+                        'timestamp': self.clock.now().isoformat(),
                         'target_ip': target_ip,
                         'vulnerability': vuln,
                         'method': 'Remote Code Execution',
@@ -173,7 +165,7 @@ class WormSimulator:
                 else:
                     print(f"   ❌ Exploitation failed: {target_ip}")
                 
-                time.sleep(random.uniform(1, 3))
+                self.sleep(self.rng.uniform(1, 3))
         
         return successful_infections
     
@@ -193,7 +185,7 @@ class WormSimulator:
             worm_content = f"""
 FAKE WORM COMPONENT - {worm_file}
 Target Host: {target_ip}
-Installation Time: {datetime.now()}
+Installation Time: {self.clock.now()}
 Capabilities: Network scanning, Self-replication, Data theft
 Next Targets: Calculate new subnet ranges
 Persistence: Service installation, Registry modification
@@ -202,7 +194,7 @@ Persistence: Service installation, Registry modification
                 f.write(worm_content)
             
             print(f"     📁 Installed: {worm_file}")
-            time.sleep(0.3)
+            self.sleep(0.3)
     
     def simulate_lateral_movement(self):
         """Simulate lateral movement and further propagation"""
@@ -211,9 +203,6 @@ Persistence: Service installation, Registry modification
         lateral_actions = []
         
         for infected_ip in self.infected_hosts:
-            if not self.is_running:
-                break
-                
             print(f"   🔄 Using {infected_ip} as pivot point")
             
             # Simulate discovering new network ranges
@@ -225,16 +214,16 @@ Persistence: Service installation, Registry modification
             
             for network_range in new_ranges:
                 action = {
-                    'timestamp': datetime.now().isoformat(),
+                    'timestamp': self.clock.now().isoformat(),
                     'pivot_host': infected_ip,
                     'action': 'Network Discovery',
                     'target_range': network_range,
-                    'new_hosts_found': random.randint(3, 15)
+                    'new_hosts_found': self.rng.randint(3, 15)
                 }
                 lateral_actions.append(action)
                 
                 print(f"     🌐 Discovered {action['new_hosts_found']} hosts in {network_range}")
-                time.sleep(1)
+                self.sleep(1)
         
         return lateral_actions
     
@@ -252,16 +241,13 @@ Persistence: Service installation, Registry modification
         delivered_payloads = []
         
         for infected_ip in self.infected_hosts:
-            if not self.is_running:
-                break
-                
             # Each infected host gets 1-2 random payloads
-            num_payloads = random.randint(1, 2)
-            selected_payloads = random.sample(payloads, num_payloads)
+            num_payloads = self.rng.randint(1, 2)
+            selected_payloads = self.rng.sample(payloads, num_payloads)
             
             for payload in selected_payloads:
                 delivery = {
-                    'timestamp': datetime.now().isoformat(),
+                    'timestamp': self.clock.now().isoformat(),
                     'target_host': infected_ip,
                     'payload_name': payload['name'],
                     'expected_impact': payload['impact'],
@@ -270,107 +256,59 @@ Persistence: Service installation, Registry modification
                 delivered_payloads.append(delivery)
                 
                 print(f"   💣 Delivered '{payload['name']}' to {infected_ip}")
-                time.sleep(0.5)
+                self.sleep(0.5)
         
         return delivered_payloads
     
-    def run_simulation(self, duration=300):
-        """Main worm simulation execution"""
-        self.is_running = True
-        start_time = datetime.now()
-        results = {
-            'type': 'worm',
-            'start_time': start_time.isoformat(),
-            'events': [],
+    def new_results(self):
+        return {
             'hosts_scanned': 0,
             'hosts_infected': 0,
             'network_connections': 0,
             'payloads_delivered': 0,
             'threat_level': 'CRITICAL'
         }
-        
-        try:
-            print("🪱 STARTING NETWORK WORM SIMULATION")
-            print("=" * 50)
-            
-            # Phase 1: Environment Setup
-            results['events'].append({
-                'time': datetime.now().isoformat(),
-                'phase': 'initialization',
-                'action': 'Setting up network environment',
-                'details': 'Creating fake network topology'
-            })
-            network_map = self.setup_test_environment()
-            
-            # Phase 2: Network Scanning
-            results['events'].append({
-                'time': datetime.now().isoformat(),
-                'phase': 'reconnaissance',
-                'action': 'Scanning network for targets',
-                'details': 'Performing comprehensive network reconnaissance'
-            })
-            scans_performed = self.simulate_network_scanning(network_map)
-            results['hosts_scanned'] = scans_performed
-            results['network_connections'] = scans_performed * 3  # Multiple connections per scan
-            
-            if not self.is_running:
-                return results
-            
-            # Phase 3: Exploitation
-            results['events'].append({
-                'time': datetime.now().isoformat(),
-                'phase': 'exploitation',
-                'action': 'Exploiting vulnerabilities',
-                'details': 'Attempting to infect discovered hosts'
-            })
-            successful_infections = self.simulate_exploitation()
-            results['hosts_infected'] = len(successful_infections)
-            
-            if not self.is_running:
-                return results
-            
-            # Phase 4: Lateral Movement
-            results['events'].append({
-                'time': datetime.now().isoformat(),
-                'phase': 'lateral_movement',
-                'action': 'Expanding through network',
-                'details': 'Using infected hosts to find new targets'
-            })
-            lateral_actions = self.simulate_lateral_movement()
-            
-            # Phase 5: Payload Delivery
-            results['events'].append({
-                'time': datetime.now().isoformat(),
-                'phase': 'payload_delivery',
-                'action': 'Delivering secondary payloads',
-                'details': 'Installing additional malicious components'
-            })
-            delivered_payloads = self.simulate_payload_delivery()
-            results['payloads_delivered'] = len(delivered_payloads)
-            
-            # Final Results
-            results['end_time'] = datetime.now().isoformat()
-            results['duration'] = (datetime.now() - start_time).total_seconds()
-            
-            print("
-🎯 WORM SIMULATION COMPLETED")
-            print(f"🔍 Hosts scanned: {results['hosts_scanned']}")
-            print(f"💥 Hosts infected: {results['hosts_infected']}")
-            print(f"🌐 Network connections: {results['network_connections']}")
-            print(f"💣 Payloads delivered: {results['payloads_delivered']}")
-            print(f"📂 Test directory: {self.test_dir}")
-            print("
-⚠️ REMEMBER: This was a SAFE simulation for education!")
-            
-            return results
-            
-        except Exception as e:
-            print(f"❌ Simulation error: {e}")
-            results['error'] = str(e)
-            return results
-        
-        finally:
-            self.is_running = False
+    
+    def phases(self):
+        """Lateral movement and payload delivery both work from the infected hosts"""
+        return [
+            Phase('initialization', self._initialize, 'Setting up network environment',
+                  'Creating fake network topology'),
+            Phase('reconnaissance', self._scan, 'Scanning network for targets',
+                  'Performing comprehensive network reconnaissance'),
+            Phase('exploitation', self._exploit, 'Exploiting vulnerabilities',
+                  'Attempting to infect discovered hosts'),
+            Phase('lateral_movement', lambda results: self.simulate_lateral_movement(),
+                  'Expanding through network', 'Using infected hosts to find new targets',
+                  after=['exploitation']),
+            Phase('payload_delivery', self._deliver_payloads, 'Delivering secondary payloads',
+                  'Installing additional malicious components', after=['exploitation']),
+        ]
+    
+    def _initialize(self, results):
+        print("🪱 STARTING NETWORK WORM SIMULATION")
+        print("=" * 50)
+        self.network_map = self.setup_test_environment()
+    
+    def _scan(self, results):
+        scans_performed = self.simulate_network_scanning(self.network_map)
+        results['hosts_scanned'] = scans_performed
+        results['network_connections'] = scans_performed * 3  # Multiple connections per scan
+    
+    def _exploit(self, results):
+        results['hosts_infected'] = len(self.simulate_exploitation())
+    
+    def _deliver_payloads(self, results):
+        results['payloads_delivered'] = len(self.simulate_payload_delivery())
+    
+    def summarize(self, results):
+        print("\n🎯 WORM SIMULATION COMPLETED")
+        print(f"🔍 Hosts scanned: {results['hosts_scanned']}")
+        print(f"💥 Hosts infected: {results['hosts_infected']}")
+        print(f"🌐 Network connections: {results['network_connections']}")
+        print(f"💣 Payloads delivered: {results['payloads_delivered']}")
+        print(f"📂 Test directory: {self.test_dir}")
+        print("\n⚠️ REMEMBER: This was a SAFE simulation for education!")
     
     def cleanup(self):
         """Clean up test environment"""
@@ -387,9 +325,7 @@ if __name__ == "__main__":
     simulator = WormSimulator()
     print("🔬 Testing Worm Simulator")
     results = simulator.run_simulation(60)
-    print(f"
-📋 Results: {json.dumps(results, indent=2)}")
+    print(f"\n📋 Results: {json.dumps(results, indent=2)}")
     
-    input("
-Press Enter to cleanup...")
+    input("\nPress Enter to cleanup...")
     simulator.cleanup()